@@ -0,0 +1,241 @@
+"""
+Read-through query and response caches.
+
+This module contains the in-process caches used by the repositories of
+the reference tables (countries, states, cities and vaccines) and by
+the cached GET routes.
+It is responsible for:
+- Keeping query results keyed by repository method and arguments
+- Keeping encoded response bodies within a memory budget
+- Remembering, for a short time, the IDs that were not found
+- Expiring entries after a TTL and evicting the least recently used ones
+- Invalidating every entry that depends on a table when it is written
+- Counting hits, misses, evictions and invalidations for monitoring
+
+Each table has a generation counter bumped on invalidation, so a read that
+started before a write never stores its (possibly stale) result.
+"""
+
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Hashable, Iterable
+from app.config import settings
+from app.versions import table_versions
+
+
+class QueryCache:
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 300.0, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        # key -> (expires at, tables, value, weight), least recently used first
+        self._entries: OrderedDict[Hashable, tuple[float, tuple[str, ...], Any, int]] = OrderedDict()
+        self._weight = 0
+        self._keys_by_table: dict[str, set[Hashable]] = {}
+        self._generations: dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def budget(self) -> int:
+        return self.max_entries
+
+    @property
+    def enabled(self) -> bool:
+        return self.budget > 0 and self.ttl_seconds > 0
+
+    def weigh(self, value: Any) -> int:
+        """Share of the budget taken by `value`: one entry."""
+        return 1
+
+    def generation(self, tables: Iterable[str]) -> tuple[int, ...]:
+        return tuple(self._generations.get(table, 0) for table in tables)
+
+    def get(self, key: Hashable) -> tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return False, None
+        expires_at, _, value, _ = entry
+        if expires_at <= self._clock():
+            self._discard(key)
+            self.expirations += 1
+            self.misses += 1
+            return False, None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return True, value
+
+    def set(self, key: Hashable, value: Any, tables: tuple[str, ...], generation: tuple[int, ...] | None = None) -> None:
+        """
+        Stores `value` as depending on `tables`. Skipped when `generation`
+        (taken before the query ran) is older than the current one.
+        """
+        if not self.enabled:
+            return
+        if generation is not None and generation != self.generation(tables):
+            return
+        weight = self.weigh(value)
+        if weight > self.budget:
+            return
+        self._discard(key)
+        self._entries[key] = (self._clock() + self.ttl_seconds, tables, value, weight)
+        self._weight += weight
+        for table in tables:
+            self._keys_by_table.setdefault(table, set()).add(key)
+        while self._weight > self.budget:
+            self._discard(next(iter(self._entries)))
+            self.evictions += 1
+
+    def invalidate(self, *tables: str) -> None:
+        for table in tables:
+            self._generations[table] = self._generations.get(table, 0) + 1
+            for key in list(self._keys_by_table.pop(table, ())):
+                self._discard(key)
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        self.invalidate(*list(self._keys_by_table))
+        self._entries.clear()
+
+    def _discard(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._weight -= entry[3]
+        for table in entry[1]:
+            keys = self._keys_by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_table[table]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations
+        }
+
+
+class ResponseCache(QueryCache):
+    """QueryCache of encoded response bodies, bounded by their total size in bytes."""
+
+    # Rough cost of the key and the bookkeeping of one entry
+    ENTRY_OVERHEAD = 256
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, ttl_seconds: float = 300.0, clock: Callable[[], float] = time.monotonic):
+        super().__init__(max_entries=0, ttl_seconds=ttl_seconds, clock=clock)
+        self.max_bytes = max_bytes
+
+    @property
+    def budget(self) -> int:
+        return self.max_bytes
+
+    def weigh(self, value: bytes) -> int:
+        return len(value) + self.ENTRY_OVERHEAD
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        del stats["max_entries"]
+        return {**stats, "bytes": self._weight, "max_bytes": self.max_bytes}
+
+
+def cached(*tables: str):
+    """
+    Caches the result of a repository read in `self.cache`, keyed by the
+    method and its arguments. `tables` are the tables the result depends on.
+    """
+    def decorator(method):
+        @wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            key = (method.__qualname__, args, tuple(sorted(kwargs.items())))
+            hit, value = self.cache.get(key)
+            if hit:
+                return value
+            generation = self.cache.generation(tables)
+            value = await method(self, *args, **kwargs)
+            self.cache.set(key, value, tables, generation)
+            return value
+        return wrapper
+    return decorator
+
+
+def remembers_missing(table: str):
+    """
+    Answers `get_by_id` lookups of IDs recently not found in `table` from
+    `self.missing`, without querying the database. Only the misses are
+    stored, so the found rows are never served stale. Meant for the tables
+    outside the query cache: `cached` already keeps the misses too.
+    """
+    def decorator(method):
+        @wraps(method)
+        async def wrapper(self, id: int):
+            key = (table, id)
+            hit, _ = self.missing.get(key)
+            if hit:
+                return None
+            generation = self.missing.generation((table,))
+            row = await method(self, id)
+            if row is None:
+                self.missing.set(key, True, (table,), generation)
+            return row
+        return wrapper
+    return decorator
+
+
+def invalidates(*tables: str):
+    """
+    Runs after a successful write to a reference table: drops the cached
+    reads of `tables`, bumps their versions in `self.versions` and rebuilds
+    them in the `self.reference_data` snapshot. A failed write leaves them
+    as they are, and its exception is not masked by a failing rebuild.
+    """
+    def decorator(method):
+        @wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            result = await method(self, *args, **kwargs)
+            self.cache.invalidate(*tables)
+            await self.versions.bump(*tables)
+            await self.reference_data.refresh(self.database, *tables)
+            return result
+        return wrapper
+    return decorator
+
+
+query_cache = QueryCache(
+    max_entries=settings.QUERY_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.QUERY_CACHE_TTL_SECONDS
+)
+
+response_cache = ResponseCache(
+    max_bytes=settings.RESPONSE_CACHE_MAX_BYTES,
+    ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS
+)
+
+missing_ids = QueryCache(
+    max_entries=settings.NEGATIVE_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.NEGATIVE_CACHE_TTL_SECONDS
+)
+
+
+async def _forget_missing_ids(tables: tuple[str, ...], remote: bool) -> None:
+    # Any write, local or announced by another worker, may create the missing IDs
+    missing_ids.invalidate(*tables)
+
+
+table_versions.subscribe(_forget_missing_ids)
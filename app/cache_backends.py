@@ -0,0 +1,252 @@
+"""
+Pluggable stores for the response cache.
+
+This module contains the backends behind the cached GET routes.
+It is responsible for:
+- Defining the CacheBackend interface used by `cache_response`
+- Keeping responses in the process (MemoryCacheBackend, the default)
+- Sharing responses between workers through a Redis server (RedisCacheBackend)
+- Publishing every local write so the other workers drop their own state
+
+The backend is chosen by the CACHE_BACKEND setting: "memory" or "redis"
+(requires the `redis` extra).
+"""
+
+import asyncio
+import json
+import secrets
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable
+from app.cache import ResponseCache, response_cache
+from app.config import logger, settings
+from app.versions import VERSIONED_TABLES, table_versions
+
+try:
+    import redis.asyncio as redis
+    from redis.exceptions import RedisError
+except ImportError:  # optional extra: poetry install -E redis
+    redis = None
+    RedisError = OSError
+
+# Called with the tables written by another worker
+RemoteWriteHandler = Callable[[tuple[str, ...]], Awaitable[None]]
+
+
+class CacheBackend(ABC):
+    """Store of encoded responses plus the channel announcing writes to the other workers."""
+
+    name = "base"
+    # Whether `listen` announces the writes of the other workers
+    shares_writes = False
+
+    @abstractmethod
+    async def generation(self, tables: tuple[str, ...]) -> tuple[int, ...]:
+        ...
+
+    @abstractmethod
+    async def get(self, key: str, generation: tuple[int, ...]) -> bytes | None:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, tables: tuple[str, ...], generation: tuple[int, ...]) -> None:
+        ...
+
+    @abstractmethod
+    async def invalidate(self, tables: tuple[str, ...]) -> None:
+        ...
+
+    async def publish(self, tables: tuple[str, ...]) -> None:
+        """Announces a local write to the other workers."""
+
+    async def listen(self, handler: RemoteWriteHandler) -> None:
+        """Calls `handler` for every write announced by another worker, until cancelled."""
+
+    @abstractmethod
+    def stats(self) -> dict:
+        ...
+
+    async def close(self) -> None:
+        pass
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Responses kept in this process only; suited to a single worker."""
+
+    name = "memory"
+
+    def __init__(self, cache: ResponseCache):
+        self.cache = cache
+
+    async def generation(self, tables: tuple[str, ...]) -> tuple[int, ...]:
+        return self.cache.generation(tables)
+
+    async def get(self, key: str, generation: tuple[int, ...]) -> bytes | None:
+        hit, value = self.cache.get(key)
+        return value if hit else None
+
+    async def set(self, key: str, value: bytes, tables: tuple[str, ...], generation: tuple[int, ...]) -> None:
+        self.cache.set(key, value, tables, generation)
+
+    async def invalidate(self, tables: tuple[str, ...]) -> None:
+        self.cache.invalidate(*tables)
+
+    def stats(self) -> dict:
+        return {"backend": self.name, **self.cache.stats()}
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Responses shared by every worker through a Redis server.
+
+    Each table has a generation counter in Redis that is part of the keys of
+    the responses depending on it: invalidating is one INCR, and the entries
+    of older generations are left to expire. The memory budget is the one of
+    the server (maxmemory with an LRU policy). Errors are counted and served
+    as misses, so the API keeps working without the server.
+    """
+
+    name = "redis"
+    shares_writes = True
+
+    def __init__(self, client: Any, prefix: str = "vacinacao", ttl_seconds: float = 300.0):
+        self.client = client
+        self.prefix = prefix
+        self.ttl_seconds = ttl_seconds
+        self.channel = f"{prefix}:invalidations"
+        self.worker_id = secrets.token_hex(8)
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def _generation_key(self, table: str) -> str:
+        return f"{self.prefix}:generation:{table}"
+
+    def _response_key(self, key: str, generation: tuple[int, ...]) -> str:
+        return f"{self.prefix}:response:{'.'.join(map(str, generation))}:{key}"
+
+    async def generation(self, tables: tuple[str, ...]) -> tuple[int, ...]:
+        try:
+            values = await self.client.mget([self._generation_key(table) for table in tables])
+        except RedisError as error:
+            self.errors += 1
+            logger.warning(f"Cache backend unavailable: {error}")
+            return ()
+        return tuple(int(value or 0) for value in values)
+
+    async def get(self, key: str, generation: tuple[int, ...]) -> bytes | None:
+        if not generation:
+            # The generations could not be read
+            self.misses += 1
+            return None
+        try:
+            value = await self.client.get(self._response_key(key, generation))
+        except RedisError as error:
+            self.errors += 1
+            logger.warning(f"Cache backend unavailable: {error}")
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: bytes, tables: tuple[str, ...], generation: tuple[int, ...]) -> None:
+        if len(generation) != len(tables) or self.ttl_seconds <= 0:
+            return
+        try:
+            await self.client.set(self._response_key(key, generation), value, ex=max(1, round(self.ttl_seconds)))
+        except RedisError as error:
+            self.errors += 1
+            logger.warning(f"Cache backend unavailable: {error}")
+
+    async def invalidate(self, tables: tuple[str, ...]) -> None:
+        try:
+            for table in tables:
+                await self.client.incr(self._generation_key(table))
+        except RedisError as error:
+            self.errors += 1
+            logger.warning(f"Cache backend unavailable: {error}")
+
+    async def publish(self, tables: tuple[str, ...]) -> None:
+        message = json.dumps({"origin": self.worker_id, "tables": list(tables)})
+        try:
+            await self.client.publish(self.channel, message)
+        except RedisError as error:
+            self.errors += 1
+            logger.warning(f"Cache backend unavailable: {error}")
+
+    async def _apply(self, handler: RemoteWriteHandler, tables: tuple[str, ...]) -> None:
+        try:
+            await handler(tables)
+        except Exception:
+            # A failing write must not stop the listener: the next ones still have to be applied
+            self.errors += 1
+            logger.exception(f"Failed to apply the write to {', '.join(tables)} announced by another worker")
+
+    async def listen(self, handler: RemoteWriteHandler) -> None:
+        reconnecting = False
+        while True:
+            pubsub = self.client.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                if reconnecting:
+                    # Writes announced while disconnected were missed
+                    await self._apply(handler, VERSIONED_TABLES)
+                    reconnecting = False
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    try:
+                        event = json.loads(message["data"])
+                        origin, tables = event["origin"], tuple(event["tables"])
+                    except (ValueError, KeyError, TypeError):
+                        self.errors += 1
+                        logger.warning(f"Malformed message on {self.channel}: {message['data']!r}")
+                        continue
+                    if origin != self.worker_id:
+                        await self._apply(handler, tables)
+            except RedisError as error:
+                self.errors += 1
+                logger.warning(f"Cache invalidation channel lost, reconnecting: {error}")
+                reconnecting = True
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.name,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "errors": self.errors
+        }
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+def create_cache_backend(backend: str = settings.CACHE_BACKEND) -> CacheBackend:
+    if backend == "redis":
+        if redis is None:
+            raise RuntimeError("CACHE_BACKEND=redis requires the redis package (poetry install -E redis)")
+        client = redis.Redis.from_url(settings.REDIS_URL)
+        return RedisCacheBackend(client, settings.CACHE_KEY_PREFIX, settings.RESPONSE_CACHE_TTL_SECONDS)
+    if backend == "memory":
+        return MemoryCacheBackend(response_cache)
+    raise ValueError(f"Unknown CACHE_BACKEND: {backend}")
+
+
+response_backend = create_cache_backend()
+
+
+async def _publish_local_write(tables: tuple[str, ...], remote: bool) -> None:
+    # Writes made by another worker were already invalidated and published by it
+    if not remote:
+        await response_backend.invalidate(tables)
+        await response_backend.publish(tables)
+
+
+table_versions.subscribe(_publish_local_write)
@@ -0,0 +1,173 @@
+"""
+Response compression.
+
+This module contains the compression of the HTTP responses. It is
+responsible for:
+- Choosing brotli or gzip from the Accept-Encoding header
+- Compressing bodies above a minimum size, with tunable levels
+- Compressing streamed responses chunk by chunk, without buffering them
+- Leaving alone responses that are already encoded, such as the
+  precompressed entries served by the response cache
+
+Brotli is used when the `brotli` extra is installed, gzip otherwise.
+"""
+
+import zlib
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.config import settings
+
+try:
+    import brotli
+except ImportError:  # optional extra: poetry install -E brotli
+    brotli = None
+
+
+def available_encodings() -> tuple[str, ...]:
+    """Content codings in order of preference."""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate_encoding(accept_encoding: str | None) -> str | None:
+    """Preferred coding accepted by the client, or None for an uncompressed response."""
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for coding in accept_encoding.split(","):
+        name, *parameters = [part.strip() for part in coding.split(";")]
+        quality = 1.0
+        for parameter in parameters:
+            key, _, value = parameter.partition("=")
+            if key.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name.lower()] = quality
+    candidates = [
+        (accepted.get(encoding, accepted.get("*", 0.0)), -position, encoding)
+        for position, encoding in enumerate(available_encodings())
+    ]
+    quality, _, encoding = max(candidates)
+    return encoding if quality > 0 else None
+
+
+class Compressor:
+    """Incremental compressor of one response body."""
+
+    def __init__(
+        self,
+        encoding: str,
+        gzip_level: int = settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality: int = settings.COMPRESSION_BROTLI_QUALITY
+    ):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._gzip = zlib.compressobj(gzip_level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def compress(self, chunk: bytes) -> bytes:
+        """Compresses `chunk` and flushes it, so the client can decode it right away."""
+        if self.encoding == "br":
+            return self._brotli.process(chunk) + self._brotli.flush()
+        return self._gzip.compress(chunk) + self._gzip.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, chunk: bytes = b"") -> bytes:
+        if self.encoding == "br":
+            return self._brotli.process(chunk) + self._brotli.finish()
+        return self._gzip.compress(chunk) + self._gzip.flush(zlib.Z_FINISH)
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    return Compressor(encoding).finish(body)
+
+
+def _add_vary(headers: MutableHeaders, value: str) -> None:
+    vary = headers.get("vary")
+    if vary is None:
+        headers["Vary"] = value
+    elif value.lower() not in {item.strip().lower() for item in vary.split(",")}:
+        headers["Vary"] = f"{vary}, {value}"
+
+
+def _weaken_etag(headers: MutableHeaders) -> None:
+    # A strong tag names the exact bytes of the identity body; an encoded one is only equivalent
+    etag = headers.get("etag")
+    if etag is not None and not etag.startswith("W/"):
+        headers["ETag"] = f"W/{etag}"
+
+
+class CompressionMiddleware:
+    """
+    Compresses the responses whose body reaches `minimum_size` bytes (or
+    that are streamed) with the coding negotiated with the client.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = settings.COMPRESSION_MINIMUM_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = Headers(scope=scope).get("if-none-match", "")
+        start: Message | None = None
+        compressor: Compressor | None = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, compressor, passthrough
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=message["headers"])
+                # Already encoded (precompressed cache entries) or without a body
+                passthrough = "content-encoding" in headers or message["status"] in (204, 304)
+                if "content-encoding" in headers:
+                    _weaken_etag(headers)
+                elif message["status"] == 304 and f'W/{headers.get("etag")}' in if_none_match:
+                    # Validated with the tag of an encoded body: the same representation
+                    _weaken_etag(headers)
+                    _add_vary(headers, "Accept-Encoding")
+                if passthrough:
+                    await send(message)
+                else:
+                    start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                headers = MutableHeaders(raw=start["headers"])
+                if not more_body and len(body) < self.minimum_size:
+                    # Small enough to send as it is
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+                compressor = Compressor(encoding)
+                headers["Content-Encoding"] = encoding
+                _add_vary(headers, "Accept-Encoding")
+                _weaken_etag(headers)
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    body = compressor.finish(body)
+                    headers["Content-Length"] = str(len(body))
+                    await send(start)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                await send(start)
+
+            chunk = compressor.compress(body) if more_body else compressor.finish(body)
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
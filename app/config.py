@@ -32,8 +32,60 @@ class Settings(BaseSettings):
     DB_PORT: int = int(os.getenv("DB_PORT", "5432"))
     DB_NAME: str = os.getenv("DB_NAME", "")
     
+    # Pool de conexões do PostgreSQL (asyncpg), por worker do uvicorn
+    DB_POOL_MIN_SIZE: int = int(os.getenv("DB_POOL_MIN_SIZE", "10"))
+    DB_POOL_MAX_SIZE: int = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+    # Segundos de espera por uma conexão livre antes de responder 503 (0 desativa; vale também para o SQLite)
+    DB_POOL_ACQUIRE_TIMEOUT: float = float(os.getenv("DB_POOL_ACQUIRE_TIMEOUT", "30"))
+    # Statements preparados por conexão (0 com o PgBouncer em modo transaction)
+    DB_STATEMENT_CACHE_SIZE: int = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+    # Tempo de vida das conexões: segundos ociosa e consultas até ser substituída
+    DB_POOL_MAX_INACTIVE_LIFETIME: float = float(os.getenv("DB_POOL_MAX_INACTIVE_LIFETIME", "300"))
+    DB_POOL_MAX_QUERIES: int = int(os.getenv("DB_POOL_MAX_QUERIES", "50000"))
+
     # Configuração SQLite
     SQLITE_DB_NAME: str = os.getenv("SQLITE_DB_NAME", "database.db")
+    # Perfil do SQLite: "default" ou "performance" (WAL, conexões de leitura para os GET e um único escritor)
+    SQLITE_PROFILE: str = os.getenv("SQLITE_PROFILE", "default")
+    # Conexões somente leitura abertas por worker no perfil "performance"
+    SQLITE_READ_POOL_SIZE: int = int(os.getenv("SQLITE_READ_POOL_SIZE", "4"))
+    # PRAGMAs de cada conexão no perfil "performance"
+    SQLITE_SYNCHRONOUS: str = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_MMAP_SIZE: int = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+    SQLITE_CACHE_SIZE_KB: int = int(os.getenv("SQLITE_CACHE_SIZE_KB", str(64 * 1024)))
+    SQLITE_BUSY_TIMEOUT_MS: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+    # Fuso horário usado para interpretar os horários de funcionamento
+    TIMEZONE: str = os.getenv("TIMEZONE", "America/Sao_Paulo")
+
+    # Cache das consultas de países, estados, cidades e vacinas (0 desativa)
+    QUERY_CACHE_MAX_ENTRIES: int = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "1024"))
+    QUERY_CACHE_TTL_SECONDS: float = float(os.getenv("QUERY_CACHE_TTL_SECONDS", "300"))
+
+    # Cache dos corpos JSON já codificados das listagens (0 desativa)
+    RESPONSE_CACHE_MAX_BYTES: int = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+    RESPONSE_CACHE_TTL_SECONDS: float = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "300"))
+
+    # Backend do cache de respostas: "memory" ou "redis" (compartilhado entre workers)
+    CACHE_BACKEND: str = os.getenv("CACHE_BACKEND", "memory")
+    REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    CACHE_KEY_PREFIX: str = os.getenv("CACHE_KEY_PREFIX", "vacinacao")
+
+    # Cache dos IDs não encontrados de pontos de vacinação e vacinas (0 desativa)
+    NEGATIVE_CACHE_MAX_ENTRIES: int = int(os.getenv("NEGATIVE_CACHE_MAX_ENTRIES", "4096"))
+    NEGATIVE_CACHE_TTL_SECONDS: float = float(os.getenv("NEGATIVE_CACHE_TTL_SECONDS", "30"))
+
+    # Compressão das respostas (brotli requer o extra "brotli"; gzip nos demais casos)
+    COMPRESSION_MINIMUM_SIZE: int = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "500"))
+    COMPRESSION_GZIP_LEVEL: int = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+    COMPRESSION_BROTLI_QUALITY: int = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "5"))
+
+    # Paginação das listagens: tamanho padrão e máximo de uma página
+    PAGE_SIZE_DEFAULT: int = int(os.getenv("PAGE_SIZE_DEFAULT", "100"))
+    PAGE_SIZE_MAX: int = int(os.getenv("PAGE_SIZE_MAX", "1000"))
+
+    # Tabelas a partir deste tamanho têm o total estimado pelo planner do PostgreSQL (X-Total-Count)
+    COUNT_ESTIMATE_MIN_ROWS: int = int(os.getenv("COUNT_ESTIMATE_MIN_ROWS", "100000"))
 
     # Configuração de URLs
     PRODUCTION_URL: str = os.getenv("PRODUCTION_URL", "")
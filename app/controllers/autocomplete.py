@@ -0,0 +1,71 @@
+"""
+This module contains the controllers (route handlers) for the autocomplete.
+The controllers are responsible for:
+- Receiving HTTP requests
+- Validating input data
+- Calling appropriate services
+- Returning formatted HTTP responses
+
+Controllers should not contain business logic, only HTTP request 
+handling logic.
+"""
+
+from fastapi import APIRouter, Depends, Request, Query
+from app.services.autocomplete import AutocompleteService
+from app.dependencies import get_autocomplete_service
+from app.config import limiter
+
+router = APIRouter()
+
+@router.get(
+    "/autocomplete",
+    tags=["Autocompletar"],
+    summary="Sugestões de nomes",
+    description="""
+    Retorna sugestões de cidades, vacinas e pontos de vacinação cujo nome, ou uma
+    das palavras do nome, começa com o texto informado.
+    
+    A busca ignora acentos e maiúsculas/minúsculas e é atendida por um índice em
+    memória, sem consulta ao banco de dados. Nomes que começam com o texto vêm antes
+    das demais sugestões.
+    
+    Tipos disponíveis (`types`, separados por vírgula): city, vaccine, point.
+    Se nenhum tipo for informado, todos são considerados.
+    """,
+    response_description="Lista de sugestões",
+    responses={
+        200: {
+            "description": "Sucesso",
+            "content": {
+                "application/json": {
+                    "example": [{
+                        "type": "city",
+                        "id": 1,
+                        "name": "Maceió"
+                    }]
+                }
+            }
+        },
+        400: {
+            "description": "Tipo inválido",
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Valores inválidos para types: street"}
+                }
+            }
+        }
+    }
+)
+@limiter.limit("120/minute")
+async def autocomplete(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=100, description="Início do nome"),
+    types: str | None = Query(None, description="Tipos separados por vírgula (city, vaccine, point)"),
+    limit: int = Query(10, ge=1, le=50, description="Número máximo de sugestões"),
+    service: AutocompleteService = Depends(get_autocomplete_service)
+):
+    return service.autocomplete(
+        q=q,
+        types={value.strip() for value in types.split(",") if value.strip()} if types else None,
+        limit=limit
+    )
@@ -14,27 +14,36 @@ from fastapi import APIRouter, Depends, Request, Query
 from app.models import City
 from app.schemas.cities import CityCreate, CityUpdate
 from app.services.cities import CityService
-from app.dependencies import get_city_service
-from app.config import limiter
+from app.dependencies import get_city_service, conditional_get
+from app.responses import cache_response
+from app.fields import parse_fields
+from app.encoders import city_rows
+from app.config import limiter, settings
 
 router = APIRouter()
 
 @router.get(
     "/cities",
+    dependencies=[Depends(conditional_get("cities"))],
     tags=["Cidades"],
     summary="Listar cidades",
     description="""Retorna a lista de cidades cadastradas.""",
     response_description="Lista de cidades"
 )
 @limiter.limit("10/minute")
+@cache_response("cities", encoder=city_rows)
 async def get_cities(
     request: Request,
     id: int | None = Query(None, description="ID da cidade"),
     name: str | None = Query(None, description="Nome da cidade (busca parcial)"),
     ibge_code: str | None = Query(None, description="Código IBGE da cidade"),
+    fields: str | None = Query(None, description="Campos retornados, separados por vírgula (ex.: id,name)"),
+    cursor: str | None = Query(None, description="Cursor da próxima página, do cabeçalho X-Next-Cursor da resposta anterior"),
+    limit: int | None = Query(None, ge=1, le=settings.PAGE_SIZE_MAX, description=f"Itens por página (padrão {settings.PAGE_SIZE_DEFAULT})"),
+    count: bool = Query(False, description="Informa o total de itens de todas as páginas no cabeçalho X-Total-Count"),
     service: CityService = Depends(get_city_service)
 ):
-    return await service.get_all_cities(id=id, name=name, ibge_code=ibge_code)
+    return await service.get_all_cities(id=id, name=name, ibge_code=ibge_code, fields=parse_fields(fields), cursor=cursor, limit=limit, count=count)
 
 @router.post(
     "/cities",
@@ -13,27 +13,36 @@ handling logic.
 from fastapi import APIRouter, Depends, Request, Query
 from app.schemas.countries import CountryCreate, CountryUpdate
 from app.services.countries import CountryService
-from app.dependencies import get_country_service
-from app.config import limiter
+from app.dependencies import get_country_service, conditional_get
+from app.responses import cache_response
+from app.fields import parse_fields
+from app.encoders import country_rows
+from app.config import limiter, settings
 
 router = APIRouter()
 
 @router.get(
     "/countries",
+    dependencies=[Depends(conditional_get("countries"))],
     tags=["Países"],
     summary="Listar países",
     description="""Retorna a lista de países cadastrados.""",
     response_description="Lista de países"
 )
 @limiter.limit("10/minute")
+@cache_response("countries", encoder=country_rows)
 async def get_countries(
     request: Request,
     id: int | None = Query(None, description="ID do país"),
     name: str | None = Query(None, description="Nome do país (busca parcial)"),
     ibge_code: str | None = Query(None, description="Código IBGE do país"),
+    fields: str | None = Query(None, description="Campos retornados, separados por vírgula (ex.: id,name)"),
+    cursor: str | None = Query(None, description="Cursor da próxima página, do cabeçalho X-Next-Cursor da resposta anterior"),
+    limit: int | None = Query(None, ge=1, le=settings.PAGE_SIZE_MAX, description=f"Itens por página (padrão {settings.PAGE_SIZE_DEFAULT})"),
+    count: bool = Query(False, description="Informa o total de itens de todas as páginas no cabeçalho X-Total-Count"),
     service: CountryService = Depends(get_country_service)
 ):
-    return await service.get_all_countries(id=id, name=name, ibge_code=ibge_code)
+    return await service.get_all_countries(id=id, name=name, ibge_code=ibge_code, fields=parse_fields(fields), cursor=cursor, limit=limit, count=count)
 
 @router.post(
     "/countries",
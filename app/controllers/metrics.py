@@ -0,0 +1,105 @@
+"""
+This module contains the controllers (route handlers) for the monitoring metrics.
+The controllers are responsible for:
+- Receiving HTTP requests
+- Validating input data
+- Calling appropriate services
+- Returning formatted HTTP responses
+
+Controllers should not contain business logic, only HTTP request 
+handling logic.
+"""
+
+from fastapi import APIRouter, Depends, Request
+from app.services.metrics import MetricsService
+from app.dependencies import get_metrics_service
+from app.config import limiter
+
+router = APIRouter()
+
+@router.get(
+    "/metrics",
+    tags=["Monitoramento"],
+    summary="Métricas da aplicação",
+    description="""
+    Retorna os contadores internos da aplicação deste processo.
+    
+    * `query_cache`: entradas, acertos, faltas, expirações, remoções por LRU e
+      invalidações do cache de consultas de países, estados, cidades e vacinas
+    * `response_cache`: backend (memory ou redis) e contadores do cache de
+      respostas JSON já codificadas; no backend em memória, também o total de bytes
+    * `negative_cache`: contadores do cache de IDs não encontrados de pontos de
+      vacinação e das tabelas de referência (países, estados, cidades e vacinas);
+      cada acerto é uma consulta ao banco evitada
+    * `database_pool`: conexões em uso (e o pico), requisições aguardando conexão,
+      tempo de espera total, médio e máximo e esperas encerradas por `DB_POOL_ACQUIRE_TIMEOUT`;
+      no PostgreSQL, também o tamanho do pool e as conexões ociosas
+    """,
+    response_description="Métricas da aplicação",
+    responses={
+        200: {
+            "description": "Sucesso",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "query_cache": {
+                            "entries": 12,
+                            "max_entries": 1024,
+                            "ttl_seconds": 300.0,
+                            "hits": 340,
+                            "misses": 12,
+                            "hit_ratio": 0.9659,
+                            "evictions": 0,
+                            "expirations": 0,
+                            "invalidations": 1
+                        },
+                        "response_cache": {
+                            "backend": "memory",
+                            "entries": 6,
+                            "ttl_seconds": 300.0,
+                            "hits": 120,
+                            "misses": 6,
+                            "hit_ratio": 0.9524,
+                            "evictions": 0,
+                            "expirations": 0,
+                            "invalidations": 2,
+                            "bytes": 48211,
+                            "max_bytes": 33554432
+                        },
+                        "negative_cache": {
+                            "entries": 40,
+                            "max_entries": 4096,
+                            "ttl_seconds": 30.0,
+                            "hits": 960,
+                            "misses": 85,
+                            "hit_ratio": 0.9187,
+                            "evictions": 0,
+                            "expirations": 5,
+                            "invalidations": 2
+                        },
+                        "database_pool": {
+                            "in_use": 3,
+                            "max_in_use": 10,
+                            "waiting": 0,
+                            "acquisitions": 5120,
+                            "timeouts": 0,
+                            "wait_ms_total": 812.4,
+                            "wait_ms_avg": 0.159,
+                            "wait_ms_max": 48.2,
+                            "size": 10,
+                            "idle": 7,
+                            "min_size": 10,
+                            "max_size": 10
+                        }
+                    }
+                }
+            }
+        }
+    }
+)
+@limiter.limit("10/minute")
+async def get_metrics(
+    request: Request,
+    service: MetricsService = Depends(get_metrics_service)
+):
+    return service.get_metrics()
@@ -14,27 +14,36 @@ from fastapi import APIRouter, Depends, Request, Query
 from app.models import State
 from app.schemas.states import StateCreate, StateUpdate
 from app.services.states import StateService
-from app.dependencies import get_state_service
-from app.config import limiter
+from app.dependencies import get_state_service, conditional_get
+from app.responses import cache_response
+from app.fields import parse_fields
+from app.encoders import state_rows
+from app.config import limiter, settings
 
 router = APIRouter()
 
 @router.get(
     "/states",
+    dependencies=[Depends(conditional_get("states", "countries"))],
     tags=["Estados"],
     summary="Listar estados",
     description="""Retorna a lista de estados cadastrados.""",
     response_description="Lista de estados"
 )
 @limiter.limit("10/minute")
+@cache_response("states", "countries", encoder=state_rows)
 async def get_states(
     request: Request,
     id: int | None = Query(None, description="ID do estado"),
     name: str | None = Query(None, description="Nome do estado (busca parcial)"),
     ibge_code: str | None = Query(None, description="Código IBGE do estado"),
+    fields: str | None = Query(None, description="Campos retornados, separados por vírgula (ex.: id,name)"),
+    cursor: str | None = Query(None, description="Cursor da próxima página, do cabeçalho X-Next-Cursor da resposta anterior"),
+    limit: int | None = Query(None, ge=1, le=settings.PAGE_SIZE_MAX, description=f"Itens por página (padrão {settings.PAGE_SIZE_DEFAULT})"),
+    count: bool = Query(False, description="Informa o total de itens de todas as páginas no cabeçalho X-Total-Count"),
     service: StateService = Depends(get_state_service)
 ):
-    return await service.get_all_states(id=id, name=name, ibge_code=ibge_code)
+    return await service.get_all_states(id=id, name=name, ibge_code=ibge_code, fields=parse_fields(fields), cursor=cursor, limit=limit, count=count)
 
 @router.post(
     "/states",
@@ -11,12 +11,17 @@ handling logic.
 """
 
 from fastapi import APIRouter, Depends, Request, Form, Query
+from fastapi.responses import StreamingResponse
+from datetime import datetime
 from typing import Annotated
-from app.schemas.vaccination_points import VaccinationPointCreate
+from app.schemas.vaccination_points import VaccinationPointCreate, NearestPointsBatch
 from app.services.vaccination_points import VaccinationPointService
 from app.services.vaccination_point_vaccines import VaccinationPointVaccineService
-from app.dependencies import get_vaccination_point_service, get_vaccination_point_vaccine_service
-from app.config import limiter
+from app.dependencies import get_vaccination_point_service, get_vaccination_point_vaccine_service, conditional_get
+from app.responses import NDJSON, FastJSONResponse, cache_response, negotiate, ndjson_response, negotiated_response
+from app.fields import parse_fields
+from app.encoders import vaccination_point_rows
+from app.config import limiter, settings
 from app.schemas.vaccination_point_vaccines import VaccinationPointVaccineCreate
 
 router = APIRouter()
@@ -32,8 +37,24 @@ router = APIRouter()
     * ID do ponto de vacinação
     * Nome do ponto (busca parcial, não sensível a maiúsculas/minúsculas)
     * Cidade (ID)
+    * Aberto em uma data e hora (`open_at`) ou aberto agora (`open_now`)
     
-    Se nenhum filtro for fornecido, retorna todos os pontos de vacinação.
+    Datas sem fuso horário são interpretadas no horário de Brasília.
+    
+    Com `fields`, somente as colunas informadas são lidas e retornadas (ex.: `fields=id,name,latitude,longitude`).
+    
+    Com `Accept: application/x-ndjson` (ou `stream=true`), os pontos são transmitidos um por linha
+    à medida que são lidos do banco, sem montar a lista inteira em memória.
+    
+    Com `include=next_opening`, cada ponto traz o campo `next_opening` com a próxima abertura
+    a partir de `open_at` (ou de agora). Para pontos já abertos, o campo traz o próprio horário
+    de referência; para pontos sem horários cadastrados, `null`.
+    
+    As listas são paginadas por cursor: quando há mais itens, a resposta traz o cabeçalho
+    `Link` (`rel="next"`) e o cursor `X-Next-Cursor`, a ser enviado em `cursor` na próxima chamada.
+    Com `count=true`, o total de itens de todas as páginas vem no cabeçalho `X-Total-Count`.
+    Em NDJSON, as linhas só são limitadas quando `limit` é informado; o cursor da próxima
+    página vem então nos mesmos cabeçalhos.
     """,
     response_description="Lista de pontos de vacinação"
 )
@@ -43,9 +64,114 @@ async def get_vaccination_points(
     id: int | None = Query(None, description="ID do ponto de vacinação"),
     name: str | None = Query(None, description="Nome do ponto de vacinação (busca parcial)"),
     city_id: int | None = Query(None, description="ID da cidade"),
+    open_at: datetime | None = Query(None, description="Somente pontos abertos nesta data e hora (ex.: 2026-10-17T14:30)"),
+    open_now: bool = Query(False, description="Somente pontos abertos agora"),
+    include: str | None = Query(None, description="Campos adicionais separados por vírgula (next_opening)"),
+    fields: str | None = Query(None, description="Campos retornados, separados por vírgula (ex.: id,name,latitude,longitude)"),
+    cursor: str | None = Query(None, description="Cursor da próxima página, do cabeçalho X-Next-Cursor da resposta anterior"),
+    limit: int | None = Query(None, ge=1, le=settings.PAGE_SIZE_MAX, description=f"Itens por página (padrão {settings.PAGE_SIZE_DEFAULT})"),
+    count: bool = Query(False, description="Informa o total de itens de todas as páginas no cabeçalho X-Total-Count"),
+    stream: bool = Query(False, description="Transmite os pontos em NDJSON, um por linha"),
     service: VaccinationPointService = Depends(get_vaccination_point_service)
 ):
-    return await service.get_all_vaccination_points(id=id, name=name, city_id=city_id)
+    filters = {
+        "id": id,
+        "name": name,
+        "city_id": city_id,
+        "open_at": open_at,
+        "open_now": open_now,
+        "include": {value.strip() for value in include.split(",") if value.strip()} if include else None,
+        "fields": parse_fields(fields),
+        "cursor": cursor,
+        "limit": limit
+    }
+    if negotiate(request, streaming=True) == NDJSON:
+        return ndjson_response(request, await service.stream_vaccination_points(**filters), vaccination_point_rows)
+    points = await service.get_all_vaccination_points(**filters, count=count)
+    return negotiated_response(request, points, vaccination_point_rows)
+
+@router.get(
+    "/vaccination-points/nearby",
+    tags=["Pontos de Vacinação"],
+    summary="Listar pontos de vacinação próximos",
+    description="""
+    Retorna os pontos de vacinação mais próximos de uma coordenada, ordenados pela distância.
+    
+    Filtros disponíveis:
+    * Raio máximo de busca em quilômetros
+    * Quantidade máxima de pontos retornados
+    
+    Cada ponto inclui o campo `distance_km` com a distância até a coordenada informada.
+    """,
+    response_description="Lista de pontos de vacinação ordenada pela distância"
+)
+@limiter.limit("10/minute")
+async def get_nearby_vaccination_points(
+    request: Request,
+    lat: float = Query(..., ge=-90, le=90, description="Latitude de referência"),
+    lon: float = Query(..., ge=-180, le=180, description="Longitude de referência"),
+    radius_km: float | None = Query(None, gt=0, description="Raio máximo de busca em quilômetros"),
+    limit: int = Query(10, ge=1, le=100, description="Quantidade máxima de pontos retornados"),
+    service: VaccinationPointService = Depends(get_vaccination_point_service)
+):
+    return await service.get_nearby_vaccination_points(
+        latitude=lat,
+        longitude=lon,
+        radius_km=radius_km,
+        limit=limit
+    )
+
+@router.get(
+    "/vaccination-points/bbox",
+    tags=["Pontos de Vacinação"],
+    summary="Listar pontos de vacinação em uma área do mapa",
+    description="""
+    Retorna os pontos de vacinação dentro da área visível do mapa.
+    
+    Em níveis de zoom baixos os pontos são agrupados em clusters com a quantidade de pontos
+    e o centroide de cada grupo. Em níveis de zoom altos são retornados os próprios pontos,
+    desde que a quantidade não ultrapasse o limite informado.
+    """,
+    response_description="Clusters ou pontos de vacinação da área",
+    responses={
+        200: {
+            "description": "Sucesso",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "zoom": 6,
+                        "clusters": [{
+                            "count": 12,
+                            "latitude": -9.65,
+                            "longitude": -35.73
+                        }],
+                        "vaccination_points": []
+                    }
+                }
+            }
+        }
+    }
+)
+@limiter.limit("10/minute")
+async def get_vaccination_points_in_bbox(
+    request: Request,
+    min_lat: float = Query(..., ge=-90, le=90, description="Latitude mínima da área"),
+    min_lon: float = Query(..., ge=-180, le=180, description="Longitude mínima da área"),
+    max_lat: float = Query(..., ge=-90, le=90, description="Latitude máxima da área"),
+    max_lon: float = Query(..., ge=-180, le=180, description="Longitude máxima da área"),
+    zoom: int = Query(..., ge=0, le=22, description="Nível de zoom do mapa"),
+    limit: int = Query(500, ge=1, le=2000, description="Quantidade máxima de pontos retornados sem agrupamento"),
+    service: VaccinationPointService = Depends(get_vaccination_point_service)
+):
+    result = await service.get_vaccination_points_in_bbox(
+        min_latitude=min_lat,
+        min_longitude=min_lon,
+        max_latitude=max_lat,
+        max_longitude=max_lon,
+        zoom=zoom,
+        limit=limit
+    )
+    return FastJSONResponse(result)
 
 @router.post(
     "/vaccination-points",
@@ -61,6 +187,7 @@ async def create_vaccination_point(
 
 @router.get(
     "/vaccination-points/vaccines",
+    dependencies=[Depends(conditional_get("vaccination_point_vaccines", "vaccination_points", "vaccines", streaming=True))],
     tags=["Pontos de Vacinação"],
     summary="Listar vacinas por ponto de vacinação",
     description="""
@@ -68,6 +195,15 @@ async def create_vaccination_point(
     
     Se um vaccination_point_id for fornecido, retorna apenas as vacinas daquele ponto específico.
     Caso contrário, retorna as vacinas de todos os pontos.
+    
+    As listas são paginadas por cursor: quando há mais itens, a resposta traz o cabeçalho
+    `Link` (`rel="next"`) e o cursor `X-Next-Cursor`, a ser enviado em `cursor` na próxima chamada.
+    Com `count=true`, o total de itens de todas as páginas vem no cabeçalho `X-Total-Count`.
+    Em NDJSON, as linhas só são limitadas quando `limit` é informado; o cursor da próxima
+    página vem então nos mesmos cabeçalhos.
+    
+    Com `Accept: application/x-ndjson` (ou `stream=true`), as linhas são transmitidas à medida
+    que são lidas do banco.
     """,
     response_description="Lista de pontos de vacinação com suas vacinas",
     responses={
@@ -95,15 +231,25 @@ async def create_vaccination_point(
     }
 )
 @limiter.limit("10/minute")
+@cache_response("vaccination_point_vaccines", "vaccination_points", "vaccines", streaming=True)
 async def get_vaccines_by_point(
     request: Request,
     vaccination_point_id: int | None = Query(None, description="ID do ponto de vacinação"),
+    fields: str | None = Query(None, description="Campos retornados, separados por vírgula (ex.: vaccination_point_id,vaccine_name)"),
+    cursor: str | None = Query(None, description="Cursor da próxima página, do cabeçalho X-Next-Cursor da resposta anterior"),
+    limit: int | None = Query(None, ge=1, le=settings.PAGE_SIZE_MAX, description=f"Itens por página (padrão {settings.PAGE_SIZE_DEFAULT})"),
+    count: bool = Query(False, description="Informa o total de itens de todas as páginas no cabeçalho X-Total-Count"),
+    stream: bool = Query(False, description="Transmite as linhas em NDJSON, uma por linha"),
     service: VaccinationPointVaccineService = Depends(get_vaccination_point_vaccine_service)
 ):
-    return await service.get_vaccines_by_point(vaccination_point_id)
+    arguments = {"fields": parse_fields(fields), "cursor": cursor, "limit": limit}
+    if negotiate(request, streaming=True) == NDJSON:
+        return ndjson_response(request, await service.stream_vaccines_by_point(vaccination_point_id, **arguments))
+    return await service.get_vaccines_by_point(vaccination_point_id, count=count, **arguments)
 
 @router.get(
     "/vaccination-points/by-vaccine",
+    dependencies=[Depends(conditional_get("vaccination_point_vaccines", "vaccination_points", "vaccines", streaming=True))],
     tags=["Pontos de Vacinação"],
     summary="Listar pontos de vacinação por vacina",
     description="""
@@ -111,6 +257,18 @@ async def get_vaccines_by_point(
     
     Se um vaccine_id for fornecido, retorna apenas os pontos que oferecem aquela vacina específica.
     Caso contrário, retorna todos os relacionamentos entre vacinas e pontos de vacinação.
+    
+    As listas são paginadas por cursor: quando há mais itens, a resposta traz o cabeçalho
+    `Link` (`rel="next"`) e o cursor `X-Next-Cursor`, a ser enviado em `cursor` na próxima chamada.
+    Com `count=true`, o total de itens de todas as páginas vem no cabeçalho `X-Total-Count`.
+    Em NDJSON, as linhas só são limitadas quando `limit` é informado; o cursor da próxima
+    página vem então nos mesmos cabeçalhos.
+    
+    Para cargas em lote, as listagens também respondem em MessagePack (`Accept: application/msgpack`)
+    e em Apache Arrow IPC (`Accept: application/vnd.apache.arrow.stream`), colunar.
+    
+    Com `Accept: application/x-ndjson` (ou `stream=true`), as linhas são transmitidas à medida
+    que são lidas do banco.
     """,
     response_description="Lista de vacinas com seus pontos de vacinação",
     responses={
@@ -141,12 +299,120 @@ async def get_vaccines_by_point(
     }
 )
 @limiter.limit("10/minute")
+@cache_response("vaccination_point_vaccines", "vaccination_points", "vaccines", streaming=True)
 async def get_points_by_vaccine(
     request: Request,
     vaccine_id: int | None = Query(None, description="ID da vacina"),
+    fields: str | None = Query(None, description="Campos retornados, separados por vírgula (ex.: vaccination_point_id,latitude,longitude)"),
+    cursor: str | None = Query(None, description="Cursor da próxima página, do cabeçalho X-Next-Cursor da resposta anterior"),
+    limit: int | None = Query(None, ge=1, le=settings.PAGE_SIZE_MAX, description=f"Itens por página (padrão {settings.PAGE_SIZE_DEFAULT})"),
+    count: bool = Query(False, description="Informa o total de itens de todas as páginas no cabeçalho X-Total-Count"),
+    stream: bool = Query(False, description="Transmite as linhas em NDJSON, uma por linha"),
+    service: VaccinationPointVaccineService = Depends(get_vaccination_point_vaccine_service)
+):
+    arguments = {"fields": parse_fields(fields), "cursor": cursor, "limit": limit}
+    if negotiate(request, streaming=True) == NDJSON:
+        return ndjson_response(request, await service.stream_points_by_vaccine(vaccine_id, **arguments))
+    return await service.get_points_by_vaccine(vaccine_id, count=count, **arguments)
+
+@router.get(
+    "/vaccination-points/by-vaccine/nearby",
+    tags=["Pontos de Vacinação"],
+    summary="Listar pontos próximos que oferecem uma vacina",
+    description="""
+    Retorna os pontos de vacinação mais próximos de uma coordenada que oferecem a vacina informada,
+    ordenados pela distância.
+    
+    Cada ponto inclui o campo `distance_km` com a distância até a coordenada informada.
+    """,
+    response_description="Lista de pontos de vacinação ordenada pela distância",
+    responses={
+        200: {
+            "description": "Sucesso",
+            "content": {
+                "application/json": {
+                    "example": [{
+                        "vaccine_id": 1,
+                        "vaccine_name": "BCG",
+                        "vaccination_point_id": 1,
+                        "vaccination_point_name": "Centro de Vacinação Ponta Verde",
+                        "full_address": "Rua Exemplo, 123",
+                        "neighborhood": "Ponta Verde",
+                        "zip_code": "57000-000",
+                        "phone": "(82) 3333-3333",
+                        "email": "exemplo@email.com",
+                        "latitude": -9.123456,
+                        "longitude": -35.123456,
+                        "distance_km": 1.234
+                    }]
+                }
+            }
+        },
+        404: {
+            "description": "Vacina não encontrada"
+        }
+    }
+)
+@limiter.limit("10/minute")
+async def get_nearest_points_by_vaccine(
+    request: Request,
+    vaccine_id: int = Query(..., description="ID da vacina"),
+    lat: float = Query(..., ge=-90, le=90, description="Latitude de referência"),
+    lon: float = Query(..., ge=-180, le=180, description="Longitude de referência"),
+    radius_km: float | None = Query(None, gt=0, description="Raio máximo de busca em quilômetros"),
+    limit: int = Query(10, ge=1, le=100, description="Quantidade máxima de pontos retornados"),
+    service: VaccinationPointVaccineService = Depends(get_vaccination_point_vaccine_service)
+):
+    return await service.get_nearest_points_by_vaccine(
+        vaccine_id=vaccine_id,
+        latitude=lat,
+        longitude=lon,
+        radius_km=radius_km,
+        limit=limit
+    )
+
+@router.post(
+    "/vaccination-points/nearest/batch",
+    tags=["Pontos de Vacinação"],
+    summary="Atribuir o ponto de vacinação mais próximo a um lote de coordenadas",
+    description="""
+    Recebe uma lista de coordenadas `[latitude, longitude]` e retorna, para cada uma delas,
+    o ponto de vacinação mais próximo, opcionalmente restrito aos pontos que oferecem uma vacina.
+    
+    A resposta é enviada em streaming no formato NDJSON (uma linha JSON por coordenada),
+    na mesma ordem da lista enviada. Se não houver pontos candidatos, nenhuma linha é retornada.
+    """,
+    response_description="Atribuições em NDJSON",
+    responses={
+        200: {
+            "description": "Sucesso",
+            "content": {
+                "application/x-ndjson": {
+                    "example": '{"index":0,"vaccination_point_id":1,"distance_km":0.0}'
+                }
+            }
+        },
+        404: {
+            "description": "Vacina não encontrada"
+        }
+    }
+)
+@limiter.limit("10/minute")
+async def assign_nearest_points(
+    request: Request,
+    batch: NearestPointsBatch,
     service: VaccinationPointVaccineService = Depends(get_vaccination_point_vaccine_service)
 ):
-    return await service.get_points_by_vaccine(vaccine_id)
+    chunks = await service.assign_nearest_points(batch.coordinates, batch.vaccine_id)
+
+    def assignments():
+        for offset, ids, distances in chunks:
+            yield "".join(
+                f'{{"index":{offset + index},"vaccination_point_id":{id},"distance_km":{distance:.3f}}}\n'
+                for index, (id, distance) in enumerate(zip(ids.tolist(), distances.tolist()))
+            )
+
+    return StreamingResponse(assignments(), media_type="application/x-ndjson")
 
 @router.post(
     "/vaccination-points/{vaccination_point_id}/vaccines",
@@ -13,13 +13,17 @@ handling logic.
 from fastapi import APIRouter, Depends, Request, Query
 from app.schemas.vaccines import VaccineCreate
 from app.services.vaccines import VaccineService
-from app.dependencies import get_vaccine_service
-from app.config import limiter
+from app.dependencies import get_vaccine_service, conditional_get
+from app.responses import cache_response
+from app.fields import parse_fields
+from app.encoders import vaccine_rows
+from app.config import limiter, settings
 
 router = APIRouter()
 
 @router.get(
     "/vaccines",
+    dependencies=[Depends(conditional_get("vaccines"))],
     tags=["Vacinas"],
     summary="Listar vacinas",
     description="""
@@ -29,7 +33,9 @@ router = APIRouter()
     * ID da vacina
     * Nome da vacina (busca parcial, não sensível a maiúsculas/minúsculas)
     
-    Se nenhum filtro for fornecido, retorna todas as vacinas.
+    A lista é paginada por cursor: quando há mais vacinas, a resposta traz o cabeçalho
+    `Link` (`rel="next"`) e o cursor `X-Next-Cursor`, a ser enviado em `cursor` na próxima chamada.
+    Com `count=true`, o total de itens de todas as páginas vem no cabeçalho `X-Total-Count`.
     """,
     response_description="Lista de vacinas",
     responses={
@@ -48,13 +54,18 @@ router = APIRouter()
     }
 )
 @limiter.limit("10/minute")
+@cache_response("vaccines", encoder=vaccine_rows)
 async def get_vaccines(
     request: Request,
     id: int | None = Query(None, description="ID da vacina"),
     name: str | None = Query(None, description="Nome da vacina (busca parcial)"),
+    fields: str | None = Query(None, description="Campos retornados, separados por vírgula (ex.: id,name)"),
+    cursor: str | None = Query(None, description="Cursor da próxima página, do cabeçalho X-Next-Cursor da resposta anterior"),
+    limit: int | None = Query(None, ge=1, le=settings.PAGE_SIZE_MAX, description=f"Itens por página (padrão {settings.PAGE_SIZE_DEFAULT})"),
+    count: bool = Query(False, description="Informa o total de itens de todas as páginas no cabeçalho X-Total-Count"),
     service: VaccineService = Depends(get_vaccine_service)
 ):
-    return await service.get_all_vaccines(id=id, name=name)
+    return await service.get_all_vaccines(id=id, name=name, fields=parse_fields(fields), cursor=cursor, limit=limit, count=count)
 
 @router.post(
     "/vaccines",
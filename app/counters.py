@@ -0,0 +1,95 @@
+"""
+Total counts of the list endpoints.
+
+This module contains the counts behind the X-Total-Count header. It is
+responsible for:
+- Counting filtered lists exactly, through the indexes of their filters
+- Keeping the row count of each table, updated by the repositories'
+  creates and deletes instead of being counted again, when the cache
+  backend announces the writes of the other workers
+- Estimating the size of big tables from the planner statistics on
+  PostgreSQL, where a COUNT(*) reads the whole table
+
+Counts of whole tables are dropped on writes they cannot follow (cascades
+and writes announced by other workers), and counted again when needed.
+With the memory backend a worker never hears of the others' writes, so
+whole tables are counted on every request instead of being kept.
+"""
+
+from databases import Database
+from sqlalchemy import Select, func, select, text
+from app.config import settings
+from app.cache_backends import response_backend
+from app.versions import table_versions
+
+
+async def exact_count(database: Database, query: Select) -> int:
+    """Rows returned by `query`."""
+    return await database.fetch_val(select(func.count()).select_from(query.order_by(None).subquery()))
+
+
+async def planner_estimate(database: Database, table: str) -> int | None:
+    """Rows of `table` according to the last ANALYZE on PostgreSQL, None when never analyzed."""
+    estimate = await database.fetch_val(
+        text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table)"),
+        {"table": table}
+    )
+    return estimate if estimate is not None and estimate >= 0 else None
+
+
+class TableCounts:
+    """Row counts of whole tables, for the unfiltered lists."""
+
+    def __init__(
+        self,
+        estimate_min_rows: int = settings.COUNT_ESTIMATE_MIN_ROWS,
+        keep_counts: bool = response_backend.shares_writes
+    ):
+        self.estimate_min_rows = estimate_min_rows
+        self.keep_counts = keep_counts
+        self._counts: dict[str, int] = {}
+        self._generations: dict[str, int] = {}
+
+    async def count(self, database: Database, query: Select, table: str) -> tuple[int, bool]:
+        """
+        Total rows of `query`, a list of `table` before pagination, and
+        whether the total is an estimate.
+        """
+        if query.whereclause is not None:
+            return await exact_count(database, query), False
+        if table in self._counts:
+            return self._counts[table], False
+        if database.url.dialect == "postgresql":
+            estimate = await planner_estimate(database, table)
+            if estimate is not None and estimate >= self.estimate_min_rows:
+                return estimate, True
+
+        generation = self._generations.get(table, 0)
+        total = await exact_count(database, query)
+        # Not kept if a write happened while counting: it may be missing from the total
+        if self.keep_counts and self._generations.get(table, 0) == generation:
+            self._counts[table] = total
+        return total, False
+
+    def add(self, table: str, delta: int) -> None:
+        """Records `delta` rows created (or deleted, when negative) in `table`."""
+        self._generations[table] = self._generations.get(table, 0) + 1
+        if table in self._counts:
+            self._counts[table] += delta
+
+    def forget(self, *tables: str) -> None:
+        for table in tables:
+            self._generations[table] = self._generations.get(table, 0) + 1
+            self._counts.pop(table, None)
+
+
+table_counts = TableCounts()
+
+
+async def _forget_remote_counts(tables: tuple[str, ...], remote: bool) -> None:
+    # Local writes are counted by the repositories themselves
+    if remote:
+        table_counts.forget(*tables)
+
+
+table_versions.subscribe(_forget_remote_counts)
@@ -1,6 +1,7 @@
 from databases import Database
 from sqlalchemy import MetaData
 from app.config import settings
+from app.sqlite import tune_sqlite
 import os
 
 metadata = MetaData()
@@ -13,8 +14,24 @@ def get_database_url():
         os.makedirs("data", exist_ok=True)
         return f"sqlite:///data/{settings.SQLITE_DB_NAME}"
 
+def get_database_options():
+    if settings.DATABASE_TYPE == "postgres":
+        # Passed by the databases engine to asyncpg.create_pool
+        return {
+            "min_size": settings.DB_POOL_MIN_SIZE,
+            "max_size": settings.DB_POOL_MAX_SIZE,
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "max_inactive_connection_lifetime": settings.DB_POOL_MAX_INACTIVE_LIFETIME,
+            "max_queries": settings.DB_POOL_MAX_QUERIES
+        }
+    else:
+        # SQLite opens one connection per acquisition, unless on the performance profile (app.sqlite)
+        return {}
+
 DATABASE_URL = get_database_url()
-database = Database(DATABASE_URL)
+database = Database(DATABASE_URL, **get_database_options())
+if settings.DATABASE_TYPE != "postgres" and settings.SQLITE_PROFILE == "performance":
+    tune_sqlite(database)
 
 def get_database():
     return database
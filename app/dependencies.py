@@ -11,6 +11,8 @@ Dependencies are responsible for:
 This module centralizes the creation of all application dependencies.
 """
 
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import HTTPException, Request, Response
 from app.database import database
 from app.repositories.countries import CountryRepository
 from app.repositories.states import StateRepository
@@ -24,6 +26,13 @@ from app.services.cities import CityService
 from app.services.vaccination_points import VaccinationPointService
 from app.services.vaccines import VaccineService
 from app.services.vaccination_point_vaccines import VaccinationPointVaccineService
+from app.services.autocomplete import AutocompleteService
+from app.services.metrics import MetricsService
+from app.cache import missing_ids, query_cache
+from app.cache_backends import response_backend
+from app.pool import pool_metrics
+from app.versions import table_versions
+from app.responses import JSON, negotiate, normalized_query
 
 
 def get_country_repository():
@@ -76,4 +85,54 @@ async def get_vaccination_point_vaccine_service():
         repository=repository,
         vaccination_point_repository=vaccination_point_repository,
         vaccine_repository=vaccine_repository
-    ) 
+    )
+
+def get_autocomplete_service():
+    return AutocompleteService(
+        city_repository=get_city_repository(),
+        vaccine_repository=get_vaccine_repository(),
+        vaccination_point_repository=get_vaccination_point_repository()
+    )
+
+def get_metrics_service():
+    return MetricsService(query_cache, response_backend, missing_ids, pool_metrics)
+
+def conditional_get(*tables: str, streaming: bool = False, shared_versions: bool = response_backend.shares_writes):
+    """
+    Answers conditional GETs on endpoints whose response only depends on
+    `tables` and the (normalized) query string: emits ETag and Last-Modified, and raises
+    304 on a matching If-None-Match (or If-Modified-Since) before the
+    service is called. `streaming` must match the endpoint, which then offers NDJSON.
+    Off unless `shared_versions`: a worker only counts the writes announced
+    to it, so with the memory backend it would answer 304 for the writes of others.
+    """
+    def dependency(request: Request, response: Response):
+        if not shared_versions:
+            return
+        # Each format is a different representation, with its own tag
+        media_type = negotiate(request, streaming)
+        variant = normalized_query(request) if media_type == JSON else f"{normalized_query(request)}|{media_type}"
+        etag = table_versions.etag(tables, variant=variant)
+        last_modified = table_versions.last_modified(tables)
+        headers = {"ETag": etag}
+        if last_modified is not None:
+            headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+
+        if_none_match = request.headers.get("if-none-match")
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_none_match is not None:
+            tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            not_modified = "*" in tags or etag in tags
+        elif if_modified_since is not None and last_modified is not None:
+            try:
+                not_modified = last_modified <= parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                not_modified = False
+        else:
+            not_modified = False
+
+        if not_modified:
+            # Vary as the full response would: the tag depends on the negotiated format
+            raise HTTPException(status_code=304, headers={**headers, "Vary": "Accept"})
+        response.headers.update(headers)
+    return dependency
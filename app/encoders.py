@@ -0,0 +1,158 @@
+"""
+Fast encoding of query results.
+
+This module contains the encoders behind FastJSONResponse and the binary
+formats of the list endpoints. It is responsible for:
+- Encoding content with orjson when installed, or the standard library
+- Encoding `fetch_all` rows of a model, or of some of its columns, without
+  the generic encoder walk
+- Producing the same bytes as FastAPI's default encoder for those rows
+- Encoding lists of rows as MessagePack or as an Arrow IPC stream
+
+The generic `jsonable_encoder` inspects every value of every row, which
+dominates large responses. RowEncoder knows the columns of its model
+beforehand: each row becomes a dict in one `zip`, and only the date
+columns need a conversion (done natively by orjson).
+"""
+
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Iterable, Sequence
+from sqlalchemy import Date, DateTime, Time, inspect
+from app.fields import model_fields
+from app.models import City, Country, State, VaccinationPoint, Vaccine
+
+try:
+    import orjson
+except ImportError:  # optional extra: poetry install -E fast-json
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional extra: poetry install -E msgpack
+    msgpack = None
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+except ImportError:  # optional extra: poetry install -E arrow
+    pyarrow = None
+
+
+def _default(value: Any) -> Any:
+    # Types the encoders do not know natively, converted as jsonable_encoder does
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if hasattr(value, "_mapping") and hasattr(value, "keys"):
+        # databases Record
+        return dict(zip(value.keys(), value._mapping))
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Encodes `content` compactly, without escaping non-ASCII characters, as JSONResponse does."""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content,
+        default=_default,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":")
+    ).encode("utf-8")
+
+
+class RowEncoder:
+    """Encodes the rows of `select(model)` queries, whole or restricted to some `fields`."""
+
+    def __init__(self, model: type):
+        self.model = model
+        self.columns = model_fields(model)
+        # Columns converted to ISO 8601 when orjson is not installed
+        self.temporal_columns = frozenset(
+            attribute.key for attribute in inspect(model).column_attrs
+            if isinstance(attribute.columns[0].type, (Date, DateTime, Time))
+        )
+
+    def columns_of(self, rows: Sequence[Any]) -> tuple[str, ...] | None:
+        """Columns of `rows` when they are records of this model, None otherwise."""
+        if not rows:
+            return self.columns
+        row = rows[0]
+        if not hasattr(row, "_mapping"):
+            return None
+        columns = tuple(row.keys())
+        return columns if set(columns) <= set(self.columns) else None
+
+    def to_dicts(self, rows: Iterable[Any], columns: tuple[str, ...] | None = None) -> list[dict]:
+        columns = columns or self.columns
+        temporal = tuple(position for position, column in enumerate(columns) if column in self.temporal_columns)
+        if orjson is not None or not temporal:
+            return [dict(zip(columns, row._mapping)) for row in rows]
+        dicts = []
+        for row in rows:
+            values = list(row._mapping)
+            for position in temporal:
+                if values[position] is not None:
+                    values[position] = values[position].isoformat()
+            dicts.append(dict(zip(columns, values)))
+        return dicts
+
+    def encode(self, rows: Any) -> bytes:
+        """Encodes a list of rows of the model; any other content goes through `dumps`."""
+        columns = self.columns_of(rows) if isinstance(rows, list) else None
+        if columns is not None:
+            return dumps(self.to_dicts(rows, columns))
+        return dumps(rows)
+
+
+def packb(content: Any, encoder: RowEncoder | None = None) -> bytes:
+    """Encodes `content` as MessagePack; dates become ISO 8601 strings, as in JSON."""
+    if encoder is not None and isinstance(content, list):
+        columns = encoder.columns_of(content)
+        if columns is not None:
+            content = encoder.to_dicts(content, columns)
+    return msgpack.packb(content, default=_default, use_bin_type=True)
+
+
+def _arrow_array(values: list) -> "pyarrow.Array":
+    try:
+        return pyarrow.array(values)
+    except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError):
+        # Values without a common Arrow type (free-form JSON) are sent as JSON text
+        return pyarrow.array([None if value is None else dumps(value).decode() for value in values], pyarrow.string())
+
+
+def arrow_stream(rows: list, encoder: RowEncoder | None = None) -> bytes:
+    """
+    Encodes a list of rows as one record batch of an Arrow IPC stream.
+    Records are transposed straight into columns, without per-row dicts.
+    """
+    if rows and hasattr(rows[0], "_mapping"):
+        names = tuple(rows[0].keys())
+        columns = [list(column) for column in zip(*(row._mapping for row in rows))]
+    elif rows:
+        names = tuple(rows[0])
+        columns = [[row.get(name) for row in rows] for name in names]
+    else:
+        names = encoder.columns if encoder is not None else ()
+        columns = [[] for _ in names]
+    batch = pyarrow.RecordBatch.from_arrays([_arrow_array(column) for column in columns], names=list(names))
+    sink = pyarrow.BufferOutputStream()
+    with pyarrow.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
+
+
+country_rows = RowEncoder(Country)
+state_rows = RowEncoder(State)
+city_rows = RowEncoder(City)
+vaccine_rows = RowEncoder(Vaccine)
+vaccination_point_rows = RowEncoder(VaccinationPoint)
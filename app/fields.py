@@ -0,0 +1,57 @@
+"""
+Sparse fieldsets of the list endpoints.
+
+This module contains the helpers behind the `fields` query parameter.
+It is responsible for:
+- Listing the fields a model or query can return
+- Parsing and validating the fields requested by the client
+- Pushing the requested fields down into the SELECT of a query
+
+Only the requested columns are read from the database and encoded, so
+both the I/O and the payload shrink.
+"""
+
+from fastapi import HTTPException
+from sqlalchemy import Select, inspect
+
+
+def model_fields(model: type) -> tuple[str, ...]:
+    """Columns returned by `select(model)`: the ones not deferred, in order."""
+    return tuple(attribute.key for attribute in inspect(model).column_attrs if not attribute.deferred)
+
+
+def query_fields(query: Select) -> tuple[str, ...]:
+    """Names of the columns selected by `query`."""
+    return tuple(query.selected_columns.keys())
+
+
+def parse_fields(value: str | None) -> tuple[str, ...] | None:
+    """Splits a comma separated `fields` parameter, dropping blanks and repetitions."""
+    if not value:
+        return None
+    fields = tuple(dict.fromkeys(field.strip() for field in value.split(",") if field.strip()))
+    return fields or None
+
+
+def validate_fields(fields: tuple[str, ...] | None, available: tuple[str, ...]) -> tuple[str, ...] | None:
+    """
+    Checks the requested fields against the available ones and returns them
+    in the order of `available`, so equivalent requests share cache entries.
+    """
+    if fields is None:
+        return None
+    unknown = [field for field in fields if field not in available]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Campos inválidos: {', '.join(unknown)}. Campos disponíveis: {', '.join(available)}"
+        )
+    return tuple(field for field in available if field in fields)
+
+
+def select_fields(query: Select, fields: tuple[str, ...] | None) -> Select:
+    """Restricts the columns of `query` to `fields`, keeping its FROM clause, joins and filters."""
+    if fields is None:
+        return query
+    columns = query.selected_columns
+    return query.with_only_columns(*(columns[field] for field in fields), maintain_column_froms=True)
@@ -0,0 +1,101 @@
+"""
+In-memory prefix index for autocomplete.
+
+This module contains a sorted array of accent-folded names searched with
+bisect. It is responsible for:
+- Indexing the normalized name of each row and the start of each of its words
+- Answering prefix queries without touching the database
+- Ranking matches at the start of the name before matches at a later word
+- Being kept in sync by the repositories on every write
+
+A query costs one binary search per array plus a scan bounded by `limit`.
+"""
+
+from bisect import bisect_left, insort
+from typing import Iterable
+from app.search import normalize_text
+
+# Ranks of a match: the whole name starts with the prefix, or a later word does
+NAME_START, WORD_START = 0, 1
+
+
+def _keys(name: str) -> tuple[str, list[str]]:
+    normalized = normalize_text(name) or ""
+    words = [
+        normalized[position:]
+        for position in range(1, len(normalized))
+        if normalized[position - 1] == " "
+    ]
+    return normalized, words
+
+
+class PrefixIndex:
+    def __init__(self):
+        self._names: dict[int, str] = {}
+        # (key, id) pairs sorted by key, one array per rank
+        self._entries: tuple[list[tuple[str, int]], list[tuple[str, int]]] = ([], [])
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def add(self, id: int, name: str) -> None:
+        self.remove(id)
+        self._names[id] = name
+        normalized, words = _keys(name)
+        insort(self._entries[NAME_START], (normalized, id))
+        for word in words:
+            insort(self._entries[WORD_START], (word, id))
+
+    def remove(self, id: int) -> None:
+        name = self._names.pop(id, None)
+        if name is None:
+            return
+        normalized, words = _keys(name)
+        for entries, keys in zip(self._entries, ([normalized], words)):
+            for key in keys:
+                position = bisect_left(entries, (key, id))
+                if position < len(entries) and entries[position] == (key, id):
+                    del entries[position]
+
+    def clear(self) -> None:
+        self._names.clear()
+        for entries in self._entries:
+            entries.clear()
+
+    def rebuild(self, rows: Iterable[tuple[int, str]]) -> None:
+        self.clear()
+        names, words = self._entries
+        for id, name in rows:
+            self._names[id] = name
+            normalized, starts = _keys(name)
+            names.append((normalized, id))
+            words.extend((word, id) for word in starts)
+        names.sort()
+        words.sort()
+
+    def search(self, prefix: str, limit: int = 10) -> list[tuple[int, str, int]]:
+        """
+        Returns up to `limit` (id, name, rank) whose normalized name, or one of
+        its words, starts with `prefix`. Whole-name matches come first, each
+        rank in alphabetical order.
+        """
+        prefix = normalize_text(prefix)
+        if not prefix:
+            return []
+
+        found: dict[int, tuple[int, str, int]] = {}
+        for rank, entries in enumerate(self._entries):
+            position = bisect_left(entries, (prefix,))
+            while len(found) < limit and position < len(entries):
+                key, id = entries[position]
+                if not key.startswith(prefix):
+                    break
+                if id not in found:
+                    found[id] = (id, self._names[id], rank)
+                position += 1
+        return list(found.values())
+
+
+city_names = PrefixIndex()
+vaccine_names = PrefixIndex()
+vaccination_point_names = PrefixIndex()
@@ -0,0 +1,118 @@
+"""
+Hierarchical cluster grid for map viewports.
+
+This module contains one aggregate grid per map zoom level over the
+coordinates of the vaccination points. It is responsible for:
+- Keeping the point count and coordinate sums of every cell per zoom level
+- Updating the aggregates incrementally when a point is added or removed
+- Returning the clusters (count + centroid) that intersect a bounding box
+
+Cell sizes follow the web map tiles: at zoom `z` the world is 2^z tiles
+wide and each tile is split into `cells_per_tile` cells per side.
+"""
+
+from math import floor
+from typing import Iterable
+
+
+class ClusterGrid:
+    def __init__(self, max_zoom: int = 11, cells_per_tile: int = 4):
+        self.max_zoom = max_zoom
+        self.cells_per_tile = cells_per_tile
+        self._points: dict[int, tuple[float, float]] = {}
+        # Per level: cell -> [count, latitude sum, longitude sum, id sum]
+        self._levels: list[dict[tuple[int, int], list]] = [{} for _ in range(max_zoom + 1)]
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def cell_size(self, zoom: int) -> float:
+        return 360.0 / (2 ** zoom * self.cells_per_tile)
+
+    def _cell(self, zoom: int, latitude: float, longitude: float) -> tuple[int, int]:
+        size = self.cell_size(zoom)
+        return floor(latitude / size), floor(longitude / size)
+
+    def add(self, id: int, latitude: float, longitude: float) -> None:
+        self.remove(id)
+        self._points[id] = (latitude, longitude)
+        for zoom, cells in enumerate(self._levels):
+            aggregate = cells.setdefault(self._cell(zoom, latitude, longitude), [0, 0.0, 0.0, 0])
+            aggregate[0] += 1
+            aggregate[1] += latitude
+            aggregate[2] += longitude
+            aggregate[3] += id
+
+    def remove(self, id: int) -> None:
+        coordinates = self._points.pop(id, None)
+        if coordinates is None:
+            return
+        latitude, longitude = coordinates
+        for zoom, cells in enumerate(self._levels):
+            cell = self._cell(zoom, latitude, longitude)
+            aggregate = cells[cell]
+            aggregate[0] -= 1
+            if aggregate[0] == 0:
+                del cells[cell]
+                continue
+            aggregate[1] -= latitude
+            aggregate[2] -= longitude
+            aggregate[3] -= id
+
+    def clear(self) -> None:
+        self._points.clear()
+        for cells in self._levels:
+            cells.clear()
+
+    def rebuild(self, points: Iterable[tuple[int, float | None, float | None]]) -> None:
+        """Replaces the whole content of the grid. Points without coordinates are skipped."""
+        self.clear()
+        for id, latitude, longitude in points:
+            if latitude is not None and longitude is not None:
+                self.add(id, latitude, longitude)
+
+    def clusters(
+        self,
+        min_latitude: float,
+        min_longitude: float,
+        max_latitude: float,
+        max_longitude: float,
+        zoom: int
+    ) -> list[dict]:
+        """
+        Returns the clusters of the cells of `zoom` that intersect the box.
+        A cluster holding a single point also carries its `vaccination_point_id`.
+        """
+        zoom = max(0, min(zoom, self.max_zoom))
+        cells = self._levels[zoom]
+        min_row, min_col = self._cell(zoom, min_latitude, min_longitude)
+        max_row, max_col = self._cell(zoom, max_latitude, max_longitude)
+
+        if (max_row - min_row + 1) * (max_col - min_col + 1) <= len(cells):
+            candidates = (
+                cells[(row, col)]
+                for row in range(min_row, max_row + 1)
+                for col in range(min_col, max_col + 1)
+                if (row, col) in cells
+            )
+        else:
+            candidates = (
+                aggregate
+                for (row, col), aggregate in cells.items()
+                if min_row <= row <= max_row and min_col <= col <= max_col
+            )
+
+        clusters = []
+        for count, latitude_sum, longitude_sum, id_sum in candidates:
+            cluster = {
+                "count": count,
+                "latitude": latitude_sum / count,
+                "longitude": longitude_sum / count
+            }
+            if count == 1:
+                cluster["vaccination_point_id"] = id_sum
+            clusters.append(cluster)
+        return clusters
+
+
+vaccination_point_clusters = ClusterGrid()
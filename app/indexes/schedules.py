@@ -0,0 +1,156 @@
+"""
+In-memory opening hours index for vaccination points.
+
+This module compiles the `schedules` JSON of each vaccination point into
+sorted minute-of-week intervals. It is responsible for:
+- Converting Schedule entries into merged [start, end) minute-of-week intervals
+- Producing the rows of the normalized vaccination_point_schedules table
+- Computing the next opening of every point in one NumPy pass
+- Being kept in sync by the repository on every write
+
+Minute 0 of the week is monday 00:00, matching `datetime.weekday()`.
+"""
+
+from datetime import datetime
+from itertools import chain
+from typing import Iterable
+import numpy as np
+from app.schemas.common import Weekday
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+WEEKDAY_NUMBERS = {weekday.value: number for number, weekday in enumerate(Weekday)}
+
+
+def minute_of_week(moment: datetime) -> int:
+    return moment.weekday() * MINUTES_PER_DAY + moment.hour * 60 + moment.minute
+
+
+def _minutes(value: str, round_up: bool = False) -> int:
+    hours, minutes, *rest = (int(part) for part in value.split(":"))
+    seconds = rest[0] if rest else 0
+    return hours * 60 + minutes + (1 if round_up and seconds else 0)
+
+
+def schedule_rows(schedules: Iterable[dict] | None) -> list[dict]:
+    """
+    Turns a list of schedules into the rows of the vaccination_point_schedules
+    table: one (weekday, start_minute, end_minute) per distinct interval.
+    """
+    rows = {
+        (
+            WEEKDAY_NUMBERS[schedule["weekday"]],
+            _minutes(schedule["start"]),
+            _minutes(schedule["end"], round_up=True)
+        )
+        for schedule in schedules or ()
+    }
+    return [
+        {"weekday": weekday, "start_minute": start, "end_minute": end}
+        for weekday, start, end in sorted(rows)
+        if start < end
+    ]
+
+
+def compile_schedules(schedules: Iterable[dict] | None) -> list[tuple[int, int]]:
+    """
+    Turns a list of schedules ({"start", "end", "weekday"}) into sorted,
+    non-overlapping [start, end) minute-of-week intervals.
+
+    The end time is rounded up to the next minute, so "23:59:59" closes at
+    midnight.
+    """
+    intervals = []
+    for schedule in schedules or ():
+        offset = WEEKDAY_NUMBERS[schedule["weekday"]] * MINUTES_PER_DAY
+        intervals.append((
+            offset + _minutes(schedule["start"]),
+            offset + _minutes(schedule["end"], round_up=True)
+        ))
+    intervals.sort()
+
+    merged: list[tuple[int, int]] = []
+    for start, end in intervals:
+        if start >= end:
+            continue
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class ScheduleIndex:
+    def __init__(self):
+        self._starts: dict[int, list[int]] = {}
+        self._ends: dict[int, list[int]] = {}
+        self._version = 0
+        self._arrays: tuple[int, np.ndarray, np.ndarray, np.ndarray, np.ndarray] | None = None
+        self._next_openings: tuple[int, int, dict[int, int]] | None = None
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def set(self, id: int, schedules: Iterable[dict] | None) -> None:
+        intervals = compile_schedules(schedules)
+        self._starts[id] = [start for start, _ in intervals]
+        self._ends[id] = [end for _, end in intervals]
+        self._version += 1
+
+    def remove(self, id: int) -> None:
+        self._starts.pop(id, None)
+        self._ends.pop(id, None)
+        self._version += 1
+
+    def clear(self) -> None:
+        self._starts.clear()
+        self._ends.clear()
+        self._version += 1
+
+    def rebuild(self, points: Iterable[tuple[int, list[dict] | None]]) -> None:
+        self.clear()
+        for id, schedules in points:
+            self.set(id, schedules)
+
+    def _flat_arrays(self) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Flattens the intervals of every point that has any into (ids, offsets,
+        starts, ends), where the intervals of ids[i] begin at offsets[i].
+        Rebuilt only after a write.
+        """
+        if self._arrays is None or self._arrays[0] != self._version:
+            ids = [id for id, starts in self._starts.items() if starts]
+            counts = np.fromiter((len(self._starts[id]) for id in ids), dtype=np.int64, count=len(ids))
+            total = int(counts.sum())
+            self._arrays = (
+                self._version,
+                np.array(ids, dtype=np.int64),
+                np.concatenate(([0], np.cumsum(counts)[:-1])).astype(np.int64) if len(ids) else counts,
+                np.fromiter(chain.from_iterable(self._starts[id] for id in ids), dtype=np.int64, count=total),
+                np.fromiter(chain.from_iterable(self._ends[id] for id in ids), dtype=np.int64, count=total)
+            )
+        return self._arrays[1:]
+
+    def next_openings(self, minute: int) -> dict[int, int]:
+        """
+        Minutes from `minute` of the week until each point opens, 0 meaning it
+        is open. Points without schedules are left out. Cached per minute.
+        """
+        cached = self._next_openings
+        if cached is not None and cached[0] == self._version and cached[1] == minute:
+            return cached[2]
+
+        ids, offsets, starts, ends = self._flat_arrays()
+        if not len(ids):
+            return {}
+        waits = np.where(
+            (starts <= minute) & (minute < ends),
+            0,
+            (starts - minute) % MINUTES_PER_WEEK
+        )
+        openings = dict(zip(ids.tolist(), np.minimum.reduceat(waits, offsets).tolist()))
+        self._next_openings = (self._version, minute, openings)
+        return openings
+
+
+vaccination_point_schedules = ScheduleIndex()
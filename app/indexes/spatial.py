@@ -0,0 +1,429 @@
+"""
+In-memory spatial index for vaccination points.
+
+This module contains a uniform latitude/longitude grid over the
+coordinates of the vaccination points. It is responsible for:
+- Bucketing points into fixed-size grid cells
+- Answering k-nearest, radius and bounding box queries without touching the database
+- Keeping one grid per vaccine for "nearest point offering X" queries
+- Exposing NumPy snapshots of the coordinates for batch assignments
+- Being kept in sync by the repositories on every write
+
+The index is built once on application startup and lives in the
+process memory, so every worker keeps its own copy.
+"""
+
+from math import asin, cos, floor, radians, sin, sqrt
+import heapq
+from typing import Container, Iterable, Iterator
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in kilometers between two coordinates."""
+    phi1, phi2 = radians(lat1), radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = radians(lon2 - lon1)
+    a = sin(dphi / 2) ** 2 + cos(phi1) * cos(phi2) * sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * asin(min(1.0, sqrt(a)))
+
+
+def square_lower_bound_km(latitude: float, gap: float) -> float:
+    """
+    Minimum distance from a point at `latitude` to anything at least `gap`
+    degrees away from it in latitude or in longitude.
+    """
+    gap = radians(min(gap, 90.0))
+    latitude_bound = EARTH_RADIUS_KM * gap
+    # Distance from a point to a meridian `gap` radians away is asin(cos(lat) * sin(gap))
+    longitude_bound = EARTH_RADIUS_KM * asin(min(1.0, cos(radians(latitude)) * sin(gap)))
+    return min(latitude_bound, longitude_bound)
+
+
+def to_unit_vectors(latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    """Converts coordinates in degrees to (n, 3) unit vectors on the sphere."""
+    phi = np.radians(latitudes)
+    lam = np.radians(longitudes)
+    cos_phi = np.cos(phi)
+    return np.column_stack((cos_phi * np.cos(lam), cos_phi * np.sin(lam), np.sin(phi)))
+
+
+class PointMatrix:
+    """
+    Immutable NumPy snapshot of indexed points for batch nearest queries.
+
+    Points are sorted by coarse grid cell. Queries are grouped by the cell
+    they fall in and each group is only compared with the points of the
+    surrounding cells: on the unit sphere the nearest point is the one with
+    the largest dot product, so a group costs one small matrix product and
+    an argmax. The square of cells is widened until no point outside it can
+    beat the farthest winner of the group. The haversine distance is then
+    derived from the chord length to the winner (d = 2R * asin(chord / 2)).
+    """
+
+    def __init__(self, ids: np.ndarray, latitudes: np.ndarray, longitudes: np.ndarray, cell_size: float = 1.0):
+        self.cell_size = cell_size
+        rows = np.floor(latitudes / cell_size).astype(np.int64)
+        cols = np.floor(longitudes / cell_size).astype(np.int64)
+        order = np.lexsort((cols, rows))
+        self.ids = ids[order]
+        self.vectors = to_unit_vectors(latitudes[order], longitudes[order])
+        rows, cols = rows[order], cols[order]
+
+        # Each occupied cell maps to its [start, stop) slice of the sorted points
+        self._cells: dict[tuple[int, int], tuple[int, int]] = {}
+        if len(order):
+            boundaries = np.flatnonzero((np.diff(rows) != 0) | (np.diff(cols) != 0)) + 1
+            starts = np.concatenate(([0], boundaries))
+            stops = np.concatenate((boundaries, [len(order)]))
+            for start, stop in zip(starts.tolist(), stops.tolist()):
+                self._cells[(int(rows[start]), int(cols[start]))] = (start, stop)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def empty(cls) -> "PointMatrix":
+        empty = np.empty(0, dtype=np.float64)
+        return cls(np.empty(0, dtype=np.int64), empty, empty)
+
+    def _candidates(self, row: int, col: int, radius: int) -> np.ndarray | None:
+        """Indices of the points in the square of cells around (row, col), None meaning all points."""
+        if (2 * radius + 1) ** 2 >= len(self._cells):
+            return None
+        slices = [
+            self._cells[(r, c)]
+            for r in range(row - radius, row + radius + 1)
+            for c in range(col - radius, col + radius + 1)
+            if (r, c) in self._cells
+        ]
+        if not slices:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([np.arange(start, stop) for start, stop in slices])
+
+    def _radius_for(self, distance_km: float, max_abs_latitude: float, radius: int) -> int:
+        """Smallest square radius (>= radius) whose outside lies farther than `distance_km`."""
+        while (2 * radius + 1) ** 2 < len(self._cells):
+            if square_lower_bound_km(max_abs_latitude, radius * self.cell_size) >= distance_km:
+                break
+            radius += 1
+        return radius
+
+    def nearest(
+        self,
+        latitudes: np.ndarray,
+        longitudes: np.ndarray,
+        chunk_size: int = 65536
+    ) -> Iterator[tuple[int, np.ndarray, np.ndarray]]:
+        """Yields (offset, ids, distances_km) per chunk of queries, in the input order."""
+        if not len(self.ids):
+            return
+        for offset in range(0, len(latitudes), chunk_size):
+            chunk_latitudes = latitudes[offset:offset + chunk_size]
+            chunk_longitudes = longitudes[offset:offset + chunk_size]
+            queries = to_unit_vectors(chunk_latitudes, chunk_longitudes)
+            best = np.empty(len(queries), dtype=np.int64)
+
+            rows = np.floor(chunk_latitudes / self.cell_size).astype(np.int64)
+            cols = np.floor(chunk_longitudes / self.cell_size).astype(np.int64)
+            order = np.lexsort((cols, rows))
+            boundaries = np.flatnonzero((np.diff(rows[order]) != 0) | (np.diff(cols[order]) != 0)) + 1
+            for group in np.split(order, boundaries):
+                row, col = int(rows[group[0]]), int(cols[group[0]])
+                group_queries = queries[group]
+
+                radius = 0
+                candidates = self._candidates(row, col, radius)
+                while candidates is not None and not len(candidates):
+                    radius += 1
+                    candidates = self._candidates(row, col, radius)
+
+                while True:
+                    vectors = self.vectors if candidates is None else self.vectors[candidates]
+                    dots = group_queries @ vectors.T
+                    winners = np.argmax(dots, axis=1)
+                    if candidates is None:
+                        best[group] = winners
+                        break
+                    best[group] = candidates[winners]
+                    # |a - b|^2 = 2 - 2 a.b for unit vectors
+                    lowest = float(dots[np.arange(len(group)), winners].min())
+                    chord = sqrt(max(0.0, 2 - 2 * lowest))
+                    farthest = 2 * EARTH_RADIUS_KM * asin(min(1.0, chord / 2))
+                    max_abs_latitude = float(np.abs(chunk_latitudes[group]).max())
+                    needed = self._radius_for(farthest, max_abs_latitude, radius)
+                    if needed == radius:
+                        break
+                    radius = needed
+                    candidates = self._candidates(row, col, radius)
+
+            chord = np.linalg.norm(queries - self.vectors[best], axis=1)
+            distances = 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(1.0, chord / 2))
+            yield offset, self.ids[best], distances
+
+
+class GridIndex:
+    """
+    Uniform grid of `cell_size` degrees mapping each cell to the ids of the
+    points inside it.
+
+    Nearest-neighbour queries visit the cells in rings around the query
+    point and stop as soon as no unvisited ring can hold a closer point.
+    """
+
+    def __init__(self, cell_size: float = 0.1):
+        self.cell_size = cell_size
+        self._cells: dict[tuple[int, int], set[int]] = {}
+        self._points: dict[int, tuple[float, float]] = {}
+        self._version = 0
+        self._snapshot: tuple[int, PointMatrix] | None = None
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def __contains__(self, id: int) -> bool:
+        return id in self._points
+
+    def _cell(self, latitude: float, longitude: float) -> tuple[int, int]:
+        return floor(latitude / self.cell_size), floor(longitude / self.cell_size)
+
+    def get(self, id: int) -> tuple[float, float] | None:
+        return self._points.get(id)
+
+    def add(self, id: int, latitude: float, longitude: float) -> None:
+        self.remove(id)
+        self._points[id] = (latitude, longitude)
+        self._cells.setdefault(self._cell(latitude, longitude), set()).add(id)
+        self._version += 1
+
+    def remove(self, id: int) -> None:
+        coordinates = self._points.pop(id, None)
+        if coordinates is None:
+            return
+        self._version += 1
+        cell = self._cell(*coordinates)
+        bucket = self._cells.get(cell)
+        if bucket is not None:
+            bucket.discard(id)
+            if not bucket:
+                del self._cells[cell]
+
+    def clear(self) -> None:
+        self._cells.clear()
+        self._points.clear()
+        self._version += 1
+
+    def snapshot(self) -> PointMatrix:
+        """Returns a PointMatrix of the current points, cached until the next write."""
+        if self._snapshot is None or self._snapshot[0] != self._version:
+            ids = np.fromiter(self._points.keys(), dtype=np.int64, count=len(self._points))
+            coordinates = np.array(list(self._points.values()), dtype=np.float64).reshape(-1, 2)
+            self._snapshot = (self._version, PointMatrix(ids, coordinates[:, 0], coordinates[:, 1]))
+        return self._snapshot[1]
+
+    def rebuild(self, points: Iterable[tuple[int, float | None, float | None]]) -> None:
+        """Replaces the whole content of the index. Points without coordinates are skipped."""
+        self.clear()
+        for id, latitude, longitude in points:
+            if latitude is not None and longitude is not None:
+                self.add(id, latitude, longitude)
+
+    def within_bbox(
+        self,
+        min_latitude: float,
+        min_longitude: float,
+        max_latitude: float,
+        max_longitude: float
+    ) -> list[int]:
+        """Returns the ids of the points inside the bounding box."""
+        min_row, min_col = self._cell(min_latitude, min_longitude)
+        max_row, max_col = self._cell(max_latitude, max_longitude)
+        if (max_row - min_row + 1) * (max_col - min_col + 1) <= len(self._cells):
+            buckets = (
+                self._cells.get((row, col), ())
+                for row in range(min_row, max_row + 1)
+                for col in range(min_col, max_col + 1)
+            )
+        else:
+            buckets = (
+                bucket
+                for (row, col), bucket in self._cells.items()
+                if min_row <= row <= max_row and min_col <= col <= max_col
+            )
+        ids = []
+        for bucket in buckets:
+            for id in bucket:
+                latitude, longitude = self._points[id]
+                if min_latitude <= latitude <= max_latitude and min_longitude <= longitude <= max_longitude:
+                    ids.append(id)
+        return ids
+
+    def _ring(self, center: tuple[int, int], radius: int) -> Iterable[tuple[int, int]]:
+        row, col = center
+        if radius == 0:
+            yield center
+            return
+        for c in range(col - radius, col + radius + 1):
+            yield row - radius, c
+            yield row + radius, c
+        for r in range(row - radius + 1, row + radius):
+            yield r, col - radius
+            yield r, col + radius
+
+    def nearest(
+        self,
+        latitude: float,
+        longitude: float,
+        limit: int = 10,
+        radius_km: float | None = None
+    ) -> list[tuple[int, float]]:
+        """
+        Returns up to `limit` (id, distance_km) pairs sorted by distance,
+        optionally restricted to points within `radius_km`.
+        """
+        if limit <= 0 or not self._points:
+            return []
+
+        # Max-heap of the best candidates so far, stored as (-distance, id)
+        best: list[tuple[float, int]] = []
+
+        def consider(id: int) -> None:
+            point_latitude, point_longitude = self._points[id]
+            distance = haversine_km(latitude, longitude, point_latitude, point_longitude)
+            if radius_km is not None and distance > radius_km:
+                return
+            if len(best) < limit:
+                heapq.heappush(best, (-distance, id))
+            elif distance < -best[0][0]:
+                heapq.heapreplace(best, (-distance, id))
+
+        center = self._cell(latitude, longitude)
+        radius = 0
+        while True:
+            if (2 * radius + 1) ** 2 > len(self._cells):
+                # Sparse area: walking more (mostly empty) rings would cost more
+                # than scanning the occupied cells that were not visited yet.
+                for (row, col), bucket in self._cells.items():
+                    if abs(row - center[0]) >= radius or abs(col - center[1]) >= radius:
+                        for id in bucket:
+                            consider(id)
+                break
+
+            for cell in self._ring(center, radius):
+                for id in self._cells.get(cell, ()):
+                    consider(id)
+
+            bound = square_lower_bound_km(latitude, radius * self.cell_size)
+            if radius_km is not None and bound > radius_km:
+                break
+            if len(best) == limit and bound >= -best[0][0]:
+                break
+            radius += 1
+
+        return [(id, -distance) for distance, id in sorted(best, reverse=True)]
+
+
+class VaccineGridIndexes:
+    """
+    One GridIndex per vaccine, holding only the points that offer it.
+
+    Coordinates are read from the points index, so a point that moves or
+    loses its coordinates must be refreshed with `update_point`.
+    """
+
+    def __init__(self, points: GridIndex):
+        self.points = points
+        self._by_vaccine: dict[int, GridIndex] = {}
+        self._vaccines_by_point: dict[int, set[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._by_vaccine)
+
+    def _place(self, vaccination_point_id: int, vaccine_id: int) -> None:
+        coordinates = self.points.get(vaccination_point_id)
+        if coordinates is not None:
+            grid = self._by_vaccine.setdefault(vaccine_id, GridIndex(self.points.cell_size))
+            grid.add(vaccination_point_id, *coordinates)
+        else:
+            self._unplace(vaccination_point_id, vaccine_id)
+
+    def _unplace(self, vaccination_point_id: int, vaccine_id: int) -> None:
+        grid = self._by_vaccine.get(vaccine_id)
+        if grid is not None:
+            grid.remove(vaccination_point_id)
+            if not len(grid):
+                del self._by_vaccine[vaccine_id]
+
+    def add(self, vaccination_point_id: int, vaccine_id: int) -> None:
+        self._vaccines_by_point.setdefault(vaccination_point_id, set()).add(vaccine_id)
+        self._place(vaccination_point_id, vaccine_id)
+
+    def remove(self, vaccination_point_id: int, vaccine_id: int) -> None:
+        vaccines = self._vaccines_by_point.get(vaccination_point_id)
+        if vaccines is not None:
+            vaccines.discard(vaccine_id)
+            if not vaccines:
+                del self._vaccines_by_point[vaccination_point_id]
+        self._unplace(vaccination_point_id, vaccine_id)
+
+    def update_point(self, vaccination_point_id: int) -> None:
+        for vaccine_id in self._vaccines_by_point.get(vaccination_point_id, ()):
+            self._place(vaccination_point_id, vaccine_id)
+
+    def remove_point(self, vaccination_point_id: int) -> None:
+        for vaccine_id in list(self._vaccines_by_point.get(vaccination_point_id, ())):
+            self.remove(vaccination_point_id, vaccine_id)
+
+    def remove_vaccine(self, vaccine_id: int) -> None:
+        self._by_vaccine.pop(vaccine_id, None)
+        for vaccines in self._vaccines_by_point.values():
+            vaccines.discard(vaccine_id)
+        self._vaccines_by_point = {
+            point_id: vaccines
+            for point_id, vaccines in self._vaccines_by_point.items()
+            if vaccines
+        }
+
+    def refresh_points(self) -> None:
+        """Places every point again at its coordinates in the points index, once rebuilt."""
+        for vaccination_point_id in list(self._vaccines_by_point):
+            self.update_point(vaccination_point_id)
+
+    def retain_vaccines(self, vaccine_ids: Container[int]) -> None:
+        """Drops the vaccines that are not in `vaccine_ids`, such as deleted ones."""
+        known = set(self._by_vaccine).union(*self._vaccines_by_point.values())
+        for vaccine_id in known:
+            if vaccine_id not in vaccine_ids:
+                self.remove_vaccine(vaccine_id)
+
+    def clear(self) -> None:
+        self._by_vaccine.clear()
+        self._vaccines_by_point.clear()
+
+    def rebuild(self, relations: Iterable[tuple[int, int]]) -> None:
+        """Replaces the whole content from (vaccination_point_id, vaccine_id) pairs."""
+        self.clear()
+        for vaccination_point_id, vaccine_id in relations:
+            self.add(vaccination_point_id, vaccine_id)
+
+    def get(self, vaccine_id: int) -> GridIndex | None:
+        return self._by_vaccine.get(vaccine_id)
+
+    def nearest(
+        self,
+        vaccine_id: int,
+        latitude: float,
+        longitude: float,
+        limit: int = 10,
+        radius_km: float | None = None
+    ) -> list[tuple[int, float]]:
+        grid = self.get(vaccine_id)
+        if grid is None:
+            return []
+        return grid.nearest(latitude, longitude, limit=limit, radius_km=radius_km)
+
+
+vaccination_point_index = GridIndex()
+vaccine_point_indexes = VaccineGridIndexes(vaccination_point_index)
@@ -1,7 +1,7 @@
 from pathlib import Path
 from sqlalchemy import create_engine
-from app.models import Base
 from app.database import DATABASE_URL
+from app.migrations.runner import run_migrations
 from app.repositories.countries import CountryRepository
 from app.repositories.states import StateRepository
 from app.repositories.cities import CityRepository
@@ -31,9 +31,9 @@ def init_database():
         os.makedirs("data", exist_ok=True)
         
     engine = create_engine(DATABASE_URL)
-    logger.info("Creating tables...")
-    Base.metadata.create_all(engine)
-    logger.info("All tables created successfully!")
+    logger.info("Applying migrations...")
+    applied = run_migrations(engine)
+    logger.info(f"{len(applied)} migrations applied, the database is up to date!")
 
 async def load_json_data():
     await database.connect()
@@ -11,28 +11,96 @@ It is responsible for:
 Here all parts of the application are united in a single entry point.
 """
 
+import asyncio
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from typing import Iterable
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from app.database import database
+from app.pool import PoolTimeoutError, instrument_pool, pool_metrics
+from app.repositories.vaccination_points import VaccinationPointRepository
+from app.repositories.vaccination_point_vaccines import VaccinationPointVaccineRepository
+from app.repositories.cities import CityRepository
+from app.repositories.vaccines import VaccineRepository
+from app.repositories.table_versions import TableVersionRepository
+from app.versions import VERSIONED_TABLES, table_versions
+from app.indexes.spatial import vaccine_point_indexes
+from app.reference_data import reference_data
+from app.repositories.reference_data import REFERENCE_MODELS
+from app.cache import query_cache
+from app.cache_backends import response_backend
+from app.compression import CompressionMiddleware
+from app.sqlite import ReadRoutingMiddleware
 from app.controllers import (
     countries, 
     states,
     cities,
     vaccination_points,
-    vaccines
+    vaccines,
+    autocomplete,
+    metrics
 )
 from app.config import limiter, logger, settings
 from slowapi.errors import RateLimitExceeded
 from slowapi import _rate_limit_exceeded_handler
 
+async def load_in_memory_state(tables: Iterable[str] = VERSIONED_TABLES):
+    """Builds the in-memory state derived from `tables`, at startup or after another worker wrote to them."""
+    tables = set(tables)
+    reference_tables = [table for table in REFERENCE_MODELS if table in tables]
+    if reference_tables:
+        logger.info("Loading the reference data snapshot...")
+        snapshot = await reference_data.reload(database, reference_tables)
+        logger.info(
+            f"Reference data loaded with {len(snapshot.countries.by_id)} countries, "
+            f"{len(snapshot.states.by_id)} states, {len(snapshot.cities.by_id)} cities "
+            f"and {len(snapshot.vaccines.by_id)} vaccines!"
+        )
+    if "vaccination_points" in tables:
+        logger.info("Building the vaccination points indexes...")
+        indexed = await VaccinationPointRepository(database).rebuild_indexes()
+        logger.info(f"Spatial, schedule and name indexes built with {indexed} points!")
+    if "vaccination_point_vaccines" in tables:
+        indexed = await VaccinationPointVaccineRepository(database).rebuild_spatial_indexes()
+        logger.info(f"Per-vaccine spatial indexes built for {indexed} vaccines!")
+    elif "vaccination_points" in tables:
+        # Same pairs: only the coordinates of the points may have changed
+        vaccine_point_indexes.refresh_points()
+    if "vaccines" in tables:
+        vaccine_point_indexes.retain_vaccines(reference_data.snapshot.vaccines.by_id)
+    if tables & {"cities", "vaccines"}:
+        logger.info("Building the autocomplete indexes...")
+        cities_indexed = await CityRepository(database).rebuild_name_index() if "cities" in tables else 0
+        vaccines_indexed = await VaccineRepository(database).rebuild_name_index() if "vaccines" in tables else 0
+        logger.info(f"Autocomplete indexes built with {cities_indexed} cities and {vaccines_indexed} vaccines!")
+
+async def on_remote_write(tables: tuple[str, ...]):
+    # Another worker wrote to `tables`: drop what this one derived from them
+    logger.info(f"Write to {', '.join(tables)} announced by another worker")
+    query_cache.invalidate(*tables)
+    await table_versions.bump(*tables, remote=True)
+    await load_in_memory_state(tables)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    listener = None
     try:
         logger.info("Connecting to the database...")
         await database.connect()
+        instrument_pool(database, pool_metrics)
         logger.info("Connection established successfully!")
+        await load_in_memory_state()
+        last_created = await TableVersionRepository(database).get_last_created(VERSIONED_TABLES)
+        for table, created_at in last_created.items():
+            table_versions.seed_last_modified(table, created_at)
+        logger.info(f"Listening to writes of other workers through the {response_backend.name} cache backend...")
+        listener = asyncio.create_task(response_backend.listen(on_remote_write))
         yield
     finally:
+        if listener is not None:
+            listener.cancel()
+            await asyncio.gather(listener, return_exceptions=True)
+        await response_backend.close()
         logger.info("Disconnecting from the database...")
         await database.disconnect()
         logger.info("Connection closed!")
@@ -48,7 +116,8 @@ app = FastAPI(
     * Gerenciamento de vacinas disponíveis
     * Relacionamento entre pontos de vacinação e vacinas
     
-    Todos os endpoints possuem rate limiting de 10 requisições por minuto.
+    Todos os endpoints possuem rate limiting de 10 requisições por minuto, exceto o
+    autocompletar, limitado a 120 requisições por minuto.
     
     Todos os dados são fictícios.
     """,
@@ -84,6 +153,14 @@ app = FastAPI(
         {
             "name": "Vacinas",
             "description": "Gerenciamento de vacinas"
+        },
+        {
+            "name": "Autocompletar",
+            "description": "Sugestões de nomes para campos de busca"
+        },
+        {
+            "name": "Monitoramento",
+            "description": "Métricas internas da aplicação"
         }
     ]
 )
@@ -92,9 +169,27 @@ app = FastAPI(
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
+@app.exception_handler(PoolTimeoutError)
+async def pool_timeout_handler(request: Request, exc: PoolTimeoutError):
+    # Every connection of the pool stayed busy for DB_POOL_ACQUIRE_TIMEOUT seconds
+    logger.warning(str(exc))
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Serviço sobrecarregado. Tente novamente em instantes."},
+        headers={"Retry-After": "1"}
+    )
+
+# Response compression (gzip or brotli, as accepted by the client)
+app.add_middleware(CompressionMiddleware)
+
+# Queries of GET requests on the read connections (SQLite performance profile only)
+app.add_middleware(ReadRoutingMiddleware)
+
 # Routes
 app.include_router(countries.router)
 app.include_router(states.router)
 app.include_router(cities.router)
 app.include_router(vaccination_points.router)
 app.include_router(vaccines.router)
+app.include_router(autocomplete.router)
+app.include_router(metrics.router)
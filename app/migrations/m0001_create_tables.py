@@ -0,0 +1,13 @@
+"""
+Creates the tables declared in app/models.py that the database lacks.
+
+This is the state `init_db` used to reach with `create_all`; the tables
+that already exist are left as they are, for the next migrations.
+"""
+
+from sqlalchemy import Connection
+from app.models import Base
+
+
+def upgrade(connection: Connection) -> None:
+    Base.metadata.create_all(connection)
@@ -0,0 +1,11 @@
+"""
+Adds the normalized `search_name` columns and the name search structures:
+pg_trgm GIN indexes on PostgreSQL, FTS5 trigram tables on SQLite.
+"""
+
+from sqlalchemy import Connection
+from app.search import install_search
+
+
+def upgrade(connection: Connection) -> None:
+    install_search(connection)
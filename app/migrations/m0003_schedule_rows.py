@@ -0,0 +1,23 @@
+"""
+Fills vaccination_point_schedules for the points created before the
+table existed, from their JSON `schedules` column.
+"""
+
+from sqlalchemy import Connection, insert, select
+from app.models import VaccinationPoint, VaccinationPointSchedule
+from app.indexes.schedules import schedule_rows
+
+
+def upgrade(connection: Connection) -> None:
+    points = connection.execute(
+        select(VaccinationPoint.id, VaccinationPoint.schedules).where(
+            VaccinationPoint.id.not_in(select(VaccinationPointSchedule.vaccination_point_id))
+        )
+    ).all()
+    rows = [
+        {"vaccination_point_id": point.id, **row}
+        for point in points
+        for row in schedule_rows(point.schedules)
+    ]
+    if rows:
+        connection.execute(insert(VaccinationPointSchedule), rows)
@@ -0,0 +1,23 @@
+"""
+Indexes the foreign keys looked up by the list and join endpoints, which
+otherwise scan the whole table: the cities of a state, the points of a
+city, the states of a country (also read by its cascading delete) and
+the points of a vaccine.
+
+The vaccines of a point are served by the unique index of the next migration.
+"""
+
+from sqlalchemy import Connection, text
+
+STATEMENTS = (
+    "CREATE INDEX IF NOT EXISTS ix_states_country_id ON states (country_id)",
+    "CREATE INDEX IF NOT EXISTS ix_cities_state_id ON cities (state_id)",
+    "CREATE INDEX IF NOT EXISTS ix_vaccination_points_city_id ON vaccination_points (city_id)",
+    """CREATE INDEX IF NOT EXISTS ix_vaccination_point_vaccines_vaccine_point
+        ON vaccination_point_vaccines (vaccine_id, vaccination_point_id)""",
+)
+
+
+def upgrade(connection: Connection) -> None:
+    for statement in STATEMENTS:
+        connection.execute(text(statement))
@@ -0,0 +1,23 @@
+"""
+Makes (vaccination_point_id, vaccine_id) unique in vaccination_point_vaccines.
+
+Duplicated pairs are removed first, keeping the oldest row. A unique index
+is used instead of a constraint, since SQLite cannot add constraints to an
+existing table; it also serves the vaccines of a point.
+"""
+
+from sqlalchemy import Connection, text
+
+
+def upgrade(connection: Connection) -> None:
+    connection.execute(text("""
+        DELETE FROM vaccination_point_vaccines
+        WHERE id NOT IN (
+            SELECT MIN(id) FROM vaccination_point_vaccines
+            GROUP BY vaccination_point_id, vaccine_id
+        )
+    """))
+    connection.execute(text("""
+        CREATE UNIQUE INDEX IF NOT EXISTS uq_vaccination_point_vaccines_point_vaccine
+        ON vaccination_point_vaccines (vaccination_point_id, vaccine_id)
+    """))
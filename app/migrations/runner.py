@@ -0,0 +1,87 @@
+"""
+Versioned schema migrations.
+
+This module applies the migrations of this package to PostgreSQL and
+SQLite databases. It is responsible for:
+- Recording the applied versions in the `schema_migrations` table
+- Applying the pending migrations in order, each in its own transaction
+- Serializing concurrent runs on PostgreSQL with an advisory lock
+
+Each migration is a module with an `upgrade(connection)` function, listed
+in MIGRATIONS with its version. Migrations must be safe to apply to a
+database created from the current models, which already has their
+structures (hence the IF NOT EXISTS).
+
+Usage: poetry run python -m app.migrations.runner
+"""
+
+from sqlalchemy import (
+    TIMESTAMP,
+    Column,
+    Engine,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    create_engine,
+    func,
+    insert,
+    select,
+    text
+)
+from app.config import logger
+from app.database import DATABASE_URL
+from app.migrations import (
+    m0001_create_tables,
+    m0002_name_search,
+    m0003_schedule_rows,
+    m0004_foreign_key_indexes,
+    m0005_unique_vaccination_point_vaccines
+)
+
+MIGRATIONS = (
+    (1, m0001_create_tables),
+    (2, m0002_name_search),
+    (3, m0003_schedule_rows),
+    (4, m0004_foreign_key_indexes),
+    (5, m0005_unique_vaccination_point_vaccines),
+)
+
+# Key of the PostgreSQL advisory lock held while applying a migration
+MIGRATIONS_LOCK_KEY = 724_310_001
+
+schema_migrations = Table(
+    "schema_migrations",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", TIMESTAMP, server_default=func.now())
+)
+
+
+def run_migrations(engine: Engine) -> list[str]:
+    """Applies the pending migrations in order and returns their names."""
+    applied = []
+    for version, migration in MIGRATIONS:
+        name = migration.__name__.rsplit(".", 1)[-1]
+        with engine.begin() as connection:
+            if connection.dialect.name == "postgresql":
+                # Another instance starting at the same time waits here
+                connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATIONS_LOCK_KEY})
+            # Under the lock: two first runs would both try to create it
+            schema_migrations.create(connection, checkfirst=True)
+            done = connection.scalar(
+                select(schema_migrations.c.version).where(schema_migrations.c.version == version)
+            )
+            if done is not None:
+                continue
+            logger.info(f"Applying migration {name}...")
+            migration.upgrade(connection)
+            connection.execute(insert(schema_migrations).values(version=version, name=name))
+        applied.append(name)
+    return applied
+
+
+if __name__ == "__main__":
+    applied = run_migrations(create_engine(DATABASE_URL))
+    logger.info(f"{len(applied)} migrations applied" if applied else "The database is up to date")
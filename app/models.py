@@ -1,7 +1,7 @@
-from sqlalchemy import JSON, Float, Column, ForeignKey, Integer, String, TIMESTAMP
+from sqlalchemy import JSON, Float, Column, ForeignKey, Index, Integer, String, TIMESTAMP
 # from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship, declarative_base
+from sqlalchemy.orm import relationship, declarative_base, deferred
 from app.database import metadata
 
 Base = declarative_base(metadata=metadata)
@@ -40,6 +40,7 @@ class Country(Base):
 
     id = Column(Integer, primary_key=True, autoincrement=True, comment="ID único do país")
     name = Column(String, nullable=False, comment="Nome do país")
+    search_name = deferred(Column(String, nullable=True, comment="Nome sem acentos e em minúsculas, usado na busca"))
     ibge_code = Column(String, nullable=True, unique=True, comment="Código IBGE do país")
     created_at = Column(TIMESTAMP, server_default=func.now(), comment="Data de criação do registro")
 
@@ -50,8 +51,9 @@ class State(Base):
     __tablename__ = "states"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    country_id = Column(Integer, ForeignKey('countries.id', ondelete='CASCADE'), nullable=False)
+    country_id = Column(Integer, ForeignKey('countries.id', ondelete='CASCADE'), nullable=False, index=True)
     name = Column(String, nullable=False)
+    search_name = deferred(Column(String, nullable=True))
     ibge_code = Column(String, nullable=True, unique=True)
     created_at = Column(TIMESTAMP, server_default=func.now())
 
@@ -62,8 +64,9 @@ class City(Base):
     __tablename__ = "cities"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    state_id = Column(Integer, ForeignKey('states.id'), nullable=False)
+    state_id = Column(Integer, ForeignKey('states.id'), nullable=False, index=True)
     name = Column(String, nullable=False)
+    search_name = deferred(Column(String, nullable=True))
     ibge_code = Column(String, nullable=True, unique=True)
     created_at = Column(TIMESTAMP, server_default=func.now())
 
@@ -72,8 +75,9 @@ class VaccinationPoint(Base):
     __tablename__ = "vaccination_points"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    city_id = Column(Integer, ForeignKey('cities.id'), nullable=False)
+    city_id = Column(Integer, ForeignKey('cities.id'), nullable=False, index=True)
     name = Column(String, nullable=False)
+    search_name = deferred(Column(String, nullable=True))
     schedules = Column(JSON, nullable=True)
     full_address = Column(String, nullable=True)
     neighborhood = Column(String, nullable=True)
@@ -84,6 +88,25 @@ class VaccinationPoint(Base):
     latitude = Column(Float, nullable=True)
     longitude = Column(Float, nullable=True)
     created_at = Column(TIMESTAMP, server_default=func.now())
+
+
+class VaccinationPointSchedule(Base):
+    """Horário de funcionamento normalizado de um ponto de vacinação (espelha a coluna JSON schedules)"""
+    __tablename__ = "vaccination_point_schedules"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    vaccination_point_id = Column(Integer, ForeignKey('vaccination_points.id', ondelete='CASCADE'), nullable=False)
+    weekday = Column(Integer, nullable=False, comment="Dia da semana (0 = segunda-feira)")
+    start_minute = Column(Integer, nullable=False, comment="Minuto do dia em que o ponto abre")
+    end_minute = Column(Integer, nullable=False, comment="Minuto do dia em que o ponto fecha (exclusivo)")
+
+    __table_args__ = (
+        Index("ix_vaccination_point_schedules_weekday_start_end", "weekday", "start_minute", "end_minute"),
+        Index(
+            "ix_vaccination_point_schedules_point_weekday",
+            "vaccination_point_id", "weekday", "start_minute", "end_minute"
+        ),
+    )
     
     
 class Vaccine(Base):
@@ -91,6 +114,7 @@ class Vaccine(Base):
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(String, nullable=False)
+    search_name = deferred(Column(String, nullable=True))
     created_at = Column(TIMESTAMP, server_default=func.now())
     
 class VaccinationPointVaccine(Base):
@@ -101,3 +125,13 @@ class VaccinationPointVaccine(Base):
     vaccine_id = Column(Integer, ForeignKey('vaccines.id'), nullable=False)
     created_at = Column(TIMESTAMP, server_default=func.now())
 
+    __table_args__ = (
+        # Each vaccine once per point; also the index of the vaccines of a point
+        Index(
+            "uq_vaccination_point_vaccines_point_vaccine",
+            "vaccination_point_id", "vaccine_id",
+            unique=True
+        ),
+        Index("ix_vaccination_point_vaccines_vaccine_point", "vaccine_id", "vaccination_point_id"),
+    )
+
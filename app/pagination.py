@@ -0,0 +1,171 @@
+"""
+Keyset (cursor) pagination of the list endpoints.
+
+This module contains the helpers that page the list queries by a sort
+key. It is responsible for:
+- Encoding and decoding opaque cursors holding the key of the last row
+- Pushing the page down into the SELECT: WHERE key > :cursor ORDER BY key LIMIT :n
+- Telling whether a page is the last one, by reading one row past its end
+- Reading the next cursor apart when its key is not returned with the rows
+  (the rank of a name search)
+- Streaming a page as it is read, with its next cursor known beforehand
+
+The WHERE clause lets the database seek straight to the page through the
+index of the key, so deep pages cost the same as the first one, unlike an
+OFFSET that reads and discards all the rows before the page.
+"""
+
+import base64
+import binascii
+import json
+import math
+from typing import Any, AsyncIterator, Sequence
+from databases import Database
+from fastapi import HTTPException
+from sqlalchemy import Select, tuple_
+from app.config import settings
+
+
+class Page(list):
+    """
+    Rows of one page; `next_cursor` points after its last row, None on the
+    last page. `total_count` counts the rows of all pages, when requested.
+    """
+
+    def __init__(
+        self,
+        rows: Sequence[Any] = (),
+        next_cursor: str | None = None,
+        total_count: int | None = None,
+        count_estimated: bool = False
+    ):
+        super().__init__(rows)
+        self.next_cursor = next_cursor
+        self.total_count = total_count
+        self.count_estimated = count_estimated
+
+    def metadata(self) -> dict[str, Any]:
+        """Everything but the rows, to store a page next to its encoded body."""
+        return {
+            "next_cursor": self.next_cursor,
+            "total_count": self.total_count,
+            "count_estimated": self.count_estimated
+        }
+
+
+class Stream:
+    """
+    Rows of a page read from the database as they are consumed. Its
+    `next_cursor` is known before the first row, so it can go in the headers.
+    """
+
+    total_count = None
+    count_estimated = False
+
+    def __init__(self, rows: AsyncIterator[Any], next_cursor: str | None = None):
+        self.rows = rows
+        self.next_cursor = next_cursor
+
+    def __aiter__(self) -> AsyncIterator[Any]:
+        return self.rows.__aiter__()
+
+
+def encode_cursor(key: Sequence[Any]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(key), separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def decode_cursor(cursor: str | None, size: int, ranked: bool = False) -> tuple | None:
+    """
+    Key held by `cursor`, which must have `size` integer values, preceded by
+    the rank of a name search when `ranked`. Raises 400 for a malformed cursor.
+    """
+    if not cursor:
+        return None
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        key = None
+    # The sort keys are ids, and ranks are numbers: anything else would reach
+    # the query (or the cache key) as it is
+    ranks = 1 if ranked else 0
+    if (
+        not isinstance(key, list)
+        or len(key) != size + ranks
+        or not all(_is_number(value) for value in key[:ranks])
+        or not all(isinstance(value, int) and not isinstance(value, bool) for value in key[ranks:])
+    ):
+        raise HTTPException(status_code=400, detail="Cursor de paginação inválido")
+    return tuple(key)
+
+
+def page_size(limit: int | None) -> int:
+    """Size of a page: `limit`, or PAGE_SIZE_DEFAULT, never above PAGE_SIZE_MAX."""
+    return min(limit or settings.PAGE_SIZE_DEFAULT, settings.PAGE_SIZE_MAX)
+
+
+def with_keys(fields: tuple[str, ...] | None, keys: Sequence[str], available: tuple[str, ...]) -> tuple[str, ...] | None:
+    """Adds the sort key to a sparse fieldset, since the next cursor is read from it."""
+    if fields is None:
+        return None
+    return tuple(field for field in available if field in fields or field in keys)
+
+
+def keyset(query: Select, keys: Sequence[Any], after: tuple | None, limit: int | None, lookahead: bool = True) -> Select:
+    """
+    Orders `query` by the `keys` columns and restricts it to the rows after
+    the key `after`, `limit` at most. With `lookahead`, one more row is read
+    to know whether another page follows. Without `after` and `limit`, the
+    query is left as it is.
+    """
+    if after is None and limit is None:
+        return query
+    query = query.order_by(None).order_by(*keys)
+    if after is not None:
+        query = query.where(keys[0] > after[0] if len(keys) == 1 else tuple_(*keys) > tuple_(*after))
+    if limit is not None:
+        query = query.limit(limit + 1 if lookahead else limit)
+    return query
+
+
+def page(rows: Sequence[Any], keys: Sequence[Any], limit: int | None) -> Page:
+    """Page of the rows read by a `keyset` query with lookahead."""
+    if limit is None or len(rows) <= limit:
+        return Page(rows)
+    rows = rows[:limit]
+    last = rows[-1]
+    return Page(rows, encode_cursor([getattr(last, key.key) for key in keys]))
+
+
+async def next_cursor(database: Database, query: Select, keys: Sequence[Any], after: tuple | None, limit: int | None) -> str | None:
+    """Cursor of the page after a `keyset` page, read by a query selecting only the keys, with lookahead."""
+    if limit is None:
+        return None
+    rows = await database.fetch_all(keyset(query.with_only_columns(*keys), keys, after, limit))
+    return page(rows, keys, limit).next_cursor
+
+
+async def fetch_page(database: Database, query: Select, keys: Sequence[Any], after: tuple | None, limit: int | None) -> Page:
+    """
+    Page of `query` read by `keys`. When the rows do not carry every key (the
+    rank of a name search is left out of the response), the next cursor is
+    read by `next_cursor`, only if another page follows.
+    """
+    rows = await database.fetch_all(keyset(query, keys, after, limit))
+    if all(key.key in query.selected_columns for key in keys):
+        return page(rows, keys, limit)
+    if limit is None or len(rows) <= limit:
+        return Page(rows)
+    return Page(rows[:limit], await next_cursor(database, query, keys, after, limit))
+
+
+async def stream(database: Database, query: Select, keys: Sequence[Any], after: tuple | None, limit: int | None) -> Stream:
+    """
+    Stream of the rows of a `keyset` page. With `limit`, the next cursor is
+    first read by `next_cursor`.
+    """
+    cursor = await next_cursor(database, query, keys, after, limit)
+    return Stream(database.iterate(keyset(query, keys, after, limit, lookahead=False)), cursor)
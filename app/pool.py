@@ -0,0 +1,119 @@
+"""
+Database connection pool metrics.
+
+This module contains the instrumentation of the connection pool of the
+`databases` engine. It is responsible for:
+- Bounding the wait for a free connection (DB_POOL_ACQUIRE_TIMEOUT)
+- Counting the connections in use and the requests waiting for one
+- Measuring the time spent waiting and the acquire timeouts
+
+With these numbers the pool can be sized against the number of uvicorn
+workers: each worker holds up to DB_POOL_MAX_SIZE connections.
+"""
+
+import asyncio
+import time
+from typing import Any, Dict
+from databases import Database
+from app.config import settings
+
+
+class PoolTimeoutError(Exception):
+    """No connection of the pool became free within the acquire timeout."""
+
+
+class PoolMetrics:
+    def __init__(self):
+        self.pool: Any = None
+        self.in_use = 0
+        self.max_in_use = 0
+        self.waiting = 0
+        self.acquisitions = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def record_wait(self, seconds: float) -> None:
+        self.wait_seconds += seconds
+        self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+
+    def stats(self) -> Dict:
+        waits = self.acquisitions + self.timeouts
+        stats = {
+            "in_use": self.in_use,
+            "max_in_use": self.max_in_use,
+            "waiting": self.waiting,
+            "acquisitions": self.acquisitions,
+            "timeouts": self.timeouts,
+            "wait_ms_total": round(self.wait_seconds * 1000, 3),
+            "wait_ms_avg": round(self.wait_seconds * 1000 / waits, 3) if waits else 0.0,
+            "wait_ms_max": round(self.max_wait_seconds * 1000, 3)
+        }
+        # Only the pools of asyncpg and of the SQLite performance profile keep connections open
+        if hasattr(self.pool, "get_size"):
+            stats.update({
+                "size": self.pool.get_size(),
+                "idle": self.pool.get_idle_size(),
+                "min_size": self.pool.get_min_size(),
+                "max_size": self.pool.get_max_size()
+            })
+        return stats
+
+
+class InstrumentedPool:
+    """Wraps the pool of a `databases` backend, timing and counting its acquisitions."""
+
+    def __init__(self, pool: Any, metrics: PoolMetrics, acquire_timeout: float | None):
+        self._pool = pool
+        self.metrics = metrics
+        self.acquire_timeout = acquire_timeout
+        metrics.pool = pool
+
+    async def acquire(self) -> Any:
+        metrics = self.metrics
+        metrics.waiting += 1
+        started = time.perf_counter()
+        try:
+            if self.acquire_timeout:
+                connection = await asyncio.wait_for(self._pool.acquire(), self.acquire_timeout)
+            else:
+                connection = await self._pool.acquire()
+        except asyncio.TimeoutError:
+            metrics.timeouts += 1
+            raise PoolTimeoutError(
+                f"No database connection became free within {self.acquire_timeout} seconds"
+            ) from None
+        finally:
+            metrics.waiting -= 1
+            metrics.record_wait(time.perf_counter() - started)
+        metrics.acquisitions += 1
+        metrics.in_use += 1
+        metrics.max_in_use = max(metrics.max_in_use, metrics.in_use)
+        return connection
+
+    async def release(self, connection: Any, *args, **kwargs) -> Any:
+        try:
+            return await self._pool.release(connection, *args, **kwargs)
+        finally:
+            self.metrics.in_use -= 1
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._pool, name)
+
+
+def instrument_pool(
+    database: Database,
+    metrics: PoolMetrics,
+    acquire_timeout: float | None = settings.DB_POOL_ACQUIRE_TIMEOUT
+) -> None:
+    """
+    Wraps the pool of the connected `database`. Must run right after
+    `database.connect()`, before any connection is opened: the backends
+    read their private `_pool` when acquiring.
+    """
+    backend = database._backend
+    if not isinstance(backend._pool, InstrumentedPool):
+        backend._pool = InstrumentedPool(backend._pool, metrics, acquire_timeout)
+
+
+pool_metrics = PoolMetrics()
@@ -0,0 +1,97 @@
+"""
+Immutable snapshot of the reference tables.
+
+This module keeps countries, states, cities and vaccines in memory for
+the existence checks of the services. It is responsible for:
+- Loading the tables into a frozen snapshot indexed by id and ibge_code
+- Rebuilding the written tables after every write, once a snapshot is loaded
+- Swapping the new snapshot in with a single assignment
+- Confirming in the database the ids missing from the snapshot, and
+  remembering for a short time the ones not found there either
+
+Readers take `reference_data.snapshot` once and never wait: a snapshot is
+never mutated, rebuilds are serialized and only replace the reference.
+With the memory cache backend, the snapshot of a worker does not see the
+writes of the others: rows found by `contains` reload their table.
+"""
+
+import asyncio
+from dataclasses import dataclass, field, replace
+from types import MappingProxyType
+from typing import Any, Iterable, Mapping
+from databases import Database
+from app.cache import QueryCache, missing_ids
+from app.repositories.reference_data import REFERENCE_MODELS, ReferenceDataRepository
+
+
+@dataclass(frozen=True)
+class ReferenceTable:
+    by_id: Mapping[int, Any] = field(default_factory=lambda: MappingProxyType({}))
+    by_ibge_code: Mapping[str, Any] = field(default_factory=lambda: MappingProxyType({}))
+
+    @classmethod
+    def from_rows(cls, rows: Iterable) -> "ReferenceTable":
+        rows = list(rows)
+        return cls(
+            by_id=MappingProxyType({row.id: row for row in rows}),
+            by_ibge_code=MappingProxyType({
+                row.ibge_code: row
+                for row in rows
+                if getattr(row, "ibge_code", None) is not None
+            })
+        )
+
+
+@dataclass(frozen=True)
+class ReferenceSnapshot:
+    countries: ReferenceTable = field(default_factory=ReferenceTable)
+    states: ReferenceTable = field(default_factory=ReferenceTable)
+    cities: ReferenceTable = field(default_factory=ReferenceTable)
+    vaccines: ReferenceTable = field(default_factory=ReferenceTable)
+
+
+class ReferenceData:
+    def __init__(self, missing: QueryCache = missing_ids):
+        self.snapshot = ReferenceSnapshot()
+        self.loaded = False
+        self.missing = missing
+        self._lock = asyncio.Lock()
+
+    async def reload(self, database: Database, tables: Iterable[str] = tuple(REFERENCE_MODELS)) -> ReferenceSnapshot:
+        """Reads `tables` again and swaps in a snapshot that shares the other tables."""
+        # Serialized so that the last rebuild to finish is also the last to start
+        async with self._lock:
+            rows = await ReferenceDataRepository(database).get_tables(tables)
+            self.snapshot = replace(self.snapshot, **{
+                name: ReferenceTable.from_rows(table_rows) for name, table_rows in rows.items()
+            })
+            self.loaded = True
+        return self.snapshot
+
+    async def contains(self, database: Database, table: str, id: int) -> bool:
+        """
+        Whether row `id` of `table` exists, asking the database when the
+        snapshot does not have it. The ids not found there are kept in
+        `self.missing` until a write to `table`, local or announced.
+        """
+        if id in getattr(self.snapshot, table).by_id:
+            return True
+        key = (table, id)
+        hit, _ = self.missing.get(key)
+        if hit:
+            return False
+        generation = self.missing.generation((table,))
+        if not await ReferenceDataRepository(database).exists(table, id):
+            self.missing.set(key, True, (table,), generation)
+            return False
+        # Created by another worker: the snapshot is behind
+        await self.refresh(database, table)
+        return True
+
+    async def refresh(self, database: Database, *tables: str) -> None:
+        """Reloads the written `tables`; a no-op until the snapshot is first loaded (e.g. in init_db)."""
+        if self.loaded:
+            await self.reload(database, tables)
+
+
+reference_data = ReferenceData()
@@ -13,33 +13,85 @@ access operations.
 from databases import Database
 from sqlalchemy import select, insert, update, delete
 from app.models import City
-from typing import List
+from app.search import apply_name_search, normalize_text
+from app.fields import model_fields, select_fields
+from app.pagination import Page, fetch_page
+from app.counters import TableCounts, table_counts
+from app.cache import QueryCache, cached, invalidates, query_cache
+from app.versions import TableVersions, table_versions
+from app.reference_data import ReferenceData, reference_data
+from app.indexes.autocomplete import PrefixIndex, city_names
 
 
 class CityRepository:   
-    def __init__(self, database: Database):
+    available_fields = model_fields(City)
+
+    def __init__(
+        self,
+        database: Database,
+        name_index: PrefixIndex = city_names,
+        cache: QueryCache = query_cache,
+        versions: TableVersions = table_versions,
+        reference_data: ReferenceData = reference_data,
+        counts: TableCounts = table_counts
+    ):
         self.database = database
+        self.name_index = name_index
+        self.cache = cache
+        self.versions = versions
+        self.reference_data = reference_data
+        self.counts = counts
 
-    async def get_all(self, id: int | None = None, name: str | None = None, ibge_code: str | None = None) -> List[City]:
-        query = select(City)
+    @cached("cities")
+    async def get_all(
+        self,
+        id: int | None = None,
+        name: str | None = None,
+        ibge_code: str | None = None,
+        fields: tuple[str, ...] | None = None,
+        after: tuple | None = None,
+        limit: int | None = None,
+        count: bool = False
+    ) -> Page:
+        query = select_fields(select(City), fields)
+        keys = (City.id,)
         
         if id is not None:
             query = query.where(City.id == id)
         if name is not None:
-            query = query.where(City.name.ilike(f"%{name}%"))
+            query, keys = apply_name_search(query, City, name, self.database.url.dialect)
         if ibge_code is not None:
             query = query.where(City.ibge_code == ibge_code)
-            
-        return await self.database.fetch_all(query)
 
+        result = await fetch_page(self.database, query, keys, after, limit)
+        if count:
+            result.total_count, result.count_estimated = await self.counts.count(self.database, query, "cities")
+        return result
+
+    @cached("cities")
     async def get_by_id(self, id: int) -> City:
         query = select(City).where(City.id == id)
         return await self.database.fetch_one(query) 
     
+    async def exists(self, id: int) -> bool:
+        """Reads the database itself: neither the cache nor the snapshot see the writes of other workers."""
+        query = select(City.id).where(City.id == id)
+        return await self.database.fetch_val(query) is not None
+
+    @cached("cities")
     async def get_by_ibge_code(self, ibge_code: str) -> City:
         query = select(City).where(City.ibge_code == ibge_code)
         return await self.database.fetch_one(query)
 
+    def autocomplete(self, prefix: str, limit: int) -> list[tuple[int, str, int]]:
+        return self.name_index.search(prefix, limit)
+
+    async def rebuild_name_index(self) -> int:
+        rows = await self.database.fetch_all(select(City.id, City.name))
+        self.name_index.rebuild((row.id, row.name) for row in rows)
+        return len(rows)
+
+    @invalidates("cities")
     async def create(
         self, 
         state_id: int,
@@ -49,21 +101,33 @@ class CityRepository:
         query = insert(City).values(
             state_id=state_id,
             name=name,
+            search_name=normalize_text(name),
             ibge_code=ibge_code
         )
-        return await self.database.execute(query)
+        last_record_id = await self.database.execute(query)
+        self.counts.add("cities", 1)
+        if last_record_id:
+            self.name_index.add(last_record_id, name)
+        return last_record_id
 
+    @invalidates("cities")
     async def update(
         self,
         id: int,
         data: dict
     ) -> bool:
+        if "name" in data:
+            data = {**data, "search_name": normalize_text(data["name"])}
+        # RETURNING tells whether the row exists: execute() returns None for an UPDATE on PostgreSQL
         query = update(City).where(
             City.id == id
-        ).values(**data)
-        result = await self.database.execute(query)
-        return result > 0
+        ).values(**data).returning(City.id)
+        updated = await self.database.fetch_one(query) is not None
+        if "name" in data and updated:
+            self.name_index.add(id, data["name"])
+        return updated
 
+    @invalidates("cities")
     async def delete(
         self,
         id: int
@@ -72,4 +136,7 @@ class CityRepository:
             City.id == id
         )
         result = await self.database.execute(query)
+        # execute() does not tell the deleted rows on every backend
+        self.counts.forget("cities")
+        self.name_index.remove(id)
         return result > 0 
\ No newline at end of file
@@ -13,33 +13,74 @@ access operations.
 from databases import Database
 from sqlalchemy import select, insert, update, delete
 from app.models import Country
-from typing import List
+from app.search import apply_name_search, normalize_text
+from app.fields import model_fields, select_fields
+from app.pagination import Page, fetch_page
+from app.counters import TableCounts, table_counts
+from app.cache import QueryCache, cached, invalidates, query_cache
+from app.versions import TableVersions, table_versions
+from app.reference_data import ReferenceData, reference_data
 
 
 class CountryRepository:   
-    def __init__(self, database: Database):
+    available_fields = model_fields(Country)
+
+    def __init__(
+        self,
+        database: Database,
+        cache: QueryCache = query_cache,
+        versions: TableVersions = table_versions,
+        reference_data: ReferenceData = reference_data,
+        counts: TableCounts = table_counts
+    ):
         self.database = database
+        self.cache = cache
+        self.versions = versions
+        self.reference_data = reference_data
+        self.counts = counts
 
-    async def get_all(self, id: int | None = None, name: str | None = None, ibge_code: str | None = None) -> List[Country]:
-        query = select(Country)
+    @cached("countries")
+    async def get_all(
+        self,
+        id: int | None = None,
+        name: str | None = None,
+        ibge_code: str | None = None,
+        fields: tuple[str, ...] | None = None,
+        after: tuple | None = None,
+        limit: int | None = None,
+        count: bool = False
+    ) -> Page:
+        query = select_fields(select(Country), fields)
+        keys = (Country.id,)
         
         if id is not None:
             query = query.where(Country.id == id)
         if name is not None:
-            query = query.where(Country.name.ilike(f"%{name}%"))
+            query, keys = apply_name_search(query, Country, name, self.database.url.dialect)
         if ibge_code is not None:
             query = query.where(Country.ibge_code == ibge_code)
-        
-        return await self.database.fetch_all(query)
 
+        result = await fetch_page(self.database, query, keys, after, limit)
+        if count:
+            result.total_count, result.count_estimated = await self.counts.count(self.database, query, "countries")
+        return result
+
+    @cached("countries")
     async def get_by_id(self, id: int) -> Country:
         query = select(Country).where(Country.id == id)
         return await self.database.fetch_one(query) 
     
+    async def exists(self, id: int) -> bool:
+        """Reads the database itself: neither the cache nor the snapshot see the writes of other workers."""
+        query = select(Country.id).where(Country.id == id)
+        return await self.database.fetch_val(query) is not None
+
+    @cached("countries")
     async def get_by_ibge_code(self, ibge_code: str) -> Country:
         query = select(Country).where(Country.ibge_code == ibge_code)
         return await self.database.fetch_one(query)
 
+    @invalidates("countries")
     async def create(
         self, 
         name: str,
@@ -47,21 +88,29 @@ class CountryRepository:
     ) -> int:
         query = insert(Country).values(
             name=name,
+            search_name=normalize_text(name),
             ibge_code=ibge_code
         )
-        return await self.database.execute(query)
+        last_record_id = await self.database.execute(query)
+        self.counts.add("countries", 1)
+        return last_record_id
 
+    @invalidates("countries")
     async def update(
         self,
         id: int,
         data: dict
     ) -> bool:
+        if "name" in data:
+            data = {**data, "search_name": normalize_text(data["name"])}
         query = update(Country).where(
             Country.id == id
         ).values(**data)
         result = await self.database.execute(query)
         return result > 0
 
+    # Deleting a country cascades to its states
+    @invalidates("countries", "states")
     async def delete(
         self,
         id: int
@@ -70,4 +119,6 @@ class CountryRepository:
             Country.id == id
         )
         result = await self.database.execute(query)
+        # execute() does not tell the deleted rows on every backend; the states go by cascade
+        self.counts.forget("countries", "states")
         return result > 0
@@ -0,0 +1,39 @@
+"""
+This module contains the repository that reads the reference tables
+(countries, states, cities and vaccines) in full.
+Repositories are responsible for:
+- Performing database operations
+- Implementing SQL queries
+- Mapping database results to models
+- Managing transactions
+
+The repository should not contain business logic, only data
+access operations.
+"""
+
+from databases import Database
+from sqlalchemy import select
+from app.models import Country, State, City, Vaccine
+from typing import Dict, Iterable, List
+
+REFERENCE_MODELS = {
+    "countries": Country,
+    "states": State,
+    "cities": City,
+    "vaccines": Vaccine
+}
+
+
+class ReferenceDataRepository:
+    def __init__(self, database: Database):
+        self.database = database
+
+    async def get_tables(self, names: Iterable[str]) -> Dict[str, List]:
+        return {
+            name: await self.database.fetch_all(select(REFERENCE_MODELS[name]))
+            for name in names
+        }
+
+    async def exists(self, name: str, id: int) -> bool:
+        model = REFERENCE_MODELS[name]
+        return await self.database.fetch_val(select(model.id).where(model.id == id)) is not None
@@ -13,33 +13,75 @@ access operations.
 from databases import Database
 from sqlalchemy import select, insert, update, delete
 from app.models import State
-from typing import List
+from app.search import apply_name_search, normalize_text
+from app.fields import model_fields, select_fields
+from app.pagination import Page, fetch_page
+from app.counters import TableCounts, table_counts
+from app.cache import QueryCache, cached, invalidates, query_cache
+from app.versions import TableVersions, table_versions
+from app.reference_data import ReferenceData, reference_data
 
 
 class StateRepository:   
-    def __init__(self, database: Database):
+    available_fields = model_fields(State)
+
+    def __init__(
+        self,
+        database: Database,
+        cache: QueryCache = query_cache,
+        versions: TableVersions = table_versions,
+        reference_data: ReferenceData = reference_data,
+        counts: TableCounts = table_counts
+    ):
         self.database = database
+        self.cache = cache
+        self.versions = versions
+        self.reference_data = reference_data
+        self.counts = counts
 
-    async def get_all(self, id: int | None = None, name: str | None = None, ibge_code: str | None = None) -> List[State]:
-        query = select(State)
+    # Deleting a country cascades to its states, so reads also depend on countries
+    @cached("states", "countries")
+    async def get_all(
+        self,
+        id: int | None = None,
+        name: str | None = None,
+        ibge_code: str | None = None,
+        fields: tuple[str, ...] | None = None,
+        after: tuple | None = None,
+        limit: int | None = None,
+        count: bool = False
+    ) -> Page:
+        query = select_fields(select(State), fields)
+        keys = (State.id,)
         
         if id is not None:
             query = query.where(State.id == id)
         if name is not None:
-            query = query.where(State.name.ilike(f"%{name}%"))
+            query, keys = apply_name_search(query, State, name, self.database.url.dialect)
         if ibge_code is not None:
             query = query.where(State.ibge_code == ibge_code)
-            
-        return await self.database.fetch_all(query)
 
+        result = await fetch_page(self.database, query, keys, after, limit)
+        if count:
+            result.total_count, result.count_estimated = await self.counts.count(self.database, query, "states")
+        return result
+
+    @cached("states", "countries")
     async def get_by_id(self, id: int) -> State:
         query = select(State).where(State.id == id)
         return await self.database.fetch_one(query) 
     
+    async def exists(self, id: int) -> bool:
+        """Reads the database itself: neither the cache nor the snapshot see the writes of other workers."""
+        query = select(State.id).where(State.id == id)
+        return await self.database.fetch_val(query) is not None
+
+    @cached("states", "countries")
     async def get_by_ibge_code(self, ibge_code: str) -> State:
         query = select(State).where(State.ibge_code == ibge_code)
         return await self.database.fetch_one(query)
 
+    @invalidates("states")
     async def create(
         self,
         country_id: int,
@@ -49,21 +91,28 @@ class StateRepository:
         query = insert(State).values(
             country_id=country_id,
             name=name,
+            search_name=normalize_text(name),
             ibge_code=ibge_code,
         )
-        return await self.database.execute(query)
+        last_record_id = await self.database.execute(query)
+        self.counts.add("states", 1)
+        return last_record_id
 
+    @invalidates("states")
     async def update(
         self,
         id: int,
         data: dict
     ) -> bool:
+        if "name" in data:
+            data = {**data, "search_name": normalize_text(data["name"])}
         query = update(State).where(
             State.id == id
         ).values(**data)
         result = await self.database.execute(query)
         return result > 0
 
+    @invalidates("states")
     async def delete(
         self,
         id: int
@@ -72,4 +121,6 @@ class StateRepository:
             State.id == id
         )
         result = await self.database.execute(query)
+        # execute() does not tell the deleted rows on every backend
+        self.counts.forget("states")
         return result > 0 
\ No newline at end of file
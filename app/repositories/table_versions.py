@@ -0,0 +1,32 @@
+"""
+This module contains the repository used to seed the table versions.
+Repositories are responsible for:
+- Performing database operations
+- Implementing SQL queries
+- Mapping database results to models
+- Managing transactions
+
+The repository should not contain business logic, only data
+access operations.
+"""
+
+from databases import Database
+from sqlalchemy import select, func
+from app.database import metadata
+from datetime import datetime
+from typing import Dict, Iterable
+
+
+class TableVersionRepository:
+    def __init__(self, database: Database):
+        self.database = database
+
+    async def get_last_created(self, tables: Iterable[str]) -> Dict[str, datetime]:
+        """Latest `created_at` of each table that has rows."""
+        last_created = {}
+        for name in tables:
+            table = metadata.tables[name]
+            value = await self.database.fetch_val(select(func.max(table.c.created_at)))
+            if value is not None:
+                last_created[name] = value
+        return last_created
@@ -3,14 +3,40 @@ This module contains the repository for managing the relationship
 between vaccination points and vaccines.
 """
 
+import sqlite3
 from databases import Database
 from sqlalchemy import select, insert, delete, join
+from sqlalchemy.exc import IntegrityError
 from app.models import VaccinationPointVaccine, Vaccine, VaccinationPoint
+from app.indexes.spatial import PointMatrix, VaccineGridIndexes, vaccine_point_indexes
+from app.versions import TableVersions, table_versions
+from app.fields import query_fields, select_fields
+from app.pagination import Page, Stream, keyset, page, stream
+from app.counters import TableCounts, table_counts
 from typing import List, Dict
 
+
+def _is_integrity_error(error: Exception) -> bool:
+    # databases raises the driver's errors: sqlite3's, or asyncpg's with their SQLSTATE (class 23)
+    return isinstance(error, sqlite3.IntegrityError) or str(getattr(error, "sqlstate", "")).startswith("23")
+
+
 class VaccinationPointVaccineRepository:
-    def __init__(self, database: Database):
+    # Sort keys of the paginated lists, one row per (point, vaccine) pair
+    VACCINES_BY_POINT_KEY = (VaccinationPointVaccine.vaccination_point_id, VaccinationPointVaccine.vaccine_id)
+    POINTS_BY_VACCINE_KEY = (VaccinationPointVaccine.vaccine_id, VaccinationPointVaccine.vaccination_point_id)
+
+    def __init__(
+        self,
+        database: Database,
+        vaccine_indexes: VaccineGridIndexes = vaccine_point_indexes,
+        versions: TableVersions = table_versions,
+        counts: TableCounts = table_counts
+    ):
         self.database = database
+        self.vaccine_indexes = vaccine_indexes
+        self.versions = versions
+        self.counts = counts
 
     async def get_by_point_and_vaccine(
         self,
@@ -23,7 +49,11 @@ class VaccinationPointVaccineRepository:
         )
         return await self.database.fetch_one(query)
 
-    async def get_vaccines_by_point(self, vaccination_point_id: int | None = None) -> List[Dict]:
+    def _vaccines_by_point_query(
+        self,
+        vaccination_point_id: int | None = None,
+        fields: tuple[str, ...] | None = None
+    ):
         # Join com a tabela de vacinas
         query = select(
             VaccinationPointVaccine.vaccination_point_id,
@@ -37,13 +67,47 @@ class VaccinationPointVaccineRepository:
             VaccinationPoint,
             VaccinationPointVaccine.vaccination_point_id == VaccinationPoint.id
         )
+        query = select_fields(query, fields)
         
         if vaccination_point_id is not None:
             query = query.where(VaccinationPointVaccine.vaccination_point_id == vaccination_point_id)
-            
-        return await self.database.fetch_all(query)
+        return query
+
+    @property
+    def vaccines_by_point_fields(self) -> tuple[str, ...]:
+        return query_fields(self._vaccines_by_point_query())
 
-    async def get_points_by_vaccine(self, vaccine_id: int | None = None) -> List[Dict]:
+    async def get_vaccines_by_point(
+        self,
+        vaccination_point_id: int | None = None,
+        fields: tuple[str, ...] | None = None,
+        after: tuple | None = None,
+        limit: int | None = None,
+        count: bool = False
+    ) -> Page:
+        query = self._vaccines_by_point_query(vaccination_point_id, fields)
+        rows = await self.database.fetch_all(keyset(query, self.VACCINES_BY_POINT_KEY, after, limit))
+        result = page(rows, self.VACCINES_BY_POINT_KEY, limit)
+        if count:
+            result.total_count, result.count_estimated = await self.counts.count(self.database, query, "vaccination_point_vaccines")
+        return result
+
+    async def iterate_vaccines_by_point(
+        self,
+        vaccination_point_id: int | None = None,
+        fields: tuple[str, ...] | None = None,
+        after: tuple | None = None,
+        limit: int | None = None
+    ) -> Stream:
+        """Same rows as `get_vaccines_by_point`, read from the database as they are consumed."""
+        query = self._vaccines_by_point_query(vaccination_point_id, fields)
+        return await stream(self.database, query, self.VACCINES_BY_POINT_KEY, after, limit)
+
+    def _points_by_vaccine_query(
+        self,
+        vaccine_id: int | None = None,
+        fields: tuple[str, ...] | None = None
+    ):
         # Join com a tabela de pontos de vacinação
         query = select(
             VaccinationPointVaccine.vaccine_id,
@@ -64,11 +128,75 @@ class VaccinationPointVaccineRepository:
             Vaccine,
             VaccinationPointVaccine.vaccine_id == Vaccine.id
         )
+        query = select_fields(query, fields)
         
         if vaccine_id is not None:
             query = query.where(VaccinationPointVaccine.vaccine_id == vaccine_id)
-            
-        return await self.database.fetch_all(query)
+        return query
+
+    @property
+    def points_by_vaccine_fields(self) -> tuple[str, ...]:
+        return query_fields(self._points_by_vaccine_query())
+
+    async def get_points_by_vaccine(
+        self,
+        vaccine_id: int | None = None,
+        fields: tuple[str, ...] | None = None,
+        after: tuple | None = None,
+        limit: int | None = None,
+        count: bool = False
+    ) -> Page:
+        query = self._points_by_vaccine_query(vaccine_id, fields)
+        rows = await self.database.fetch_all(keyset(query, self.POINTS_BY_VACCINE_KEY, after, limit))
+        result = page(rows, self.POINTS_BY_VACCINE_KEY, limit)
+        if count:
+            result.total_count, result.count_estimated = await self.counts.count(self.database, query, "vaccination_point_vaccines")
+        return result
+
+    async def iterate_points_by_vaccine(
+        self,
+        vaccine_id: int | None = None,
+        fields: tuple[str, ...] | None = None,
+        after: tuple | None = None,
+        limit: int | None = None
+    ) -> Stream:
+        """Same rows as `get_points_by_vaccine`, read from the database as they are consumed."""
+        query = self._points_by_vaccine_query(vaccine_id, fields)
+        return await stream(self.database, query, self.POINTS_BY_VACCINE_KEY, after, limit)
+
+    async def get_nearest_points_by_vaccine(
+        self,
+        vaccine_id: int,
+        latitude: float,
+        longitude: float,
+        limit: int = 10,
+        radius_km: float | None = None
+    ) -> List[tuple[Dict, float]]:
+        # Resolve the nearest ids in the vaccine's index and fetch only those rows
+        nearest = self.vaccine_indexes.nearest(
+            vaccine_id, latitude, longitude, limit=limit, radius_km=radius_km
+        )
+        if not nearest:
+            return []
+        query = self._points_by_vaccine_query().where(
+            VaccinationPointVaccine.vaccine_id == vaccine_id,
+            VaccinationPoint.id.in_([id for id, _ in nearest])
+        )
+        rows = {row.vaccination_point_id: row for row in await self.database.fetch_all(query)}
+        return [(rows[id], distance) for id, distance in nearest if id in rows]
+
+    def get_point_matrix(self, vaccine_id: int) -> PointMatrix:
+        grid = self.vaccine_indexes.get(vaccine_id)
+        return grid.snapshot() if grid is not None else PointMatrix.empty()
+
+    async def rebuild_spatial_indexes(self) -> int:
+        query = select(
+            VaccinationPointVaccine.vaccination_point_id,
+            VaccinationPointVaccine.vaccine_id
+        )
+        rows = await self.database.fetch_all(query)
+        self.vaccine_indexes.rebuild((row.vaccination_point_id, row.vaccine_id) for row in rows)
+        return len(self.vaccine_indexes)
 
     async def create(
         self, 
@@ -79,7 +207,17 @@ class VaccinationPointVaccineRepository:
             vaccination_point_id=vaccination_point_id,
             vaccine_id=vaccine_id
         )
-        return await self.database.execute(query)
+        try:
+            last_record_id = await self.database.execute(query)
+        except Exception as error:
+            if _is_integrity_error(error):
+                # Such as a pair already in the unique (point, vaccine) index
+                raise IntegrityError(str(query), None, error) from error
+            raise
+        self.counts.add("vaccination_point_vaccines", 1)
+        await self.versions.bump("vaccination_point_vaccines")
+        self.vaccine_indexes.add(vaccination_point_id, vaccine_id)
+        return last_record_id
 
     async def delete(
         self,
@@ -91,6 +229,10 @@ class VaccinationPointVaccineRepository:
             VaccinationPointVaccine.vaccine_id == vaccine_id
         )
         result = await self.database.execute(query)
+        # execute() does not tell the deleted rows on every backend
+        self.counts.forget("vaccination_point_vaccines")
+        await self.versions.bump("vaccination_point_vaccines")
+        self.vaccine_indexes.remove(vaccination_point_id, vaccine_id)
         return result > 0
 
     # ... outros métodos existentes ...
\ No newline at end of file
@@ -11,31 +11,203 @@ access operations.
 """
 
 from databases import Database
-from sqlalchemy import select, insert, update, delete
-from app.models import VaccinationPoint
+from sqlalchemy import Select, select, insert, update, delete
+from app.models import VaccinationPoint, VaccinationPointSchedule
+from app.search import apply_name_search, normalize_text
+from app.fields import model_fields, select_fields
+from app.pagination import Page, Stream, fetch_page, stream
+from app.counters import TableCounts, table_counts
 from typing import List, Optional
 from app.schemas.common import Schedule
+from app.indexes.spatial import (
+    GridIndex,
+    PointMatrix,
+    VaccineGridIndexes,
+    vaccination_point_index,
+    vaccine_point_indexes
+)
+from app.indexes.clusters import ClusterGrid, vaccination_point_clusters
+from app.indexes.schedules import ScheduleIndex, schedule_rows, vaccination_point_schedules
+from app.indexes.autocomplete import PrefixIndex, vaccination_point_names
+from app.versions import TableVersions, table_versions
+from app.cache import QueryCache, missing_ids, remembers_missing
 
 class VaccinationPointRepository:   
-    def __init__(self, database: Database):
+    available_fields = model_fields(VaccinationPoint)
+
+    def __init__(
+        self,
+        database: Database,
+        spatial_index: GridIndex = vaccination_point_index,
+        vaccine_indexes: VaccineGridIndexes = vaccine_point_indexes,
+        cluster_grid: ClusterGrid = vaccination_point_clusters,
+        schedule_index: ScheduleIndex = vaccination_point_schedules,
+        name_index: PrefixIndex = vaccination_point_names,
+        versions: TableVersions = table_versions,
+        missing: QueryCache = missing_ids,
+        counts: TableCounts = table_counts
+    ):
         self.database = database
+        self.spatial_index = spatial_index
+        self.vaccine_indexes = vaccine_indexes
+        self.cluster_grid = cluster_grid
+        self.schedule_index = schedule_index
+        self.name_index = name_index
+        self.versions = versions
+        self.missing = missing
+        self.counts = counts
 
-    async def get_all(self, id: int | None = None, name: str | None = None, city_id: int | None = None) -> List[VaccinationPoint]:
-        query = select(VaccinationPoint)
+    def _all_query(
+        self,
+        id: int | None = None,
+        name: str | None = None,
+        city_id: int | None = None,
+        open_at_weekday: int | None = None,
+        open_at_minute: int | None = None,
+        fields: tuple[str, ...] | None = None
+    ) -> tuple[Select, tuple]:
+        # The query and the key its pages are read by
+        query = select_fields(select(VaccinationPoint), fields)
+        keys = (VaccinationPoint.id,)
         
         if id is not None:
             query = query.where(VaccinationPoint.id == id)
         if name is not None:
-            query = query.where(VaccinationPoint.name.ilike(f"%{name}%"))
+            query, keys = apply_name_search(query, VaccinationPoint, name, self.database.url.dialect)
         if city_id is not None:
             query = query.where(VaccinationPoint.city_id == city_id)
-            
-        return await self.database.fetch_all(query)
+        if open_at_weekday is not None and open_at_minute is not None:
+            # Range scan on the normalized schedules table
+            query = query.where(
+                select(VaccinationPointSchedule.id).where(
+                    VaccinationPointSchedule.vaccination_point_id == VaccinationPoint.id,
+                    VaccinationPointSchedule.weekday == open_at_weekday,
+                    VaccinationPointSchedule.start_minute <= open_at_minute,
+                    VaccinationPointSchedule.end_minute > open_at_minute
+                ).exists()
+            )
+        return query, keys
 
+    async def get_all(
+        self,
+        after: tuple | None = None,
+        limit: int | None = None,
+        count: bool = False,
+        **filters
+    ) -> Page:
+        query, keys = self._all_query(**filters)
+        result = await fetch_page(self.database, query, keys, after, limit)
+        if count:
+            result.total_count, result.count_estimated = await self.counts.count(self.database, query, "vaccination_points")
+        return result
+
+    async def iterate_all(
+        self,
+        after: tuple | None = None,
+        limit: int | None = None,
+        **filters
+    ) -> Stream:
+        """Same rows as `get_all`, read from the database as they are consumed."""
+        query, keys = self._all_query(**filters)
+        return await stream(self.database, query, keys, after, limit)
+
+    @remembers_missing("vaccination_points")
     async def get_by_id(self, id: int) -> VaccinationPoint:
         query = select(VaccinationPoint).where(VaccinationPoint.id == id)
         return await self.database.fetch_one(query)
 
+    async def get_by_ids(self, ids: list[int]) -> List[VaccinationPoint]:
+        query = select(VaccinationPoint).where(VaccinationPoint.id.in_(ids))
+        return await self.database.fetch_all(query)
+
+    async def get_nearest(
+        self,
+        latitude: float,
+        longitude: float,
+        limit: int = 10,
+        radius_km: float | None = None
+    ) -> List[tuple[VaccinationPoint, float]]:
+        # Resolve the nearest ids in memory and fetch only those rows
+        nearest = self.spatial_index.nearest(latitude, longitude, limit=limit, radius_km=radius_km)
+        if not nearest:
+            return []
+        rows = {row.id: row for row in await self.get_by_ids([id for id, _ in nearest])}
+        return [(rows[id], distance) for id, distance in nearest if id in rows]
+
+    async def get_in_bbox(
+        self,
+        min_latitude: float,
+        min_longitude: float,
+        max_latitude: float,
+        max_longitude: float,
+        limit: int
+    ) -> List[VaccinationPoint] | None:
+        # Returns None when the box holds more than `limit` points
+        ids = self.spatial_index.within_bbox(min_latitude, min_longitude, max_latitude, max_longitude)
+        if len(ids) > limit:
+            return None
+        if not ids:
+            return []
+        query = select(VaccinationPoint).where(
+            VaccinationPoint.id.in_(ids)
+        ).order_by(VaccinationPoint.id)
+        return await self.database.fetch_all(query)
+
+    def get_clusters(
+        self,
+        min_latitude: float,
+        min_longitude: float,
+        max_latitude: float,
+        max_longitude: float,
+        zoom: int
+    ) -> List[dict]:
+        return self.cluster_grid.clusters(min_latitude, min_longitude, max_latitude, max_longitude, zoom)
+
+    def get_next_openings(self, minute_of_week: int) -> dict[int, int]:
+        return self.schedule_index.next_openings(minute_of_week)
+
+    def get_point_matrix(self) -> PointMatrix:
+        return self.spatial_index.snapshot()
+
+    def autocomplete(self, prefix: str, limit: int) -> list[tuple[int, str, int]]:
+        return self.name_index.search(prefix, limit)
+
+    async def rebuild_indexes(self) -> int:
+        query = select(
+            VaccinationPoint.id,
+            VaccinationPoint.name,
+            VaccinationPoint.latitude,
+            VaccinationPoint.longitude,
+            VaccinationPoint.schedules
+        )
+        rows = await self.database.fetch_all(query)
+        self.spatial_index.rebuild((row.id, row.latitude, row.longitude) for row in rows)
+        self.cluster_grid.rebuild((row.id, row.latitude, row.longitude) for row in rows)
+        self.schedule_index.rebuild((row.id, row.schedules) for row in rows)
+        self.name_index.rebuild((row.id, row.name) for row in rows)
+        return len(rows)
+
+    async def _replace_schedule_rows(self, id: int, schedules: list[dict] | None) -> None:
+        query = delete(VaccinationPointSchedule).where(
+            VaccinationPointSchedule.vaccination_point_id == id
+        )
+        await self.database.execute(query)
+        rows = schedule_rows(schedules)
+        if rows:
+            await self.database.execute_many(
+                insert(VaccinationPointSchedule),
+                [{"vaccination_point_id": id, **row} for row in rows]
+            )
+
+    def _sync_spatial_index(self, id: int, latitude: float | None, longitude: float | None) -> None:
+        if latitude is None or longitude is None:
+            self.spatial_index.remove(id)
+            self.cluster_grid.remove(id)
+        else:
+            self.spatial_index.add(id, latitude, longitude)
+            self.cluster_grid.add(id, latitude, longitude)
+        self.vaccine_indexes.update_point(id)
+
     async def create(
         self, 
         city_id: int,
@@ -56,6 +228,7 @@ class VaccinationPointRepository:
         query = insert(VaccinationPoint).values(
             city_id=city_id,
             name=name,
+            search_name=normalize_text(name),
             schedules=schedules_list,
             full_address=full_address,
             neighborhood=neighborhood,
@@ -66,18 +239,43 @@ class VaccinationPointRepository:
             latitude=latitude,
             longitude=longitude
         )
-        return await self.database.execute(query)
+        async with self.database.transaction():
+            last_record_id = await self.database.execute(query)
+            if last_record_id:
+                await self._replace_schedule_rows(last_record_id, schedules_list)
+        self.counts.add("vaccination_points", 1)
+        await self.versions.bump("vaccination_points")
+        if last_record_id:
+            self._sync_spatial_index(last_record_id, latitude, longitude)
+            self.schedule_index.set(last_record_id, schedules_list)
+            self.name_index.add(last_record_id, name)
+        return last_record_id
 
     async def update(
         self,
         id: int,
         data: dict
     ) -> bool:
+        if "name" in data:
+            data = {**data, "search_name": normalize_text(data["name"])}
+        # RETURNING tells whether the row exists: execute() returns None for an UPDATE on PostgreSQL
         query = update(VaccinationPoint).where(
             VaccinationPoint.id == id
-        ).values(**data)
-        result = await self.database.execute(query)
-        return result > 0
+        ).values(**data).returning(VaccinationPoint.id)
+        async with self.database.transaction():
+            updated = await self.database.fetch_one(query) is not None
+            if "schedules" in data and updated:
+                await self._replace_schedule_rows(id, data["schedules"])
+        await self.versions.bump("vaccination_points")
+        if "schedules" in data and updated:
+            self.schedule_index.set(id, data["schedules"])
+        if "name" in data and updated:
+            self.name_index.add(id, data["name"])
+        if "latitude" in data or "longitude" in data:
+            point = await self.get_by_id(id)
+            if point:
+                self._sync_spatial_index(id, point.latitude, point.longitude)
+        return updated
 
     async def delete(
         self,
@@ -86,5 +284,17 @@ class VaccinationPointRepository:
         query = delete(VaccinationPoint).where(
             VaccinationPoint.id == id
         )
-        result = await self.database.execute(query)
+        async with self.database.transaction():
+            # SQLite does not enforce the ON DELETE CASCADE without PRAGMA foreign_keys
+            await self._replace_schedule_rows(id, None)
+            result = await self.database.execute(query)
+        # execute() does not tell the deleted rows on every backend, and the
+        # vaccines of the point may be left without it (see the join of the lists)
+        self.counts.forget("vaccination_points", "vaccination_point_vaccines")
+        await self.versions.bump("vaccination_points")
+        self.spatial_index.remove(id)
+        self.cluster_grid.remove(id)
+        self.vaccine_indexes.remove_point(id)
+        self.schedule_index.remove(id)
+        self.name_index.remove(id)
         return result > 0 
\ No newline at end of file
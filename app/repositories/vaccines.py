@@ -13,47 +13,107 @@ access operations.
 from databases import Database
 from sqlalchemy import select, insert, update, delete
 from app.models import Vaccine
-from typing import List
+from app.search import apply_name_search, normalize_text
+from app.fields import model_fields, select_fields
+from app.pagination import Page, fetch_page
+from app.counters import TableCounts, table_counts
+from app.cache import QueryCache, cached, invalidates, query_cache
+from app.versions import TableVersions, table_versions
+from app.reference_data import ReferenceData, reference_data
+from app.indexes.spatial import VaccineGridIndexes, vaccine_point_indexes
+from app.indexes.autocomplete import PrefixIndex, vaccine_names
 
 
 class VaccineRepository:   
-    def __init__(self, database: Database):
+    available_fields = model_fields(Vaccine)
+
+    def __init__(
+        self,
+        database: Database,
+        vaccine_indexes: VaccineGridIndexes = vaccine_point_indexes,
+        name_index: PrefixIndex = vaccine_names,
+        cache: QueryCache = query_cache,
+        versions: TableVersions = table_versions,
+        reference_data: ReferenceData = reference_data,
+        counts: TableCounts = table_counts
+    ):
         self.database = database
+        self.vaccine_indexes = vaccine_indexes
+        self.name_index = name_index
+        self.cache = cache
+        self.versions = versions
+        self.reference_data = reference_data
+        self.counts = counts
 
-    async def get_all(self, id: int | None = None, name: str | None = None) -> List[Vaccine]:
-        query = select(Vaccine)
+    @cached("vaccines")
+    async def get_all(
+        self,
+        id: int | None = None,
+        name: str | None = None,
+        fields: tuple[str, ...] | None = None,
+        after: tuple | None = None,
+        limit: int | None = None,
+        count: bool = False
+    ) -> Page:
+        query = select_fields(select(Vaccine), fields)
+        keys = (Vaccine.id,)
         
         if id is not None:
             query = query.where(Vaccine.id == id)
         if name is not None:
-            query = query.where(Vaccine.name.ilike(f"%{name}%"))
-        
-        return await self.database.fetch_all(query)
+            query, keys = apply_name_search(query, Vaccine, name, self.database.url.dialect)
 
+        result = await fetch_page(self.database, query, keys, after, limit)
+        if count:
+            result.total_count, result.count_estimated = await self.counts.count(self.database, query, "vaccines")
+        return result
+
+    @cached("vaccines")
     async def get_by_id(self, id: int) -> Vaccine:
         query = select(Vaccine).where(Vaccine.id == id)
         return await self.database.fetch_one(query)
 
+    def autocomplete(self, prefix: str, limit: int) -> list[tuple[int, str, int]]:
+        return self.name_index.search(prefix, limit)
+
+    async def rebuild_name_index(self) -> int:
+        rows = await self.database.fetch_all(select(Vaccine.id, Vaccine.name))
+        self.name_index.rebuild((row.id, row.name) for row in rows)
+        return len(rows)
+
+    @invalidates("vaccines")
     async def create(
         self, 
         name: str
     ) -> int:
         query = insert(Vaccine).values(
-            name=name
+            name=name,
+            search_name=normalize_text(name)
         )
-        return await self.database.execute(query)
+        last_record_id = await self.database.execute(query)
+        self.counts.add("vaccines", 1)
+        if last_record_id:
+            self.name_index.add(last_record_id, name)
+        return last_record_id
 
+    @invalidates("vaccines")
     async def update(
         self,
         id: int,
         data: dict
     ) -> bool:
+        if "name" in data:
+            data = {**data, "search_name": normalize_text(data["name"])}
+        # RETURNING tells whether the row exists: execute() returns None for an UPDATE on PostgreSQL
         query = update(Vaccine).where(
             Vaccine.id == id
-        ).values(**data)
-        result = await self.database.execute(query)
-        return result > 0
+        ).values(**data).returning(Vaccine.id)
+        updated = await self.database.fetch_one(query) is not None
+        if "name" in data and updated:
+            self.name_index.add(id, data["name"])
+        return updated
 
+    @invalidates("vaccines")
     async def delete(
         self,
         id: int
@@ -62,4 +122,9 @@ class VaccineRepository:
             Vaccine.id == id
         )
         result = await self.database.execute(query)
+        # execute() does not tell the deleted rows on every backend
+        # The lists of vaccination_point_vaccines join the vaccines
+        self.counts.forget("vaccines", "vaccination_point_vaccines")
+        self.vaccine_indexes.remove_vaccine(id)
+        self.name_index.remove(id)
         return result > 0 
\ No newline at end of file
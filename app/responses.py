@@ -0,0 +1,300 @@
+"""
+Cached and negotiated responses.
+
+This module contains the decorator that serves GET routes from the
+response cache backend. It is responsible for:
+- Keying responses by path, normalized query string and media type
+- Choosing JSON, MessagePack or Arrow IPC from the Accept header
+- Streaming rows as NDJSON, on the endpoints whose results are unbounded
+- Linking to the next page of a paginated list (Link and X-Next-Cursor)
+  and giving its total count when requested (X-Total-Count)
+- Encoding a miss once, the same way FastAPI would, and storing the bytes
+- Storing the compressed variant next to it, so it is compressed only once
+- Encoding rows of a model through FastJSONResponse, when a route opts in
+- Answering hits with the stored bytes, skipping the service and the encoder
+- Keeping the headers set by the dependencies (ETag, Last-Modified)
+
+The route dependencies still run on every request, so rate limiting and
+conditional GETs behave as without the cache.
+"""
+
+import inspect
+import json
+from functools import wraps
+from urllib.parse import urlencode
+from fastapi import HTTPException, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import Any, AsyncIterator
+from app.cache_backends import CacheBackend, response_backend
+from app.compression import compress, negotiate_encoding
+from app.config import settings
+from app import encoders
+from app.encoders import RowEncoder, arrow_stream, dumps, packb
+from app.pagination import Page, Stream
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+NDJSON = "application/x-ndjson"
+
+# Other names clients use for the same formats
+MEDIA_TYPE_ALIASES = {
+    "application/x-msgpack": MSGPACK,
+    "application/vnd.msgpack": MSGPACK,
+    "application/ndjson": NDJSON,
+    "application/jsonl": NDJSON
+}
+
+# Rows encoded per chunk of a streamed response
+NDJSON_CHUNK_ROWS = 500
+
+
+def available_media_types() -> tuple[str, ...]:
+    """Formats of the list endpoints; the binary ones depend on optional extras."""
+    media_types = [JSON]
+    if encoders.msgpack is not None:
+        media_types.append(MSGPACK)
+    if encoders.pyarrow is not None:
+        media_types.append(ARROW_STREAM)
+    return tuple(media_types)
+
+
+def _specificity(media_range: str, media_type: str) -> int | None:
+    """How precisely `media_range` names `media_type`, None when it does not match it. Wildcards only stand for JSON."""
+    if media_range == media_type:
+        return 2
+    if media_type == JSON and media_range in ("application/*", "*/*"):
+        return 1 if media_range == "application/*" else 0
+    return None
+
+
+def negotiate(request: Request, streaming: bool = False) -> str:
+    """
+    Media type of the response, from the Accept header: each available type
+    takes the quality of the most specific range matching it, and the best
+    quality wins, then the most specific range, then the client's order.
+    JSON is the answer when the header is absent or accepts none of the
+    types, unless it refuses JSON itself (q=0): then 406.
+    On `streaming` endpoints NDJSON is also offered, and chosen by `stream=true`.
+    """
+    if streaming and request.query_params.get("stream", "").lower() in ("1", "true", "yes", "on"):
+        return NDJSON
+    accept = request.headers.get("accept")
+    if not accept:
+        return JSON
+    ranges = []
+    for media_range in accept.split(","):
+        media_type, *parameters = [part.strip() for part in media_range.split(";")]
+        quality = 1.0
+        for parameter in parameters:
+            name, _, value = parameter.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        media_type = media_type.lower()
+        ranges.append((MEDIA_TYPE_ALIASES.get(media_type, media_type), quality))
+
+    available = available_media_types() + ((NDJSON,) if streaming else ())
+    # (quality, specificity, -position) of the most specific range matching each type (RFC 9110, 12.5.1)
+    scores = {}
+    for position, (media_range, quality) in enumerate(ranges):
+        for media_type in available:
+            specificity = _specificity(media_range, media_type)
+            if specificity is not None and (media_type not in scores or specificity > scores[media_type][1]):
+                scores[media_type] = (quality, specificity, -position)
+    accepted = [(score, media_type) for media_type, score in scores.items() if score[0] > 0]
+    if accepted:
+        return max(accepted)[1]
+    if JSON not in scores:
+        # Lenient clients (e.g. browsers asking for text/html) still get JSON
+        return JSON
+    raise HTTPException(
+        status_code=406,
+        detail=f"Formato não suportado. Formatos disponíveis: {', '.join(available)}"
+    )
+
+
+def normalized_query(request: Request) -> str:
+    """Query string with its parameters sorted."""
+    return urlencode(sorted(request.query_params.multi_items()))
+
+
+def cache_key(request: Request, media_type: str = JSON) -> str:
+    key = f"{request.url.path}?{normalized_query(request)}"
+    return key if media_type == JSON else f"{media_type} {key}"
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response encoded with orjson (when installed) and, for rows of a
+    model, with its RowEncoder. Endpoints must return it themselves so
+    FastAPI does not run `jsonable_encoder` over the content first.
+    """
+
+    def __init__(self, content: Any, encoder: RowEncoder | None = None, **kwargs):
+        self.encoder = encoder
+        super().__init__(content, **kwargs)
+
+    def render(self, content: Any) -> bytes:
+        if self.encoder is not None:
+            return self.encoder.encode(content)
+        return dumps(content)
+
+
+def pagination_headers(request: Request, page: Page | Stream) -> dict[str, str]:
+    """Headers pointing to the page after `page`, if any, and counting all pages, if counted."""
+    headers = {}
+    if page.next_cursor is not None:
+        url = request.url.include_query_params(cursor=page.next_cursor)
+        headers["Link"] = f'<{url}>; rel="next"'
+        headers["X-Next-Cursor"] = page.next_cursor
+    if page.total_count is not None:
+        headers["X-Total-Count"] = str(page.total_count)
+        if page.count_estimated:
+            headers["X-Total-Count-Estimated"] = "true"
+    return headers
+
+
+def negotiated_response(request: Request, content: Any, encoder: RowEncoder | None = None) -> Response:
+    """
+    Response of a list endpoint in the format negotiated with the client.
+    JSON goes through FastJSONResponse when `encoder` is given, through
+    `jsonable_encoder` otherwise. A Page also gets its pagination headers.
+    """
+    media_type = negotiate(request)
+    if media_type == MSGPACK:
+        response = Response(content=packb(content, encoder), media_type=MSGPACK)
+    elif media_type == ARROW_STREAM:
+        response = Response(content=arrow_stream(content, encoder), media_type=ARROW_STREAM)
+    elif encoder is not None:
+        response = FastJSONResponse(content, encoder)
+    else:
+        response = JSONResponse(content=jsonable_encoder(content))
+    response.headers["Vary"] = "Accept"
+    if isinstance(content, Page):
+        response.headers.update(pagination_headers(request, content))
+    return response
+
+
+def ndjson_response(request: Request, rows: AsyncIterator, encoder: RowEncoder | None = None) -> StreamingResponse:
+    """
+    Streams `rows` as one JSON document per line, encoding them in chunks of
+    NDJSON_CHUNK_ROWS as they are read, so memory does not grow with the result.
+    A Stream also gets its pagination headers.
+    """
+    def encode(chunk: list) -> bytes:
+        columns = encoder.columns_of(chunk) if encoder is not None else None
+        items = encoder.to_dicts(chunk, columns) if columns is not None else chunk
+        return b"".join(dumps(item) + b"\n" for item in items)
+
+    async def lines():
+        chunk = []
+        async for row in rows:
+            chunk.append(row)
+            if len(chunk) >= NDJSON_CHUNK_ROWS:
+                yield encode(chunk)
+                chunk = []
+        if chunk:
+            yield encode(chunk)
+
+    headers = {"Vary": "Accept"}
+    if isinstance(rows, Stream):
+        headers.update(pagination_headers(request, rows))
+    return StreamingResponse(lines(), media_type=NDJSON, headers=headers)
+
+
+def _compressed_response(body: bytes, media_type: str, encoding: str, headers: dict[str, str]) -> Response:
+    # Sent as it is by CompressionMiddleware, which skips encoded responses
+    return Response(
+        content=body,
+        media_type=media_type,
+        headers={"Content-Encoding": encoding, "Vary": "Accept, Accept-Encoding", **headers}
+    )
+
+
+def _entry(body: bytes, page: Page) -> bytes:
+    # Cache entries keep the metadata of a page in a first line, as JSON
+    return json.dumps(page.metadata(), separators=(",", ":")).encode() + b"\n" + body
+
+
+def _from_entry(entry: bytes) -> tuple[bytes, Page]:
+    metadata, _, body = entry.partition(b"\n")
+    return body, Page(**json.loads(metadata))
+
+
+def _with_headers(response: Response, headers: Response) -> Response:
+    for name, value in headers.headers.items():
+        if name != "content-length":
+            response.headers.append(name, value)
+    return response
+
+
+def cache_response(
+    *tables: str,
+    backend: CacheBackend = response_backend,
+    encoder: RowEncoder | None = None,
+    streaming: bool = False
+):
+    """
+    Caches the encoded body of a GET list endpoint whose result only depends
+    on `tables`, the query string and the negotiated format. The endpoint
+    must take `request`. See `negotiated_response` for the encoding of misses.
+    Bodies above COMPRESSION_MINIMUM_SIZE are also stored compressed with the
+    coding negotiated with the client, under the same generation.
+    With `streaming`, NDJSON requests skip the cache: the endpoint streams them.
+    The metadata of a Page is stored with its body, for the pagination headers.
+    """
+    def decorator(endpoint):
+        signature = inspect.signature(endpoint)
+        # The response the dependencies write their headers to
+        takes_response = "response" in signature.parameters
+
+        @wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            request: Request = kwargs["request"]
+            headers: Response = kwargs["response"] if takes_response else kwargs.pop("response")
+            media_type = negotiate(request, streaming)
+            if media_type == NDJSON:
+                return _with_headers(await endpoint(*args, **kwargs), headers)
+            key = cache_key(request, media_type)
+            encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+
+            generation = await backend.generation(tables)
+            if encoding is not None:
+                entry = await backend.get(f"{key} {encoding}", generation)
+                if entry is not None:
+                    compressed, page = _from_entry(entry)
+                    links = pagination_headers(request, page)
+                    return _with_headers(_compressed_response(compressed, media_type, encoding, links), headers)
+
+            entry = await backend.get(key, generation)
+            if entry is not None:
+                body, page = _from_entry(entry)
+                links = pagination_headers(request, page)
+                response = Response(content=body, media_type=media_type, headers={"Vary": "Accept", **links})
+            else:
+                result = await endpoint(*args, **kwargs)
+                if isinstance(result, Response):
+                    return result
+                page = result if isinstance(result, Page) else Page()
+                links = pagination_headers(request, page)
+                response = negotiated_response(request, result, encoder)
+                body = response.body
+                await backend.set(key, _entry(body, page), tables, generation)
+
+            if encoding is not None and len(body) >= settings.COMPRESSION_MINIMUM_SIZE:
+                compressed = compress(body, encoding)
+                await backend.set(f"{key} {encoding}", _entry(compressed, page), tables, generation)
+                response = _compressed_response(compressed, media_type, encoding, links)
+            return _with_headers(response, headers)
+
+        if not takes_response:
+            wrapper.__signature__ = signature.replace(parameters=[
+                *signature.parameters.values(),
+                inspect.Parameter("response", inspect.Parameter.KEYWORD_ONLY, annotation=Response)
+            ])
+        return wrapper
+    return decorator
@@ -83,6 +83,23 @@ class VaccinationPointCreate(BaseModel):
     )
 
 
+class NearestPointsBatch(BaseModel):
+    coordinates: list[tuple[float, float]] = Field(
+        ...,
+        min_length=1,
+        max_length=100_000,
+        description="List of [latitude, longitude] pairs to be assigned to their nearest vaccination point",
+        json_schema_extra={
+            "example": [[-9.66156, -35.709156], [-9.752287, -36.661865]]
+        }
+    )
+    vaccine_id: Optional[int] = Field(
+        default=None,
+        gt=0,
+        description="Only consider vaccination points that offer this vaccine"
+    )
+
+
 class VaccinationPointResponse(BaseModel):
     id: int
     name: str
@@ -0,0 +1,130 @@
+"""
+Accent-insensitive name search.
+
+This module contains the name search shared by the repositories.
+It is responsible for:
+- Normalizing names into the unaccented, case-folded `search_name` columns
+- Creating the search structures: pg_trgm GIN indexes on PostgreSQL and
+  FTS5 trigram tables (kept in sync by triggers) on SQLite
+- Building the ranked substring filter used by the `get_all` methods,
+  and the (rank, id) key their pages are read by
+
+Both backends match substrings of the normalized name, so "maceio" finds
+"Maceió" and "ACEI" finds it too.
+"""
+
+import unicodedata
+from sqlalchemy import Connection, Engine, column, func, inspect, select, table, text, update
+from sqlalchemy.sql import Select
+
+SEARCHABLE_TABLES = ("countries", "states", "cities", "vaccination_points", "vaccines")
+
+# The FTS5 trigram tokenizer only matches terms of at least three characters
+MIN_TRIGRAM_LENGTH = 3
+
+# Label of the rank in the key of a name search; it is never returned with the rows
+SEARCH_RANK = "search_rank"
+
+
+def normalize_text(value: str | None) -> str | None:
+    """Removes accents, case-folds and collapses the whitespace of a text."""
+    if value is None:
+        return None
+    decomposed = unicodedata.normalize("NFKD", value)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(stripped.casefold().split())
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def apply_name_search(query: Select, model, name: str, dialect: str) -> tuple[Select, tuple]:
+    """
+    Restricts `query` to the rows of `model` whose normalized name contains
+    `name`, best matches first. Also returns the key ordering them, (rank, id)
+    with the lowest rank first, to page them with `keyset`.
+    """
+    term = normalize_text(name)
+    if dialect == "sqlite" and len(term) >= MIN_TRIGRAM_LENGTH:
+        fts = table(f"{model.__tablename__}_search", column("rowid"), column("rank"), column("search_name"))
+        phrase = '"' + term.replace('"', '""') + '"'
+        query = query.join(fts, fts.c.rowid == model.id).where(fts.c.search_name.match(phrase))
+        # bm25: the best matches have the lowest values
+        rank = fts.c.rank
+    else:
+        if term:
+            query = query.where(model.search_name.like(f"%{_escape_like(term)}%", escape="\\"))
+        if dialect == "postgresql" and term:
+            rank = -func.similarity(model.search_name, term)
+        else:
+            # Without a score, the shortest names holding the term match it best
+            rank = func.length(model.search_name)
+
+    keys = (rank.label(SEARCH_RANK), model.id)
+    return query.order_by(*keys), keys
+
+
+def _sqlite_statements(name: str) -> list[str]:
+    fts = f"{name}_search"
+    return [
+        f"""CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+            search_name, content='{name}', content_rowid='id', tokenize='trigram'
+        )""",
+        f"""CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {name} BEGIN
+            INSERT INTO {fts}(rowid, search_name) VALUES (new.id, new.search_name);
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {name} BEGIN
+            INSERT INTO {fts}({fts}, rowid, search_name) VALUES ('delete', old.id, old.search_name);
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF search_name ON {name} BEGIN
+            INSERT INTO {fts}({fts}, rowid, search_name) VALUES ('delete', old.id, old.search_name);
+            INSERT INTO {fts}(rowid, search_name) VALUES (new.id, new.search_name);
+        END""",
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def _postgres_statements(name: str) -> list[str]:
+    return [
+        f"""CREATE INDEX IF NOT EXISTS ix_{name}_search_name_trgm
+            ON {name} USING gin (search_name gin_trgm_ops)""",
+    ]
+
+
+def setup_search(engine: Engine) -> None:
+    """
+    Adds and backfills the `search_name` columns of existing databases and
+    creates the search structures. Safe to run on every start.
+    """
+    with engine.begin() as connection:
+        install_search(connection)
+
+
+def install_search(connection: Connection) -> None:
+    """Same as `setup_search`, in the transaction of `connection` (see app/migrations)."""
+    inspector = inspect(connection)
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+
+    for name in SEARCHABLE_TABLES:
+        columns = {column["name"] for column in inspector.get_columns(name)}
+        if "search_name" not in columns:
+            connection.execute(text(f"ALTER TABLE {name} ADD COLUMN search_name VARCHAR"))
+
+        searchable = table(name, column("id"), column("name"), column("search_name"))
+        missing = connection.execute(
+            select(searchable.c.id, searchable.c.name).where(searchable.c.search_name.is_(None))
+        ).all()
+        if missing:
+            connection.execute(
+                update(searchable).where(searchable.c.id == text(":row_id")).values(
+                    search_name=text(":search_name")
+                ),
+                [{"row_id": row.id, "search_name": normalize_text(row.name)} for row in missing]
+            )
+
+        statements = _postgres_statements(name) if dialect == "postgresql" else _sqlite_statements(name)
+        for statement in statements:
+            connection.execute(text(statement))
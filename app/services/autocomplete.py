@@ -0,0 +1,53 @@
+"""
+Service layer for the autocomplete.
+
+This module contains the service layer for the autocomplete.
+Services are responsible for:
+- Implementing business logic
+- Coordinating calls to repositories
+- Performing complex validations
+- Ensuring data consistency
+
+The service layer should not know details about HTTP or the database,
+only business rules.
+"""
+
+from app.repositories.cities import CityRepository
+from app.repositories.vaccines import VaccineRepository
+from app.repositories.vaccination_points import VaccinationPointRepository
+from typing import List, Dict
+from fastapi import HTTPException
+
+AUTOCOMPLETE_TYPES = ("city", "vaccine", "point")
+
+class AutocompleteService:
+    def __init__(
+        self,
+        city_repository: CityRepository,
+        vaccine_repository: VaccineRepository,
+        vaccination_point_repository: VaccinationPointRepository
+    ):
+        self.repositories = {
+            "city": city_repository,
+            "vaccine": vaccine_repository,
+            "point": vaccination_point_repository
+        }
+
+    def autocomplete(self, q: str, types: set[str] | None = None, limit: int = 10) -> List[Dict]:
+        types = types or set(AUTOCOMPLETE_TYPES)
+        unknown = types - set(AUTOCOMPLETE_TYPES)
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Valores inválidos para types: {', '.join(sorted(unknown))}"
+            )
+
+        # Matches at the start of the name first, then by type in the listed order
+        matches = [
+            (rank, position, {"type": type, "id": id, "name": name})
+            for position, type in enumerate(AUTOCOMPLETE_TYPES)
+            if type in types
+            for id, name, rank in self.repositories[type].autocomplete(q, limit)
+        ]
+        matches.sort(key=lambda match: match[:2])
+        return [suggestion for _, _, suggestion in matches[:limit]]
@@ -14,20 +14,49 @@ only business rules.
 
 from app.repositories.cities import CityRepository
 from app.schemas.cities import CityCreate, CityUpdate
-from typing import List, Dict
+from app.reference_data import ReferenceData, reference_data
+from app.fields import validate_fields
+from app.pagination import Page, decode_cursor, page_size, with_keys
+from typing import Dict
 from fastapi import HTTPException
 from sqlalchemy.exc import IntegrityError
 
 class CityService:
-    def __init__(self, repository: CityRepository):
+    def __init__(self, repository: CityRepository, reference_data: ReferenceData = reference_data):
         self.repository = repository
+        self.reference_data = reference_data
 
-    async def get_all_cities(self, id: int | None = None, name: str | None = None, ibge_code: str | None = None) -> List[Dict]:
-        return await self.repository.get_all(id=id, name=name, ibge_code=ibge_code)
+    async def get_all_cities(
+        self,
+        id: int | None = None,
+        name: str | None = None,
+        ibge_code: str | None = None,
+        fields: tuple[str, ...] | None = None,
+        cursor: str | None = None,
+        limit: int | None = None,
+        count: bool = False
+    ) -> Page:
+        available = self.repository.available_fields
+        fields = with_keys(validate_fields(fields, available), ("id",), available)
+        return await self.repository.get_all(
+            id=id, name=name, ibge_code=ibge_code, fields=fields,
+            after=decode_cursor(cursor, 1, ranked=name is not None),
+            limit=page_size(limit),
+            count=count
+        )
 
     async def create_city(self, city: CityCreate) -> Dict:
+        snapshot = self.reference_data.snapshot
+
+        # Verifica se o estado existe
+        if not await self.reference_data.contains(self.repository.database, "states", city.state_id):
+            raise HTTPException(
+                status_code=404,
+                detail=f"Estado com ID {city.state_id} não encontrado"
+            )
+
         # Verifica se já existe uma cidade com o mesmo código IBGE
-        existing_city = await self.repository.get_by_ibge_code(city.ibge_code)
+        existing_city = snapshot.cities.by_ibge_code.get(city.ibge_code)
         if existing_city:
             raise HTTPException(
                 status_code=400,
@@ -48,8 +77,7 @@ class CityService:
             )
 
     async def update_city(self, id: int, city: CityUpdate) -> Dict:
-        existing = await self.repository.get_by_id(id)
-        if not existing:
+        if not await self.repository.exists(id):
             raise HTTPException(
                 status_code=404,
                 detail=f"Cidade com ID {id} não encontrada"
@@ -72,8 +100,7 @@ class CityService:
             )
 
     async def delete_city(self, id: int) -> Dict:
-        existing = await self.repository.get_by_id(id)
-        if not existing:
+        if not await self.repository.exists(id):
             raise HTTPException(
                 status_code=404,
                 detail=f"Cidade com ID {id} não encontrada"
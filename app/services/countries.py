@@ -14,20 +14,40 @@ only business rules.
 
 from app.repositories.countries import CountryRepository
 from app.schemas.countries import CountryCreate, CountryUpdate
-from typing import List, Dict
+from app.reference_data import ReferenceData, reference_data
+from app.fields import validate_fields
+from app.pagination import Page, decode_cursor, page_size, with_keys
+from typing import Dict
 from fastapi import HTTPException
 from sqlalchemy.exc import IntegrityError
 
 class CountryService:
-    def __init__(self, repository: CountryRepository):
+    def __init__(self, repository: CountryRepository, reference_data: ReferenceData = reference_data):
         self.repository = repository
+        self.reference_data = reference_data
 
-    async def get_all_countries(self, id: int | None = None, name: str | None = None, ibge_code: str | None = None) -> List[Dict]:
-        return await self.repository.get_all(id=id, name=name, ibge_code=ibge_code)
+    async def get_all_countries(
+        self,
+        id: int | None = None,
+        name: str | None = None,
+        ibge_code: str | None = None,
+        fields: tuple[str, ...] | None = None,
+        cursor: str | None = None,
+        limit: int | None = None,
+        count: bool = False
+    ) -> Page:
+        available = self.repository.available_fields
+        fields = with_keys(validate_fields(fields, available), ("id",), available)
+        return await self.repository.get_all(
+            id=id, name=name, ibge_code=ibge_code, fields=fields,
+            after=decode_cursor(cursor, 1, ranked=name is not None),
+            limit=page_size(limit),
+            count=count
+        )
 
     async def create_country(self, country: CountryCreate) -> Dict:
         # Verifica se já existe um país com o mesmo código IBGE
-        existing_country = await self.repository.get_by_ibge_code(country.ibge_code)
+        existing_country = self.reference_data.snapshot.countries.by_ibge_code.get(country.ibge_code)
         if existing_country:
             raise HTTPException(
                 status_code=400,
@@ -47,8 +67,7 @@ class CountryService:
             )
 
     async def update_country(self, id: int, country: CountryUpdate) -> Dict:
-        existing = await self.repository.get_by_id(id)
-        if not existing:
+        if not await self.repository.exists(id):
             raise HTTPException(
                 status_code=404,
                 detail=f"País com ID {id} não encontrado"
@@ -56,7 +75,7 @@ class CountryService:
         
         # Verifica se já existe um país com o mesmo código IBGE
         if country.ibge_code:
-            existing_country = await self.repository.get_by_ibge_code(country.ibge_code)
+            existing_country = self.reference_data.snapshot.countries.by_ibge_code.get(country.ibge_code)
             if existing_country and existing_country.id != id:
                 raise HTTPException(
                     status_code=400,
@@ -80,8 +99,7 @@ class CountryService:
             )
 
     async def delete_country(self, id: int) -> Dict:
-        existing = await self.repository.get_by_id(id)
-        if not existing:
+        if not await self.repository.exists(id):
             raise HTTPException(
                 status_code=404,
                 detail=f"País com ID {id} não encontrado"
@@ -0,0 +1,39 @@
+"""
+Service layer for the monitoring metrics.
+
+This module contains the service layer for the monitoring metrics.
+Services are responsible for:
+- Implementing business logic
+- Coordinating calls to repositories
+- Performing complex validations
+- Ensuring data consistency
+
+The service layer should not know details about HTTP or the database,
+only business rules.
+"""
+
+from app.cache import QueryCache
+from app.cache_backends import CacheBackend
+from app.pool import PoolMetrics
+from typing import Dict
+
+class MetricsService:
+    def __init__(
+        self,
+        query_cache: QueryCache,
+        response_backend: CacheBackend,
+        missing_ids: QueryCache,
+        pool_metrics: PoolMetrics
+    ):
+        self.query_cache = query_cache
+        self.response_backend = response_backend
+        self.missing_ids = missing_ids
+        self.pool_metrics = pool_metrics
+
+    def get_metrics(self) -> Dict:
+        return {
+            "query_cache": self.query_cache.stats(),
+            "response_cache": self.response_backend.stats(),
+            "negative_cache": self.missing_ids.stats(),
+            "database_pool": self.pool_metrics.stats()
+        }
@@ -14,30 +14,47 @@ only business rules.
 
 from fastapi import HTTPException
 from app.repositories.states import StateRepository
-from app.repositories.countries import CountryRepository
 from app.schemas.states import StateCreate, StateUpdate
-from typing import Dict, List
+from app.reference_data import ReferenceData, reference_data
+from app.fields import validate_fields
+from app.pagination import Page, decode_cursor, page_size, with_keys
+from typing import Dict
 from sqlalchemy.exc import IntegrityError
 
 class StateService:
-    def __init__(self, repository: StateRepository):
+    def __init__(self, repository: StateRepository, reference_data: ReferenceData = reference_data):
         self.repository = repository
-        self.country_repository = CountryRepository(self.repository.database)
+        self.reference_data = reference_data
 
-    async def get_all_states(self, id: int | None = None, name: str | None = None, ibge_code: str | None = None) -> List[Dict]:
-        return await self.repository.get_all(id=id, name=name, ibge_code=ibge_code)
+    async def get_all_states(
+        self,
+        id: int | None = None,
+        name: str | None = None,
+        ibge_code: str | None = None,
+        fields: tuple[str, ...] | None = None,
+        cursor: str | None = None,
+        limit: int | None = None,
+        count: bool = False
+    ) -> Page:
+        available = self.repository.available_fields
+        fields = with_keys(validate_fields(fields, available), ("id",), available)
+        return await self.repository.get_all(
+            id=id, name=name, ibge_code=ibge_code, fields=fields,
+            after=decode_cursor(cursor, 1, ranked=name is not None),
+            limit=page_size(limit),
+            count=count
+        )
 
     async def create_state(self, state: StateCreate) -> Dict:
         # Verifica se o país existe
-        country = await self.country_repository.get_by_id(state.country_id)
-        if not country:
+        if not await self.reference_data.contains(self.repository.database, "countries", state.country_id):
             raise HTTPException(
                 status_code=404,
                 detail=f"País com ID {state.country_id} não encontrado"
             )
         
         # Verifica se já existe um estado com o mesmo código IBGE
-        existing_state = await self.repository.get_by_ibge_code(state.ibge_code)
+        existing_state = self.reference_data.snapshot.states.by_ibge_code.get(state.ibge_code)
         if existing_state:
             raise HTTPException(
                 status_code=400,
@@ -58,8 +75,7 @@ class StateService:
             )
 
     async def update_state(self, id: int, state: StateUpdate) -> Dict:
-        existing = await self.repository.get_by_id(id)
-        if not existing:
+        if not await self.repository.exists(id):
             raise HTTPException(
                 status_code=404,
                 detail=f"Estado com ID {id} não encontrado"
@@ -67,7 +83,7 @@ class StateService:
         
         # Verifica se já existe um estado com o mesmo código IBGE
         if state.ibge_code:
-            existing_state = await self.repository.get_by_ibge_code(state.ibge_code)
+            existing_state = self.reference_data.snapshot.states.by_ibge_code.get(state.ibge_code)
             if existing_state and existing_state.id != id:
                 raise HTTPException(
                     status_code=400,
@@ -91,8 +107,7 @@ class StateService:
             )
 
     async def delete_state(self, id: int) -> Dict:
-        existing = await self.repository.get_by_id(id)
-        if not existing:
+        if not await self.repository.exists(id):
             raise HTTPException(
                 status_code=404,
                 detail=f"Estado com ID {id} não encontrado"
@@ -6,24 +6,43 @@ between vaccination points and vaccines.
 """
 
 from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
 from app.repositories.vaccination_point_vaccines import VaccinationPointVaccineRepository
 from app.repositories.vaccination_points import VaccinationPointRepository
 from app.repositories.vaccines import VaccineRepository
 from app.schemas.vaccination_point_vaccines import VaccinationPointVaccineCreate
-from typing import Dict, List
+from app.reference_data import ReferenceData, reference_data
+from app.fields import validate_fields
+from app.pagination import Page, Stream, decode_cursor, page_size, with_keys
+from typing import Dict, Iterator, List
+import numpy as np
 
 class VaccinationPointVaccineService:
     def __init__(
         self, 
         repository: VaccinationPointVaccineRepository,
         vaccination_point_repository: VaccinationPointRepository,
-        vaccine_repository: VaccineRepository
+        vaccine_repository: VaccineRepository,
+        reference_data: ReferenceData = reference_data
     ):
         self.repository = repository
         self.vaccination_point_repository = vaccination_point_repository
         self.vaccine_repository = vaccine_repository
+        self.reference_data = reference_data
+
+    async def _check_vaccines_by_point(
+        self,
+        vaccination_point_id: int | None,
+        fields: tuple[str, ...] | None,
+        cursor: str | None,
+        limit: int | None
+    ) -> Dict:
+        available = self.repository.vaccines_by_point_fields
+        fields = validate_fields(fields, available)
+        after = decode_cursor(cursor, 2)
+        if after is not None or limit is not None:
+            fields = with_keys(fields, ("vaccination_point_id", "vaccine_id"), available)
 
-    async def get_vaccines_by_point(self, vaccination_point_id: int | None = None) -> List[Dict]:
         # If a point ID was provided, check if it exists
         if vaccination_point_id:
             vaccination_point = await self.vaccination_point_repository.get_by_id(vaccination_point_id)
@@ -32,20 +51,128 @@ class VaccinationPointVaccineService:
                     status_code=404,
                     detail=f"Ponto de vacinação com ID {vaccination_point_id} não encontrado"
                 )
-        
-        return await self.repository.get_vaccines_by_point(vaccination_point_id)
+        return {"fields": fields, "after": after, "limit": limit}
+
+    async def get_vaccines_by_point(
+        self,
+        vaccination_point_id: int | None = None,
+        fields: tuple[str, ...] | None = None,
+        cursor: str | None = None,
+        limit: int | None = None,
+        count: bool = False
+    ) -> Page:
+        arguments = await self._check_vaccines_by_point(vaccination_point_id, fields, cursor, page_size(limit))
+        return await self.repository.get_vaccines_by_point(vaccination_point_id, count=count, **arguments)
+
+    async def stream_vaccines_by_point(
+        self,
+        vaccination_point_id: int | None = None,
+        fields: tuple[str, ...] | None = None,
+        cursor: str | None = None,
+        limit: int | None = None
+    ) -> Stream:
+        # Validated here, before the response starts; the rows are read as they are sent
+        arguments = await self._check_vaccines_by_point(vaccination_point_id, fields, cursor, limit)
+        return await self.repository.iterate_vaccines_by_point(vaccination_point_id, **arguments)
+
+    async def _check_points_by_vaccine(
+        self,
+        vaccine_id: int | None,
+        fields: tuple[str, ...] | None,
+        cursor: str | None,
+        limit: int | None
+    ) -> Dict:
+        available = self.repository.points_by_vaccine_fields
+        fields = validate_fields(fields, available)
+        after = decode_cursor(cursor, 2)
+        if after is not None or limit is not None:
+            fields = with_keys(fields, ("vaccine_id", "vaccination_point_id"), available)
 
-    async def get_points_by_vaccine(self, vaccine_id: int | None = None) -> List[Dict]:
         # If a vaccine ID was provided, check if it exists
         if vaccine_id:
-            vaccine = await self.vaccine_repository.get_by_id(vaccine_id)
-            if not vaccine:
+            if not await self.reference_data.contains(self.repository.database, "vaccines", vaccine_id):
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"Vacina com ID {vaccine_id} não encontrada"
+                )
+        return {"fields": fields, "after": after, "limit": limit}
+
+    async def get_points_by_vaccine(
+        self,
+        vaccine_id: int | None = None,
+        fields: tuple[str, ...] | None = None,
+        cursor: str | None = None,
+        limit: int | None = None,
+        count: bool = False
+    ) -> Page:
+        arguments = await self._check_points_by_vaccine(vaccine_id, fields, cursor, page_size(limit))
+        return await self.repository.get_points_by_vaccine(vaccine_id, count=count, **arguments)
+
+    async def stream_points_by_vaccine(
+        self,
+        vaccine_id: int | None = None,
+        fields: tuple[str, ...] | None = None,
+        cursor: str | None = None,
+        limit: int | None = None
+    ) -> Stream:
+        # Validated here, before the response starts; the rows are read as they are sent
+        arguments = await self._check_points_by_vaccine(vaccine_id, fields, cursor, limit)
+        return await self.repository.iterate_points_by_vaccine(vaccine_id, **arguments)
+
+    async def get_nearest_points_by_vaccine(
+        self,
+        vaccine_id: int,
+        latitude: float,
+        longitude: float,
+        radius_km: float | None = None,
+        limit: int = 10
+    ) -> List[Dict]:
+        if not await self.reference_data.contains(self.repository.database, "vaccines", vaccine_id):
+            raise HTTPException(
+                status_code=404,
+                detail=f"Vacina com ID {vaccine_id} não encontrada"
+            )
+
+        nearest = await self.repository.get_nearest_points_by_vaccine(
+            vaccine_id=vaccine_id,
+            latitude=latitude,
+            longitude=longitude,
+            limit=limit,
+            radius_km=radius_km
+        )
+        return [
+            {**dict(point), "distance_km": round(distance, 3)}
+            for point, distance in nearest
+        ]
+
+    async def assign_nearest_points(
+        self,
+        coordinates: list[tuple[float, float]],
+        vaccine_id: int | None = None
+    ) -> Iterator[tuple[int, np.ndarray, np.ndarray]]:
+        if vaccine_id:
+            if not await self.reference_data.contains(self.repository.database, "vaccines", vaccine_id):
                 raise HTTPException(
                     status_code=404,
                     detail=f"Vacina com ID {vaccine_id} não encontrada"
                 )
-        
-        return await self.repository.get_points_by_vaccine(vaccine_id)
+            matrix = self.repository.get_point_matrix(vaccine_id)
+        else:
+            matrix = self.vaccination_point_repository.get_point_matrix()
+
+        points = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+        # NaN compares False with anything: the JSON body may carry it, and it would reach the matrix
+        if (
+            not np.isfinite(points).all()
+            or (np.abs(points[:, 0]) > 90).any()
+            or (np.abs(points[:, 1]) > 180).any()
+        ):
+            raise HTTPException(
+                status_code=400,
+                detail="Coordenadas fora do intervalo válido de latitude/longitude"
+            )
+
+        return matrix.nearest(points[:, 0], points[:, 1])
 
     async def add_vaccine_to_point(self, vaccination_point_id: int, data: VaccinationPointVaccineCreate) -> Dict:
         # Check if vaccination point exists
@@ -57,8 +184,7 @@ class VaccinationPointVaccineService:
             )
 
         # Check if vaccine exists
-        vaccine = await self.vaccine_repository.get_by_id(data.vaccine_id)
-        if not vaccine:
+        if not await self.reference_data.contains(self.repository.database, "vaccines", data.vaccine_id):
             raise HTTPException(
                 status_code=404,
                 detail=f"Vacina com ID {data.vaccine_id} não encontrada"
@@ -75,10 +201,17 @@ class VaccinationPointVaccineService:
                 detail="Esta vacina já está cadastrada neste ponto de vacinação"
             )
 
-        last_record_id = await self.repository.create(
-            vaccination_point_id=vaccination_point_id,
-            vaccine_id=data.vaccine_id
-        )
+        try:
+            last_record_id = await self.repository.create(
+                vaccination_point_id=vaccination_point_id,
+                vaccine_id=data.vaccine_id
+            )
+        except IntegrityError:
+            # Added by a concurrent request after the check above
+            raise HTTPException(
+                status_code=400,
+                detail="Esta vacina já está cadastrada neste ponto de vacinação"
+            )
         return {"id": last_record_id, "message": "Vacina adicionada ao ponto com sucesso"}
 
     async def remove_vaccine_from_point(self, vaccination_point_id: int, vaccine_id: int) -> Dict:
@@ -91,8 +224,7 @@ class VaccinationPointVaccineService:
             )
 
         # Check if vaccine exists
-        vaccine = await self.vaccine_repository.get_by_id(vaccine_id)
-        if not vaccine:
+        if not await self.reference_data.contains(self.repository.database, "vaccines", vaccine_id):
             raise HTTPException(
                 status_code=404,
                 detail=f"Vacina com ID {vaccine_id} não encontrada"
@@ -14,14 +14,171 @@ only business rules.
 
 from app.repositories.vaccination_points import VaccinationPointRepository
 from app.schemas.vaccination_points import VaccinationPointCreate
-from typing import List, Dict
+from app.indexes.schedules import minute_of_week
+from app.config import settings
+from app.fields import validate_fields
+from app.pagination import Page, Stream, decode_cursor, page_size, with_keys
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+from typing import Callable, List, Dict
+from fastapi import HTTPException
 
 class VaccinationPointService:
     def __init__(self, repository: VaccinationPointRepository):
         self.repository = repository
 
-    async def get_all_vaccination_points(self, id: int | None = None, name: str | None = None, city_id: int | None = None) -> List[Dict]:
-        return await self.repository.get_all(id=id, name=name, city_id=city_id)
+    def _list_arguments(
+        self,
+        id: int | None,
+        name: str | None,
+        city_id: int | None,
+        open_at: datetime | None,
+        open_now: bool,
+        include: set[str] | None,
+        fields: tuple[str, ...] | None,
+        cursor: str | None,
+        limit: int | None
+    ) -> tuple[Dict, Callable | None]:
+        # Validates the filters of the list; returns the repository arguments
+        # and the function adding the `include` fields to each point, if any
+        include = include or set()
+        unknown = include - {"next_opening"}
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Valores inválidos para include: {', '.join(sorted(unknown))}"
+            )
+
+        available = self.repository.available_fields
+        fields = validate_fields(fields, available)
+        # Name searches are paged by (rank, id)
+        after = decode_cursor(cursor, 1, ranked=name is not None)
+        if after is not None or limit is not None or "next_opening" in include:
+            # The next cursor is read from the id, and so are the next openings
+            fields = with_keys(fields, ("id",), available)
+
+        timezone = ZoneInfo(settings.TIMEZONE)
+        if open_now and open_at is None:
+            open_at = datetime.now(timezone)
+        elif open_at is not None:
+            open_at = open_at.astimezone(timezone) if open_at.tzinfo else open_at.replace(tzinfo=timezone)
+
+        arguments = {
+            "id": id,
+            "name": name,
+            "city_id": city_id,
+            "open_at_weekday": open_at.weekday() if open_at is not None else None,
+            "open_at_minute": open_at.hour * 60 + open_at.minute if open_at is not None else None,
+            "fields": fields,
+            "after": after,
+            "limit": limit
+        }
+        if "next_opening" not in include:
+            return arguments, None
+
+        # Relative to the requested moment, or to now when none was given
+        reference = (open_at or datetime.now(timezone)).replace(second=0, microsecond=0)
+        waits = self.repository.get_next_openings(minute_of_week(reference))
+
+        def with_next_opening(point) -> Dict:
+            return {
+                **dict(point),
+                "next_opening": reference + timedelta(minutes=waits[point.id]) if point.id in waits else None
+            }
+        return arguments, with_next_opening
+
+    async def get_all_vaccination_points(
+        self,
+        id: int | None = None,
+        name: str | None = None,
+        city_id: int | None = None,
+        open_at: datetime | None = None,
+        open_now: bool = False,
+        include: set[str] | None = None,
+        fields: tuple[str, ...] | None = None,
+        cursor: str | None = None,
+        limit: int | None = None,
+        count: bool = False
+    ) -> Page:
+        arguments, extend = self._list_arguments(
+            id, name, city_id, open_at, open_now, include, fields, cursor, page_size(limit)
+        )
+        points = await self.repository.get_all(count=count, **arguments)
+        if extend is None:
+            return points
+        return Page([extend(point) for point in points], **points.metadata())
+
+    async def stream_vaccination_points(
+        self,
+        id: int | None = None,
+        name: str | None = None,
+        city_id: int | None = None,
+        open_at: datetime | None = None,
+        open_now: bool = False,
+        include: set[str] | None = None,
+        fields: tuple[str, ...] | None = None,
+        cursor: str | None = None,
+        limit: int | None = None
+    ) -> Stream:
+        # Validated here, before the response starts; the rows are read as they are sent.
+        # Unlike the pages, streams are only limited when the client asks for it
+        arguments, extend = self._list_arguments(
+            id, name, city_id, open_at, open_now, include, fields, cursor, limit
+        )
+        points = await self.repository.iterate_all(**arguments)
+        if extend is None:
+            return points
+
+        async def extended():
+            async for point in points:
+                yield extend(point)
+        return Stream(extended(), points.next_cursor)
+
+    async def get_nearby_vaccination_points(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_km: float | None = None,
+        limit: int = 10
+    ) -> List[Dict]:
+        nearest = await self.repository.get_nearest(
+            latitude=latitude,
+            longitude=longitude,
+            limit=limit,
+            radius_km=radius_km
+        )
+        return [
+            {**dict(point), "distance_km": round(distance, 3)}
+            for point, distance in nearest
+        ]
+
+    async def get_vaccination_points_in_bbox(
+        self,
+        min_latitude: float,
+        min_longitude: float,
+        max_latitude: float,
+        max_longitude: float,
+        zoom: int,
+        limit: int = 500
+    ) -> Dict:
+        if min_latitude > max_latitude or min_longitude > max_longitude:
+            raise HTTPException(
+                status_code=400,
+                detail="Os valores mínimos da área devem ser menores que os valores máximos"
+            )
+
+        bbox = (min_latitude, min_longitude, max_latitude, max_longitude)
+        # High zoom levels get the raw points while they fit in the limit
+        if zoom > self.repository.cluster_grid.max_zoom:
+            points = await self.repository.get_in_bbox(*bbox, limit=limit)
+            if points is not None:
+                return {"zoom": zoom, "clusters": [], "vaccination_points": points}
+
+        return {
+            "zoom": zoom,
+            "clusters": self.repository.get_clusters(*bbox, zoom=zoom),
+            "vaccination_points": []
+        }
 
     async def create_vaccination_point(self, vaccination_point: VaccinationPointCreate) -> Dict:
         last_record_id = await self.repository.create(
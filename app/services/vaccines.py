@@ -14,14 +14,31 @@ only business rules.
 
 from app.repositories.vaccines import VaccineRepository
 from app.schemas.vaccines import VaccineCreate
-from typing import List, Dict
+from app.fields import validate_fields
+from app.pagination import Page, decode_cursor, page_size, with_keys
+from typing import Dict
 
 class VaccineService:
     def __init__(self, repository: VaccineRepository):
         self.repository = repository
 
-    async def get_all_vaccines(self, id: int | None = None, name: str | None = None) -> List[Dict]:
-        return await self.repository.get_all(id=id, name=name)
+    async def get_all_vaccines(
+        self,
+        id: int | None = None,
+        name: str | None = None,
+        fields: tuple[str, ...] | None = None,
+        cursor: str | None = None,
+        limit: int | None = None,
+        count: bool = False
+    ) -> Page:
+        available = self.repository.available_fields
+        fields = with_keys(validate_fields(fields, available), ("id",), available)
+        return await self.repository.get_all(
+            id=id, name=name, fields=fields,
+            after=decode_cursor(cursor, 1, ranked=name is not None),
+            limit=page_size(limit),
+            count=count
+        )
 
     async def create_vaccine(self, vaccine: VaccineCreate) -> Dict:
         last_record_id = await self.repository.create(
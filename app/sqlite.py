@@ -0,0 +1,175 @@
+"""
+SQLite performance profile.
+
+This module contains the tuned connections of the SQLite backend, used
+when SQLITE_PROFILE=performance. It is responsible for:
+- Switching the database to WAL, where readers no longer wait for writers
+- Applying the PRAGMAs synchronous, mmap_size, cache_size and busy_timeout
+  to every connection
+- Keeping a pool of read-only connections open for the GET requests
+- Serializing the writes of the worker through a single writer connection
+
+The default backend of `databases` opens and closes a connection per
+acquisition, in the rollback journal, where a write blocks every reader.
+SQLite takes one writer at a time anyway: queuing the writes in the worker
+spares its connections from retrying SQLITE_BUSY, and busy_timeout covers
+the writers of the other workers.
+"""
+
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Sequence
+import aiosqlite
+from databases import Database
+from databases.backends.sqlite import SQLiteBackend
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.config import settings
+
+# Methods of the requests whose queries run on the read connections
+READ_METHODS = ("GET", "HEAD")
+
+_reading: ContextVar[bool] = ContextVar("sqlite_reading", default=False)
+
+
+@contextmanager
+def read_connections() -> Iterator[None]:
+    """Runs the queries of the block, and of the tasks it creates, on the read connections."""
+    token = _reading.set(True)
+    try:
+        yield
+    finally:
+        _reading.reset(token)
+
+
+def connection_pragmas() -> tuple[str, ...]:
+    """PRAGMAs run on every connection of the profile."""
+    return (
+        f"PRAGMA busy_timeout = {settings.SQLITE_BUSY_TIMEOUT_MS}",
+        f"PRAGMA synchronous = {settings.SQLITE_SYNCHRONOUS}",
+        # Negative values are in KiB rather than pages
+        f"PRAGMA cache_size = -{settings.SQLITE_CACHE_SIZE_KB}",
+        f"PRAGMA mmap_size = {settings.SQLITE_MMAP_SIZE}"
+    )
+
+
+class SQLiteConnectionPool:
+    """
+    Connections of the tuned backend: one writer, held by one task at a
+    time, and up to `read_size` read-only connections for the tasks inside
+    `read_connections()`. All of them stay open between acquisitions.
+    """
+
+    def __init__(self, path: str, read_size: int, pragmas: Sequence[str]):
+        self.path = path
+        self.read_size = read_size
+        self.pragmas = tuple(pragmas)
+        self._writer: aiosqlite.Connection | None = None
+        self._writer_lock: asyncio.Lock | None = None
+        self._readers: list[aiosqlite.Connection] = []
+        self._idle_readers: list[aiosqlite.Connection] = []
+        self._free_readers: asyncio.Semaphore | None = None
+
+    @staticmethod
+    async def _pragma(connection: aiosqlite.Connection, pragma: str) -> None:
+        # Closing the cursor finalizes the statement, which otherwise keeps its locks
+        async with connection.execute(pragma) as cursor:
+            await cursor.fetchall()
+
+    async def _connect(self, read_only: bool) -> aiosqlite.Connection:
+        connection = aiosqlite.connect(database=self.path, isolation_level=None)
+        await connection.__aenter__()
+        try:
+            for pragma in self.pragmas:
+                await self._pragma(connection, pragma)
+            if read_only:
+                # A write sent here fails instead of competing with the writer
+                await self._pragma(connection, "PRAGMA query_only = ON")
+        except BaseException:
+            await connection.close()
+            raise
+        return connection
+
+    async def open(self) -> None:
+        self._writer_lock = asyncio.Lock()
+        self._free_readers = asyncio.Semaphore(self.read_size)
+        self._writer = await self._connect(read_only=False)
+        # Stored in the database file: every connection opened later uses WAL
+        await self._pragma(self._writer, "PRAGMA journal_mode = WAL")
+
+    async def close(self) -> None:
+        connections = self._readers + ([self._writer] if self._writer is not None else [])
+        self._readers, self._idle_readers, self._writer = [], [], None
+        for connection in connections:
+            await connection.close()
+
+    async def acquire(self) -> aiosqlite.Connection:
+        assert self._writer is not None, "SQLiteConnectionPool is not open"
+        if not (_reading.get() and self.read_size):
+            await self._writer_lock.acquire()
+            return self._writer
+
+        await self._free_readers.acquire()
+        if self._idle_readers:
+            return self._idle_readers.pop()
+        try:
+            connection = await self._connect(read_only=True)
+        except BaseException:
+            self._free_readers.release()
+            raise
+        self._readers.append(connection)
+        return connection
+
+    async def release(self, connection: aiosqlite.Connection) -> None:
+        if connection is self._writer:
+            self._writer_lock.release()
+        else:
+            self._idle_readers.append(connection)
+            self._free_readers.release()
+
+    # Same sizes as an asyncpg pool, reported in /metrics
+    def get_size(self) -> int:
+        return len(self._readers) + (self._writer is not None)
+
+    def get_idle_size(self) -> int:
+        writer_idle = self._writer is not None and not self._writer_lock.locked()
+        return len(self._idle_readers) + writer_idle
+
+    def get_min_size(self) -> int:
+        return 1
+
+    def get_max_size(self) -> int:
+        return self.read_size + 1
+
+
+class TunedSQLiteBackend(SQLiteBackend):
+    """SQLite backend of `databases` on a SQLiteConnectionPool."""
+
+    def __init__(self, database_url, read_size: int, pragmas: Sequence[str]):
+        super().__init__(database_url)
+        self._pool = SQLiteConnectionPool(self._pool._database, read_size, pragmas)
+
+    async def connect(self) -> None:
+        await self._pool.open()
+
+    async def disconnect(self) -> None:
+        await self._pool.close()
+
+
+def tune_sqlite(database: Database, read_size: int = settings.SQLITE_READ_POOL_SIZE) -> None:
+    """Puts `database`, a SQLite database not connected yet, on the performance profile."""
+    database._backend = TunedSQLiteBackend(database.url, read_size, connection_pragmas())
+
+
+class ReadRoutingMiddleware:
+    """Runs the queries of the GET and HEAD requests on the read connections."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in READ_METHODS:
+            await self.app(scope, receive, send)
+            return
+        with read_connections():
+            await self.app(scope, receive, send)
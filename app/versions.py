@@ -0,0 +1,78 @@
+"""
+Per-table version counters.
+
+This module contains the versions used as HTTP validators of the list
+endpoints. It is responsible for:
+- Counting the writes made by the repositories to each table
+- Tracking when each table was last modified, seeded from `created_at`
+- Deriving strong ETags and Last-Modified dates from those counters
+- Notifying subscribers (the response cache backend) of every write
+
+Counters live in the process, so the ETags embed a token drawn at start:
+a restarted (or another) worker never answers 304 to a tag it did not emit.
+The writes of the other workers only reach the counters through a backend
+that announces them, which `conditional_get` requires.
+"""
+
+import hashlib
+import secrets
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Iterable
+
+VERSIONED_TABLES = (
+    "countries",
+    "states",
+    "cities",
+    "vaccination_points",
+    "vaccines",
+    "vaccination_point_vaccines"
+)
+
+
+class TableVersions:
+    def __init__(self):
+        self._epoch = secrets.token_hex(8)
+        self._versions: dict[str, int] = {}
+        self._modified: dict[str, datetime] = {}
+        self._subscribers: list[Callable[[tuple[str, ...], bool], Awaitable[None]]] = []
+
+    def version(self, table: str) -> int:
+        return self._versions.get(table, 0)
+
+    async def bump(self, *tables: str, remote: bool = False) -> None:
+        """
+        Records a write to `tables`. `remote` tells a write announced by
+        another worker from one made by this process.
+        """
+        now = datetime.now(timezone.utc)
+        for table in tables:
+            self._versions[table] = self.version(table) + 1
+            self._modified[table] = now
+        for subscriber in self._subscribers:
+            await subscriber(tables, remote)
+
+    def subscribe(self, subscriber: Callable[[tuple[str, ...], bool], Awaitable[None]]) -> None:
+        """Awaits `subscriber(tables, remote)` after every bump."""
+        self._subscribers.append(subscriber)
+
+    def seed_last_modified(self, table: str, modified: datetime) -> None:
+        """Sets the last modification of `table` unless a later one is known. Naive dates are UTC."""
+        if modified.tzinfo is None:
+            modified = modified.replace(tzinfo=timezone.utc)
+        current = self._modified.get(table)
+        if current is None or modified > current:
+            self._modified[table] = modified
+
+    def etag(self, tables: Iterable[str], variant: str = "") -> str:
+        """Strong ETag of the tables at their current versions; `variant` tells representations apart."""
+        state = ";".join(f"{table}={self.version(table)}" for table in tables)
+        digest = hashlib.sha1(f"{self._epoch}|{state}|{variant}".encode()).hexdigest()
+        return f'"{digest[:20]}"'
+
+    def last_modified(self, tables: Iterable[str]) -> datetime | None:
+        """Latest modification among the tables, truncated to seconds as in HTTP dates."""
+        dates = [self._modified[table] for table in tables if table in self._modified]
+        return max(dates).replace(microsecond=0) if dates else None
+
+
+table_versions = TableVersions()
@@ -0,0 +1,71 @@
+"""
+Benchmark for the batch nearest vaccination point assignment.
+
+Compares the vectorized PointMatrix used by
+`POST /vaccination-points/nearest/batch` against one GridIndex.nearest
+call per citizen (the cost of one request per citizen, without HTTP).
+
+Usage:
+    python -m benchmarks.bulk_nearest --points 100000 --citizens 50000
+"""
+
+import argparse
+import time
+import numpy as np
+from app.indexes.spatial import GridIndex
+
+# Rough bounding box of Brazil
+MIN_LATITUDE, MAX_LATITUDE = -33.7, 5.2
+MIN_LONGITUDE, MAX_LONGITUDE = -73.9, -34.8
+
+
+def random_coordinates(rng: np.random.Generator, size: int) -> tuple[np.ndarray, np.ndarray]:
+    return (
+        rng.uniform(MIN_LATITUDE, MAX_LATITUDE, size),
+        rng.uniform(MIN_LONGITUDE, MAX_LONGITUDE, size)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=100_000)
+    parser.add_argument("--citizens", type=int, default=50_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    point_latitudes, point_longitudes = random_coordinates(rng, args.points)
+    citizen_latitudes, citizen_longitudes = random_coordinates(rng, args.citizens)
+
+    index = GridIndex()
+    index.rebuild(zip(range(1, args.points + 1), point_latitudes.tolist(), point_longitudes.tolist()))
+
+    started = time.perf_counter()
+    matrix = index.snapshot()
+    snapshot_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    vectorized_ids = np.concatenate([
+        ids for _, ids, _ in matrix.nearest(citizen_latitudes, citizen_longitudes)
+    ])
+    vectorized_seconds = time.perf_counter() - started
+
+    sample = min(args.citizens, 5_000)
+    started = time.perf_counter()
+    grid_ids = [
+        index.nearest(latitude, longitude, limit=1)[0][0]
+        for latitude, longitude in zip(citizen_latitudes[:sample].tolist(), citizen_longitudes[:sample].tolist())
+    ]
+    grid_seconds = time.perf_counter() - started
+
+    mismatches = int((vectorized_ids[:sample] != np.array(grid_ids)).sum())
+
+    print(f"points: {args.points}  citizens: {args.citizens}")
+    print(f"snapshot build:            {snapshot_seconds * 1000:10.1f} ms")
+    print(f"vectorized (PointMatrix):  {args.citizens / vectorized_seconds:10.0f} assignments/s")
+    print(f"per citizen (GridIndex):   {sample / grid_seconds:10.0f} assignments/s")
+    print(f"mismatches on {sample} sampled citizens: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark for the JSON encoding of large responses.
+
+Fills a temporary SQLite database with synthetic vaccination points
+(schedules and `created_at` included), fetches them with `fetch_all` as
+the repository does, and compares the bytes produced per response by:
+- FastAPI's default path: `jsonable_encoder` followed by JSONResponse
+- `dumps`, the generic encoder of FastJSONResponse
+- RowEncoder, specialised for the columns of VaccinationPoint
+
+Usage:
+    python -m benchmarks.json_encoding --points 10000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from databases import Database
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import create_engine, insert, select
+from app.encoders import dumps, orjson, vaccination_point_rows
+from app.models import Base, City, Country, State, VaccinationPoint
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+
+def random_schedules(rng: random.Random) -> list[dict]:
+    start = rng.randint(6, 10)
+    return [
+        {"start": f"{start:02d}:00:00", "end": f"{start + rng.randint(6, 10):02d}:00:00", "weekday": weekday}
+        for weekday in WEEKDAYS[:rng.randint(5, 7)]
+    ]
+
+
+def time_encoder(encode, rows, repeat: int) -> tuple[float, bytes]:
+    body = encode(rows)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        encode(rows)
+    return (time.perf_counter() - started) / repeat, body
+
+
+async def fetch_points(url: str) -> list:
+    database = Database(url)
+    await database.connect()
+    try:
+        return await database.fetch_all(select(VaccinationPoint))
+    finally:
+        await database.disconnect()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    path = os.path.join(tempfile.mkdtemp(), "benchmark.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(Country).values(id=1, name="Brasil"))
+        connection.execute(insert(State).values(id=1, country_id=1, name="Alagoas"))
+        connection.execute(insert(City).values(id=1, state_id=1, name="Maceió"))
+        connection.execute(insert(VaccinationPoint), [
+            {
+                "city_id": 1,
+                "name": f"Posto de Vacinação {id}",
+                "schedules": random_schedules(rng),
+                "full_address": f"Rua {id}, {rng.randint(1, 2000)}",
+                "neighborhood": "Centro",
+                "zip_code": "57000-000",
+                "phone": "(82) 3315-7890",
+                "email": f"posto{id}@saude.gov.br",
+                "latitude": rng.uniform(-10, -9),
+                "longitude": rng.uniform(-36.5, -35)
+            }
+            for id in range(1, args.points + 1)
+        ])
+
+    rows = asyncio.run(fetch_points(f"sqlite+aiosqlite:///{path}"))
+    encoders = [
+        ("jsonable_encoder", lambda rows: JSONResponse(jsonable_encoder(rows)).body),
+        ("dumps", dumps),
+        ("RowEncoder", vaccination_point_rows.encode)
+    ]
+
+    print(f"points: {len(rows)}  orjson: {'yes' if orjson is not None else 'no'}")
+    baseline_seconds, baseline_body = time_encoder(encoders[0][1], rows, args.repeat)
+    for name, encode in encoders:
+        seconds, body = time_encoder(encode, rows, args.repeat)
+        print(
+            f"  {name + ':':18} {seconds * 1000:8.2f} ms/response  {baseline_seconds / seconds:6.1f}x  "
+            f"{len(body) / 1024:8.1f} KiB  {'same bytes' if body == baseline_body else 'DIFFERENT bytes'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
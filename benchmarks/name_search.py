@@ -0,0 +1,86 @@
+"""
+Benchmark for the accent-insensitive name search.
+
+Fills a temporary SQLite database with synthetic municipalities and
+vaccination points and compares the search used by the `get_all`
+endpoints (FTS5 trigram over `search_name`) against the former
+`name ILIKE '%term%'` scan.
+
+Usage:
+    python -m benchmarks.name_search --cities 5570 --points 100000
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from sqlalchemy import create_engine, insert, select
+from app.models import Base, City, Country, State, VaccinationPoint
+from app.search import apply_name_search, normalize_text, setup_search
+
+SYLLABLES = ["são", "jo", "sé", "ma", "ceió", "ara", "pi", "ra", "ca", "bel", "ém", "fei", "ra", "san", "ta", "na",
+             "vi", "tó", "ria", "con", "quis", "ta", "ita", "bu", "ní", "pal", "mei", "ras", "ín", "dios", "gua", "çu"]
+PREFIXES = ["Posto de Vacinação", "Centro de Imunização", "UBS", "Unidade de Saúde"]
+TERMS = ["maceio", "sao jo", "vitoria", "guacu", "imunizacao", "indios"]
+
+
+def random_name(rng: random.Random) -> str:
+    words = [
+        "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+        for _ in range(rng.randint(1, 3))
+    ]
+    return " ".join(words)
+
+
+def time_queries(connection, queries, repeat: int) -> tuple[float, list[int]]:
+    counts = [len(connection.execute(query).all()) for query in queries]
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for query in queries:
+            connection.execute(query).all()
+    return (time.perf_counter() - started) / (repeat * len(queries)), counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cities", type=int, default=5_570)
+    parser.add_argument("--points", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    directory = tempfile.mkdtemp()
+    engine = create_engine(f"sqlite:///{os.path.join(directory, 'benchmark.db')}")
+    Base.metadata.create_all(engine)
+    setup_search(engine)
+
+    with engine.begin() as connection:
+        connection.execute(insert(Country).values(id=1, name="Brasil", search_name="brasil"))
+        connection.execute(insert(State).values(id=1, country_id=1, name="Alagoas", search_name="alagoas"))
+        cities = [random_name(rng) for _ in range(args.cities)]
+        connection.execute(insert(City), [
+            {"id": id, "state_id": 1, "name": name, "search_name": normalize_text(name)}
+            for id, name in enumerate(cities, start=1)
+        ])
+        points = [f"{rng.choice(PREFIXES)} {random_name(rng)}" for _ in range(args.points)]
+        connection.execute(insert(VaccinationPoint), [
+            {"city_id": rng.randint(1, args.cities), "name": name, "search_name": normalize_text(name)}
+            for name in points
+        ])
+
+    print(f"cities: {args.cities}  points: {args.points}  terms: {', '.join(TERMS)}")
+    with engine.connect() as connection:
+        for model in (City, VaccinationPoint):
+            ilike_queries = [select(model).where(model.name.ilike(f"%{term}%")) for term in TERMS]
+            search_queries = [apply_name_search(select(model), model, term, "sqlite") for term in TERMS]
+            ilike_seconds, ilike_counts = time_queries(connection, ilike_queries, args.repeat)
+            search_seconds, search_counts = time_queries(connection, search_queries, args.repeat)
+            print(f"{model.__tablename__}:")
+            print(f"  ilike '%name%':     {ilike_seconds * 1000:8.2f} ms/query  matches {ilike_counts}")
+            print(f"  trigram search:     {search_seconds * 1000:8.2f} ms/query  matches {search_counts}")
+
+
+if __name__ == "__main__":
+    main()
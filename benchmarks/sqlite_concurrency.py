@@ -0,0 +1,142 @@
+"""
+Benchmark for concurrent reads and writes on SQLite.
+
+Fills a temporary SQLite database with synthetic vaccination points, then
+runs reader tasks paging through them (the queries of the list endpoints)
+for a few seconds, first alone and then while writer tasks insert points.
+Each profile gets its own copy of the database:
+- default: the backend of `databases`, one connection per query on the
+  rollback journal
+- performance: the profile of SQLITE_PROFILE=performance, WAL with read
+  connections and a single writer
+
+Usage:
+    python -m benchmarks.sqlite_concurrency --points 10000 --readers 8 --writers 2
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+from databases import Database
+from sqlalchemy import create_engine, insert, select
+from app.models import Base, City, Country, State, VaccinationPoint
+from app.sqlite import read_connections, tune_sqlite
+
+PAGE_SIZE = 100
+
+
+def point_values(rng: random.Random, id: int) -> dict:
+    return {
+        "city_id": 1,
+        "name": f"Posto de Vacinação {id}",
+        "schedules": [],
+        "full_address": f"Rua {id}, {rng.randint(1, 2000)}",
+        "neighborhood": "Centro",
+        "zip_code": "57000-000",
+        "latitude": rng.uniform(-10, -9),
+        "longitude": rng.uniform(-36.5, -35)
+    }
+
+
+def create_database(path: str, points: int, seed: int) -> None:
+    rng = random.Random(seed)
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(Country).values(id=1, name="Brasil"))
+        connection.execute(insert(State).values(id=1, country_id=1, name="Alagoas"))
+        connection.execute(insert(City).values(id=1, state_id=1, name="Maceió"))
+        connection.execute(insert(VaccinationPoint), [point_values(rng, id) for id in range(1, points + 1)])
+    engine.dispose()
+
+
+async def reader(database: Database, points: int, deadline: float, latencies: list[float], errors: list[str]):
+    rng = random.Random()
+    with read_connections():
+        while time.perf_counter() < deadline:
+            query = select(VaccinationPoint).where(
+                VaccinationPoint.id > rng.randint(0, points - PAGE_SIZE)
+            ).order_by(VaccinationPoint.id).limit(PAGE_SIZE)
+            started = time.perf_counter()
+            try:
+                await database.fetch_all(query)
+            except sqlite3.OperationalError as error:  # database is locked
+                errors.append(str(error))
+                continue
+            latencies.append(time.perf_counter() - started)
+
+
+async def writer(database: Database, deadline: float, written: list[int], errors: list[str]):
+    rng = random.Random()
+    while time.perf_counter() < deadline:
+        try:
+            await database.execute(insert(VaccinationPoint).values(point_values(rng, rng.randint(1, 10**9))))
+        except sqlite3.OperationalError as error:
+            errors.append(str(error))
+            continue
+        written.append(1)
+
+
+async def run(database: Database, points: int, readers: int, writers: int, seconds: float) -> dict:
+    latencies, written, errors = [], [], []
+    deadline = time.perf_counter() + seconds
+    await asyncio.gather(
+        *(reader(database, points, deadline, latencies, errors) for _ in range(readers)),
+        *(writer(database, deadline, written, errors) for _ in range(writers))
+    )
+    return {
+        "reads": len(latencies) / seconds,
+        "p50": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "p95": statistics.quantiles(latencies, n=20)[-1] * 1000 if len(latencies) > 1 else 0.0,
+        "writes": len(written) / seconds,
+        "errors": len(errors)
+    }
+
+
+async def benchmark(path: str, profile: str, args) -> None:
+    database = Database(f"sqlite:///{path}")
+    if profile == "performance":
+        tune_sqlite(database, read_size=args.read_pool_size)
+    await database.connect()
+    try:
+        for writers in (0, args.writers):
+            result = await run(database, args.points, args.readers, writers, args.seconds)
+            print(
+                f"  {profile + ':':13} writers {writers}  {result['reads']:9.1f} reads/s  "
+                f"p50 {result['p50']:7.2f} ms  p95 {result['p95']:7.2f} ms  "
+                f"{result['writes']:8.1f} writes/s  {result['errors']} errors"
+            )
+    finally:
+        await database.disconnect()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=10_000)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--read-pool-size", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    template = os.path.join(directory, "template.db")
+    create_database(template, args.points, args.seed)
+
+    print(f"points: {args.points}  readers: {args.readers}  page: {PAGE_SIZE} rows  {args.seconds:g} s per run")
+    for profile in ("default", "performance"):
+        path = os.path.join(directory, f"{profile}.db")
+        shutil.copyfile(template, path)
+        asyncio.run(benchmark(path, profile, args))
+    shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+In-memory Redis for the tests of RedisCacheBackend.
+"""
+
+import asyncio
+import time
+from typing import AsyncIterator, Callable, Iterable
+
+
+class FakeRedisServer:
+    """State shared by the FakeRedis clients of one process: values and channels."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self.values: dict[str, tuple[bytes, float | None]] = {}
+        self.channels: dict[str, set[asyncio.Queue]] = {}
+
+
+class FakeRedis:
+    """
+    In-process stand-in for the few Redis commands used by RedisCacheBackend.
+    Clients built on the same FakeRedisServer behave like workers sharing a
+    server, which lets a single process exercise the pub/sub invalidation.
+    """
+
+    def __init__(self, server: FakeRedisServer | None = None):
+        self.server = server or FakeRedisServer()
+
+    def _get(self, name: str) -> bytes | None:
+        entry = self.server.values.get(name)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= self.server.clock():
+            del self.server.values[name]
+            return None
+        return value
+
+    async def get(self, name: str) -> bytes | None:
+        return self._get(name)
+
+    async def mget(self, names: Iterable[str]) -> list[bytes | None]:
+        return [self._get(name) for name in names]
+
+    async def set(self, name: str, value: bytes | str, ex: int | None = None) -> bool:
+        value = value.encode() if isinstance(value, str) else value
+        self.server.values[name] = (value, self.server.clock() + ex if ex else None)
+        return True
+
+    async def incr(self, name: str) -> int:
+        value = int(self._get(name) or 0) + 1
+        self.server.values[name] = (str(value).encode(), None)
+        return value
+
+    async def publish(self, channel: str, message: bytes | str) -> int:
+        message = message.encode() if isinstance(message, str) else message
+        queues = self.server.channels.get(channel, set())
+        for queue in queues:
+            queue.put_nowait({"type": "message", "channel": channel.encode(), "data": message})
+        return len(queues)
+
+    def pubsub(self) -> "FakePubSub":
+        return FakePubSub(self.server)
+
+    async def aclose(self) -> None:
+        pass
+
+
+class FakePubSub:
+    def __init__(self, server: FakeRedisServer):
+        self.server = server
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.channels: set[str] = set()
+
+    async def subscribe(self, *channels: str) -> None:
+        for channel in channels:
+            self.server.channels.setdefault(channel, set()).add(self.queue)
+            self.channels.add(channel)
+            self.queue.put_nowait({"type": "subscribe", "channel": channel.encode(), "data": len(self.channels)})
+
+    async def unsubscribe(self, *channels: str) -> None:
+        for channel in channels or tuple(self.channels):
+            self.server.channels.get(channel, set()).discard(self.queue)
+            self.channels.discard(channel)
+
+    async def listen(self) -> AsyncIterator[dict]:
+        while True:
+            yield await self.queue.get()
+
+    async def aclose(self) -> None:
+        await self.unsubscribe()
@@ -0,0 +1,43 @@
+import asyncio
+import pytest
+from app.cache import QueryCache, invalidates
+from app.versions import TableVersions
+
+
+class RecordingReferenceData:
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.refreshed = []
+
+    async def refresh(self, database, *tables):
+        if self.fail:
+            raise RuntimeError("refresh failed")
+        self.refreshed.extend(tables)
+
+
+class Repository:
+    def __init__(self, reference_data):
+        self.database = None
+        self.cache = QueryCache()
+        self.versions = TableVersions()
+        self.reference_data = reference_data
+
+    @invalidates("cities")
+    async def write(self, error: Exception | None = None):
+        if error is not None:
+            raise error
+        return True
+
+
+def test_successful_write_refreshes_the_tables():
+    repository = Repository(RecordingReferenceData())
+    assert asyncio.run(repository.write()) is True
+    assert repository.reference_data.refreshed == ["cities"]
+    assert repository.versions.version("cities") == 1
+
+
+def test_failed_write_is_not_masked_nor_refreshed():
+    repository = Repository(RecordingReferenceData(fail=True))
+    with pytest.raises(ValueError):
+        asyncio.run(repository.write(ValueError("write failed")))
+    assert repository.versions.version("cities") == 0
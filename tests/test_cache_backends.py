@@ -0,0 +1,99 @@
+import asyncio
+import pytest
+from app.cache_backends import CacheBackend, RedisCacheBackend
+from tests.fake_redis import FakeRedis, FakeRedisServer
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_cache_backend_is_abstract():
+    with pytest.raises(TypeError):
+        CacheBackend()
+
+
+def test_get_returns_what_was_set_for_the_same_generation():
+    async def scenario():
+        backend = RedisCacheBackend(FakeRedis())
+        generation = await backend.generation(("vaccines",))
+        await backend.set("key", b"body", ("vaccines",), generation)
+        return await backend.get("key", generation)
+
+    assert asyncio.run(scenario()) == b"body"
+
+
+def test_invalidate_moves_to_a_new_generation():
+    async def scenario():
+        backend = RedisCacheBackend(FakeRedis())
+        generation = await backend.generation(("vaccines",))
+        await backend.set("key", b"body", ("vaccines",), generation)
+        await backend.invalidate(("vaccines",))
+        return await backend.get("key", await backend.generation(("vaccines",)))
+
+    assert asyncio.run(scenario()) is None
+
+
+def test_entries_expire_after_the_ttl():
+    clock = Clock()
+
+    async def scenario():
+        backend = RedisCacheBackend(FakeRedis(FakeRedisServer(clock)), ttl_seconds=10)
+        generation = await backend.generation(("cities",))
+        await backend.set("key", b"body", ("cities",), generation)
+        clock.now = 11
+        return await backend.get("key", generation)
+
+    assert asyncio.run(scenario()) is None
+
+
+def test_writes_are_announced_to_the_other_workers_only():
+    async def scenario():
+        server = FakeRedisServer()
+        writer, reader = RedisCacheBackend(FakeRedis(server)), RedisCacheBackend(FakeRedis(server))
+        received = {"writer": [], "reader": []}
+
+        async def handler(name, tables):
+            received[name].append(tables)
+
+        listeners = [
+            asyncio.create_task(writer.listen(lambda tables: handler("writer", tables))),
+            asyncio.create_task(reader.listen(lambda tables: handler("reader", tables)))
+        ]
+        await asyncio.sleep(0.01)
+        await writer.publish(("cities",))
+        await asyncio.sleep(0.01)
+        for listener in listeners:
+            listener.cancel()
+        await asyncio.gather(*listeners, return_exceptions=True)
+        return received
+
+    assert asyncio.run(scenario()) == {"writer": [], "reader": [("cities",)]}
+
+
+def test_listener_survives_a_failing_handler():
+    async def scenario():
+        server = FakeRedisServer()
+        writer, reader = RedisCacheBackend(FakeRedis(server)), RedisCacheBackend(FakeRedis(server))
+        received = []
+
+        async def handler(tables):
+            if tables == ("cities",):
+                raise RuntimeError("database unavailable")
+            received.append(tables)
+
+        listener = asyncio.create_task(reader.listen(handler))
+        await asyncio.sleep(0.01)
+        await writer.client.publish(reader.channel, "not json")
+        await writer.publish(("cities",))
+        await writer.publish(("vaccines",))
+        await asyncio.sleep(0.01)
+        listener.cancel()
+        await asyncio.gather(listener, return_exceptions=True)
+        return received, reader.errors
+
+    assert asyncio.run(scenario()) == ([("vaccines",)], 2)
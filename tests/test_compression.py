@@ -0,0 +1,58 @@
+from starlette.applications import Starlette
+from starlette.responses import Response
+from starlette.routing import Route
+from starlette.testclient import TestClient
+from app.compression import CompressionMiddleware, compress
+
+BODY = b'{"name":"Posto de Vacina\\u00e7\\u00e3o"}' * 200
+
+
+async def identity(request):
+    return Response(BODY, media_type="application/json", headers={"ETag": '"abc"'})
+
+
+async def precompressed(request):
+    return Response(
+        compress(BODY, "gzip"),
+        media_type="application/json",
+        headers={"ETag": '"abc"', "Content-Encoding": "gzip", "Vary": "Accept, Accept-Encoding"}
+    )
+
+
+async def not_modified(request):
+    return Response(status_code=304, headers={"ETag": '"abc"'})
+
+
+app = Starlette(routes=[
+    Route("/identity", identity),
+    Route("/precompressed", precompressed),
+    Route("/not-modified", not_modified)
+])
+app.add_middleware(CompressionMiddleware, minimum_size=100)
+client = TestClient(app)
+
+
+def test_identity_body_keeps_the_strong_etag():
+    response = client.get("/identity", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"] == '"abc"'
+
+
+def test_compressed_body_gets_a_weak_etag():
+    response = client.get("/identity", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"] == 'W/"abc"'
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert response.content == BODY
+
+
+def test_precompressed_body_gets_a_weak_etag():
+    response = client.get("/precompressed", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["etag"] == 'W/"abc"'
+    assert response.content == BODY
+
+
+def test_not_modified_answers_with_the_tag_of_the_encoded_body():
+    response = client.get("/not-modified", headers={"Accept-Encoding": "gzip", "If-None-Match": 'W/"abc"'})
+    assert response.status_code == 304
+    assert response.headers["etag"] == 'W/"abc"'
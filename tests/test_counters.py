@@ -0,0 +1,36 @@
+import asyncio
+from databases import Database
+from sqlalchemy import create_engine, insert, select
+from app.counters import TableCounts
+from app.models import Base, Country
+
+
+def count_twice(tmp_path, keep_counts: bool) -> tuple[int, int]:
+    path = tmp_path / "counts.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(Country).values(name="Brasil"))
+
+    async def scenario():
+        database = Database(f"sqlite:///{path}")
+        await database.connect()
+        try:
+            counts = TableCounts(keep_counts=keep_counts)
+            first, _ = await counts.count(database, select(Country), "countries")
+            # Written by another worker, unannounced
+            await database.execute(insert(Country).values(name="Argentina"))
+            second, _ = await counts.count(database, select(Country), "countries")
+            return first, second
+        finally:
+            await database.disconnect()
+
+    return asyncio.run(scenario())
+
+
+def test_counts_are_read_again_when_other_workers_writes_are_not_announced(tmp_path):
+    assert count_twice(tmp_path, keep_counts=False) == (1, 2)
+
+
+def test_counts_are_kept_when_other_workers_writes_are_announced(tmp_path):
+    assert count_twice(tmp_path, keep_counts=True) == (1, 1)
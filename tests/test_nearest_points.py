@@ -0,0 +1,35 @@
+import asyncio
+import math
+import numpy as np
+import pytest
+from fastapi import HTTPException
+from app.indexes.spatial import PointMatrix
+from app.services.vaccination_point_vaccines import VaccinationPointVaccineService
+
+
+class PointRepository:
+    def get_point_matrix(self) -> PointMatrix:
+        return PointMatrix(np.array([1, 2]), np.array([-9.6, -9.7]), np.array([-35.7, -35.8]))
+
+
+def assign(coordinates):
+    service = VaccinationPointVaccineService(None, PointRepository(), None)
+    return asyncio.run(service.assign_nearest_points(coordinates))
+
+
+@pytest.mark.parametrize("coordinates", [
+    [(math.nan, -35.0)],
+    [(-9.6, math.inf)],
+    [(-9.6, -35.7), (91.0, -35.0)],
+    [(-9.6, -181.0)]
+])
+def test_invalid_coordinates_return_400(coordinates):
+    with pytest.raises(HTTPException) as error:
+        assign(coordinates)
+    assert error.value.status_code == 400
+
+
+def test_valid_coordinates_get_their_nearest_point():
+    [(offset, ids, distances)] = assign([(-9.7, -35.8)])
+    assert (offset, ids.tolist()) == (0, [2])
+    assert distances.tolist() == pytest.approx([0.0])
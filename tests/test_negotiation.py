@@ -0,0 +1,85 @@
+import pytest
+from fastapi import HTTPException, Response
+from starlette.requests import Request
+from app.dependencies import conditional_get
+from app.responses import JSON, MSGPACK, NDJSON, negotiate
+
+
+def request(accept: str | None = None, query: str = "") -> Request:
+    headers = [(b"accept", accept.encode())] if accept is not None else []
+    return Request({"type": "http", "method": "GET", "path": "/", "query_string": query.encode(), "headers": headers})
+
+
+@pytest.mark.parametrize("accept", [
+    None,
+    "*/*",
+    "application/json",
+    "text/html",
+    "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "application/*;q=0.5, text/plain"
+])
+def test_json_by_default(accept):
+    assert negotiate(request(accept)) == JSON
+
+
+@pytest.mark.parametrize("accept", ["application/json;q=0", "*/*;q=0", "text/html, application/*;q=0"])
+def test_406_when_json_is_refused(accept):
+    with pytest.raises(HTTPException) as error:
+        negotiate(request(accept))
+    assert error.value.status_code == 406
+
+
+def test_most_specific_range_sets_the_quality():
+    # application/json is refused even though */* is accepted
+    with pytest.raises(HTTPException):
+        negotiate(request("*/*, application/json;q=0"))
+    assert negotiate(request("application/json;q=0.5, */*;q=0")) == JSON
+
+
+def test_streaming_only_on_streaming_endpoints():
+    assert negotiate(request("application/x-ndjson, application/json;q=0.5"), streaming=True) == NDJSON
+    assert negotiate(request("application/x-ndjson, application/json;q=0.5")) == JSON
+    assert negotiate(request(query="stream=true"), streaming=True) == NDJSON
+    assert negotiate(request(query="stream=true")) == JSON
+
+
+def test_specific_range_beats_wildcard_of_same_quality():
+    assert negotiate(request("*/*, application/x-ndjson"), streaming=True) == NDJSON
+
+
+def test_best_quality_wins():
+    assert negotiate(request("application/x-ndjson;q=0.4, application/json;q=0.9"), streaming=True) == JSON
+
+
+def test_msgpack_when_available():
+    pytest.importorskip("msgpack")
+    assert negotiate(request("*/*, application/x-msgpack")) == MSGPACK
+
+
+
+def etag(accept: str | None = None, query: str = "", streaming: bool = False) -> str:
+    response = Response()
+    conditional_get("countries", streaming=streaming, shared_versions=True)(request(accept, query), response)
+    return response.headers["etag"]
+
+
+def test_conditional_get_is_off_when_the_versions_are_not_shared():
+    response = Response()
+    conditional_get("countries", shared_versions=False)(request(), response)
+    assert "etag" not in response.headers
+    assert "last-modified" not in response.headers
+
+
+def test_conditional_get_tags_ndjson_only_on_streaming_endpoints():
+    assert etag("application/x-ndjson, application/json;q=0.5") == etag()
+    assert etag("application/x-ndjson, application/json;q=0.5", streaming=True) != etag(streaming=True)
+    assert etag(query="stream=true", streaming=True) != etag(query="stream=true")
+
+
+def test_conditional_get_406_does_not_offer_ndjson_on_other_endpoints():
+    with pytest.raises(HTTPException) as error:
+        etag("application/json;q=0")
+    assert "x-ndjson" not in error.value.detail
+    with pytest.raises(HTTPException) as error:
+        etag("application/json;q=0", streaming=True)
+    assert "x-ndjson" in error.value.detail
@@ -0,0 +1,140 @@
+import asyncio
+import pytest
+from databases import Database
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert, select
+from app.main import app
+from app.models import Base, Country
+from app.pagination import decode_cursor, encode_cursor, fetch_page, stream
+from app.search import apply_name_search, install_search, normalize_text
+
+
+@pytest.fixture
+def client():
+    # Without the `with` block the lifespan does not run: these requests fail before any query
+    app.state.limiter.enabled = False
+    yield TestClient(app)
+    app.state.limiter.enabled = True
+
+
+def test_decode_cursor_round_trip():
+    assert decode_cursor(encode_cursor([42]), 1) == (42,)
+    assert decode_cursor(encode_cursor([3, 7]), 2) == (3, 7)
+
+
+def test_decode_cursor_empty_is_first_page():
+    assert decode_cursor(None, 1) is None
+    assert decode_cursor("", 1) is None
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    encode_cursor([1, 2]),
+    encode_cursor([[1]]),
+    encode_cursor([{"a": 1}]),
+    encode_cursor(["abc"]),
+    encode_cursor([1.5]),
+    encode_cursor([True]),
+    encode_cursor([None])
+])
+def test_decode_cursor_rejects_malformed(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor, 1)
+    assert error.value.status_code == 400
+
+
+def test_decode_ranked_cursor():
+    assert decode_cursor(encode_cursor([-1.5e-06, 7]), 1, ranked=True) == (-1.5e-06, 7)
+    assert decode_cursor(encode_cursor([3, 7]), 1, ranked=True) == (3, 7)
+
+
+@pytest.mark.parametrize("cursor", [
+    encode_cursor([7]),
+    encode_cursor([0.5, 1.5]),
+    encode_cursor(["abc", 7]),
+    encode_cursor([True, 7]),
+    "W05hTiw3XQ"  # [NaN,7]
+])
+def test_decode_ranked_cursor_rejects_malformed(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor, 1, ranked=True)
+    assert error.value.status_code == 400
+
+
+@pytest.mark.parametrize("path", ["/countries/", "/vaccination-points/"])
+@pytest.mark.parametrize("key", [[[1]], [{"a": 1}], ["abc"]])
+def test_malformed_cursor_returns_400(client, path, key):
+    response = client.get(path, params={"cursor": encode_cursor(key)})
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Cursor de paginação inválido"}
+
+
+
+@pytest.fixture
+def countries(tmp_path):
+    path = tmp_path / "stream.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(Country), [{"id": id, "name": f"País {id}"} for id in range(1, 6)])
+    return path
+
+
+def read_stream(path, after: tuple | None, limit: int | None) -> tuple[list[int], str | None]:
+    async def scenario():
+        database = Database(f"sqlite:///{path}")
+        await database.connect()
+        try:
+            rows = await stream(database, select(Country), (Country.id,), after, limit)
+            return [row.id async for row in rows], rows.next_cursor
+        finally:
+            await database.disconnect()
+
+    return asyncio.run(scenario())
+
+
+def test_limited_stream_knows_its_next_cursor(countries):
+    assert read_stream(countries, None, 2) == ([1, 2], encode_cursor([2]))
+    assert read_stream(countries, (2,), 2) == ([3, 4], encode_cursor([4]))
+
+
+def test_last_or_unlimited_stream_has_no_next_cursor(countries):
+    assert read_stream(countries, (3,), 2) == ([4, 5], None)
+    assert read_stream(countries, None, None) == ([1, 2, 3, 4, 5], None)
+
+
+
+@pytest.mark.parametrize("term", ["rasil", "br"])
+def test_name_search_pages_keep_the_ranking(tmp_path, term):
+    path = tmp_path / "search.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    names = ["Brasil do Sul e do Norte", "Brasil", "Grande Brasil", "Argentina", "Brasil Central"]
+    with engine.begin() as connection:
+        connection.execute(insert(Country), [
+            {"id": id, "name": name, "search_name": normalize_text(name)} for id, name in enumerate(names, 1)
+        ])
+        install_search(connection)
+
+    async def scenario():
+        database = Database(f"sqlite:///{path}")
+        await database.connect()
+        try:
+            query, keys = apply_name_search(select(Country), Country, term, "sqlite")
+            ranked = [row.id for row in await database.fetch_all(query)]
+            pages, after = [], None
+            while True:
+                result = await fetch_page(database, query, keys, after, 2)
+                assert all("search_rank" not in row._mapping for row in result)
+                pages.extend(row.id for row in result)
+                if result.next_cursor is None:
+                    return ranked, pages
+                after = decode_cursor(result.next_cursor, 1, ranked=True)
+        finally:
+            await database.disconnect()
+
+    ranked, pages = asyncio.run(scenario())
+    assert ranked[0] == 2  # the shortest match ranks first
+    assert sorted(ranked) == [1, 2, 3, 5]
+    assert pages == ranked
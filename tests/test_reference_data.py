@@ -0,0 +1,37 @@
+import asyncio
+from app.cache import QueryCache, missing_ids
+from app.reference_data import ReferenceData
+from app.versions import table_versions
+
+
+class CountingDatabase:
+    """Answers the existence checks with no row, counting the queries."""
+
+    def __init__(self):
+        self.queries = 0
+
+    async def fetch_val(self, query):
+        self.queries += 1
+        return None
+
+
+def test_missing_vaccine_is_confirmed_once():
+    database = CountingDatabase()
+    reference_data = ReferenceData(missing=QueryCache())
+    assert asyncio.run(reference_data.contains(database, "vaccines", 999)) is False
+    assert asyncio.run(reference_data.contains(database, "vaccines", 999)) is False
+    assert database.queries == 1
+
+
+def test_vaccine_write_forgets_the_missing_ids():
+    database = CountingDatabase()
+    reference_data = ReferenceData(missing=missing_ids)
+
+    async def scenario():
+        await reference_data.contains(database, "vaccines", 998)
+        # Announced by another worker: the id may exist now
+        await table_versions.bump("vaccines", remote=True)
+        await reference_data.contains(database, "vaccines", 998)
+
+    asyncio.run(scenario())
+    assert database.queries == 2
@@ -0,0 +1,24 @@
+from app.indexes.spatial import GridIndex, VaccineGridIndexes
+
+
+def build() -> tuple[GridIndex, VaccineGridIndexes]:
+    points = GridIndex()
+    points.rebuild([(1, -9.6, -35.7), (2, -9.7, -35.8)])
+    indexes = VaccineGridIndexes(points)
+    indexes.rebuild([(1, 10), (2, 10), (2, 20)])
+    return points, indexes
+
+
+def test_refresh_points_follows_the_rebuilt_points_index():
+    points, indexes = build()
+    points.rebuild([(1, -8.0, -35.0)])  # point 2 deleted, point 1 moved
+    indexes.refresh_points()
+    assert indexes.nearest(10, -8.0, -35.0) == [(1, 0.0)]
+    assert indexes.get(20) is None
+
+
+def test_retain_vaccines_drops_the_others():
+    _, indexes = build()
+    indexes.retain_vaccines({20})
+    assert indexes.get(10) is None
+    assert [id for id, _ in indexes.nearest(20, -9.7, -35.8)] == [2]